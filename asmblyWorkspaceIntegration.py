@@ -1,120 +1,195 @@
 from openPathUpdateSingle import openPathUpdateSingle
 from helpers import neon
+from helpers import secretManager
+from helpers import workspace
+from helpers import eventCatalog
+from helpers import orderIndex
+from helpers import structuredLog
+from helpers.api import concurrentMap
 
-import httpx
 import json
+import base64
 import datetime
 import os
 import time
-import pytz
-import uvicorn
 import re
+import threading
+import logging
+import functools
+import asyncio
+import anyio.to_thread
+import orjson
 import neonUtil
 
-from fastapi import FastAPI
-from functools import lru_cache
+from fastapi import FastAPI, Depends, Response
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+from fastapi.concurrency import run_in_threadpool
+from cachetools import TTLCache, TLRUCache
 
 from gapps import cardservice as CardService
 from gapps.cardservice import models
-from gapps.cardservice import utilities
-from gapps.cardservice.api import SelectionItem
 
-from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 from google.oauth2.id_token import verify_oauth2_token, exceptions
 from google.auth.transport import requests
-from google.cloud import secretmanager
-import google_crc32c
-
-app = FastAPI(title='Neon Workspace Integration')
 
 dev = True
 
-if dev:
-    BASE_URL = os.environ.get('BASE_URL')
-    GCLOUD_PROJECT_ID = "gmail-neon-op-integration"
-
-    client = secretmanager.SecretManagerServiceClient()
+#Static keys are loaded on first use rather than at import, so a cold instance can start listening
+#before the Secret Manager round trip completes
+BASE_URL = None
+GCLOUD_PROJECT_ID = "gmail-neon-op-integration"
+CLIENT_ID = None
+GSUITE_DOMAIN_NAME = None
+SERVICE_ACCT_EMAIL = None
+NEON_API_USER = None
+NEON_API_KEY = None
+G_USER = None
+G_PASS = None
 
-    secret_id = "static_keys"
+staticKeysLoaded = threading.Event()
+staticKeysLock = threading.Lock()
 
-    static_keys = None
-    if keys := os.environ.get("secret_id", None):
-        static_keys = json.loads(keys)
+def loadStaticKeys():
+    global BASE_URL, GCLOUD_PROJECT_ID, CLIENT_ID, GSUITE_DOMAIN_NAME, SERVICE_ACCT_EMAIL, NEON_API_USER, NEON_API_KEY, \
+        G_USER, G_PASS
 
-    if not isinstance(static_keys, dict):
+    with staticKeysLock:
+        if staticKeysLoaded.is_set():
+            return
 
-        name = f"projects/{GCLOUD_PROJECT_ID}/secrets/{secret_id}/versions/latest"
+        if dev:
+            BASE_URL = os.environ.get('BASE_URL')
 
-        secret = client.access_secret_version(request={"name": name})
+            secret_id = "static_keys"
 
-        # Verify payload checksum.
-        crc32c = google_crc32c.Checksum()
-        crc32c.update(secret.payload.data)
-        if secret.payload.data_crc32c != int(crc32c.hexdigest(), 16):
-            raise Exception("Checksum failed.")
-        
-        payload = secret.payload.data.decode("UTF-8")
-
-        static_keys = json.loads(payload)
-
-    os.environ["static_keys"] = payload
-
-else:
-    static_keys = json.loads(os.environ.get('static_keys'))
-    BASE_URL = static_keys.get("base_url")
-
-GCLOUD_PROJECT_ID = static_keys.get("project_id")
-CLIENT_ID = static_keys.get("client_id")
-GSUITE_DOMAIN_NAME = static_keys.get("gsuite_domain")
-SERVICE_ACCT_EMAIL = static_keys.get("service_acct_email")
-NEON_API_USER = static_keys.get("N_APIuser")
-G_USER = static_keys.get("G_user")
-G_PASS = static_keys.get("G_password")
-
-def create_secret(client: secretmanager.SecretManagerServiceClient, 
-                  project_id: str, 
-                  secret_id: str, 
-                  payload: str) -> secretmanager.CreateSecretRequest:
-    """
-    Create a new secret with the given name, then create a secret version. A secret is a logical wrapper
-    around a collection of secret versions. Secret versions hold the actual
-    secret material.
-    """
-    # Build the resource name of the parent project.
-    parent = f"projects/{project_id}"
-
-    # Create the secret.
-    secret = client.create_secret(
-        request={
-            "parent": parent,
-            "secret_id": secret_id,
-            "secret": {"replication": {"automatic": {}}},
-        }
-    )
+            static_keys = None
+            if keys := os.environ.get("static_keys", None):
+                static_keys = json.loads(keys)
 
-    # Convert the string payload into a bytes. This step can be omitted if you
-    # pass in bytes instead of a str for the payload argument.
-    payload_bytes = payload.encode("UTF-8")
+            if not isinstance(static_keys, dict):
+                static_keys = secretManager.accessSecret(GCLOUD_PROJECT_ID, secret_id)
 
-    # Calculate payload checksum. Passing a checksum in add-version request
-    # is optional.
-    crc32c = google_crc32c.Checksum()
-    crc32c.update(payload_bytes)
+                os.environ["static_keys"] = json.dumps(static_keys)
 
-    # Add the secret version.
-    version = client.add_secret_version(
-        request={
-            "parent": secret.name, 
-            "payload": {
-                "data": payload_bytes,
-                "data_crc32c": int(crc32c.hexdigest(), 16),
-                }
-            }
-    )
+        else:
+            static_keys = json.loads(os.environ.get('static_keys'))
+            BASE_URL = static_keys.get("base_url")
+
+        GCLOUD_PROJECT_ID = static_keys.get("project_id")
+        CLIENT_ID = static_keys.get("client_id")
+        GSUITE_DOMAIN_NAME = static_keys.get("gsuite_domain")
+        SERVICE_ACCT_EMAIL = static_keys.get("service_acct_email")
+        NEON_API_USER = static_keys.get("N_APIuser")
+        #Optional service Neon key, only used for background work that isn't tied to a staff member's request
+        NEON_API_KEY = static_keys.get("N_APIkey")
+        G_USER = static_keys.get("G_user")
+        G_PASS = static_keys.get("G_password")
+
+        staticKeysLoaded.set()
+
+#App-wide dependency: only the first request on a cold instance can end up waiting for the static keys
+async def requireStaticKeys():
+    if not staticKeysLoaded.is_set():
+        await run_in_threadpool(loadStaticKeys)
+
+#Cards are already plain JSON types, so endpoints' return values go straight to orjson instead of through
+#FastAPI's jsonable_encoder and the stdlib json module. Endpoints can also return a Response holding card JSON
+#that is already encoded, which is sent as is. The wrapper matches the endpoint's kind, so async endpoints are
+#awaited on the event loop and plain ones still run on the threadpool.
+def toCardResponse(card):
+    if isinstance(card, Response):
+        return card
+    return ORJSONResponse(card)
+
+class CardRoute(APIRoute):
+    def __init__(self, path: str, endpoint, **kwargs):
+        if asyncio.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def encodeCard(*args, **kwargs):
+                return toCardResponse(await endpoint(*args, **kwargs))
+        else:
+            @functools.wraps(endpoint)
+            def encodeCard(*args, **kwargs):
+                return toCardResponse(endpoint(*args, **kwargs))
+
+        super().__init__(path, encodeCard, **kwargs)
+
+app = FastAPI(title='Neon Workspace Integration', dependencies=[Depends(requireStaticKeys)])
+app.router.route_class = CardRoute
+
+#Endpoints are plain functions, so FastAPI runs each request on an anyio worker thread while it waits on Neon,
+#Google and Secret Manager. Size the pool for blocking I/O rather than Starlette's default of 40 threads.
+THREADPOOL_SIZE = int(os.environ.get("THREADPOOL_SIZE", 100))
+
+#Log one JSON object per line to stdout, which Cloud Run turns into entries with the right severity. Set LOG_LEVEL
+#to DEBUG to also log every card the add-on builds.
+@app.on_event("startup")
+def configureLogging():
+    structuredLog.configure()
+
+@app.on_event("startup")
+async def sizeThreadpool():
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+#Per-user API keys, keyed by the Google user ID of the staff member. Entries expire after USER_KEYS_TTL
+#seconds and are dropped as soon as /submitSettings writes a new secret for that user.
+USER_KEYS_TTL = int(os.environ.get("USER_KEYS_TTL", 3600))
+userKeysCache = TTLCache(maxsize=256, ttl=USER_KEYS_TTL)
+userKeysLock = threading.Lock()
+
+#Sender email and Neon account search results for the open email, keyed by (Google user ID, Gmail message ID).
+#Staff usually click through several contextual actions on the same email, so only the first one has to
+#go to Gmail and Neon. Actions that decide access from the waiver, tour and membership fields always search
+#Neon again (see getMessageContext), so a fix made in Neon shows up right away.
+MESSAGE_CONTEXT_TTL = int(os.environ.get("MESSAGE_CONTEXT_TTL", 300))
+messageContextCache = TTLCache(maxsize=1024, ttl=MESSAGE_CONTEXT_TTL)
+messageContextLock = threading.Lock()
+
+#Registrant counts for events whose search results came back without one, keyed by Neon event ID. Kept short
+#so a count shown on the class list is never far behind a registration made from another instance.
+REGISTRANT_COUNT_TTL = int(os.environ.get("REGISTRANT_COUNT_TTL", 60))
+registrantCountCache = TTLCache(maxsize=1024, ttl=REGISTRANT_COUNT_TTL)
+registrantCountLock = threading.Lock()
+
+#Neon event details (GET /events/{id}), keyed by event ID. Events that have already ended are kept for
+#EVENT_DETAIL_PAST_TTL seconds since they no longer change; upcoming events only for EVENT_DETAIL_TTL seconds.
+EVENT_DETAIL_TTL = int(os.environ.get("EVENT_DETAIL_TTL", 300))
+EVENT_DETAIL_PAST_TTL = int(os.environ.get("EVENT_DETAIL_PAST_TTL", 86400))
+
+def eventDetailTtu(eventId, event, now):
+    eventDates = event.get("eventDates") or {}
+    lastDay = eventDates.get("endDate") or eventDates.get("startDate")
+    if lastDay and datetime.date.fromisoformat(lastDay[:10]) < datetime.date.today():
+        return now + EVENT_DETAIL_PAST_TTL
+    return now + EVENT_DETAIL_TTL
+
+eventDetailCache = TLRUCache(maxsize=4096, ttu=eventDetailTtu)
+eventDetailLock = threading.Lock()
+
+#Registrations made more than this many days ago are never for an upcoming class, so registration lists stop
+#paging through an account's history there
+REGISTRATION_LOOKBACK_DAYS = int(os.environ.get("REGISTRATION_LOOKBACK_DAYS", 365))
+
+#Recent registrations (including attendee and payment IDs) per Neon account ID, as fetched for the cancel and refund
+#lists, so the confirm step can go straight to the write. Registering, cancelling or refunding from the add-on drops
+#the account's entry.
+REGISTRATION_TTL = int(os.environ.get("REGISTRATION_TTL", 120))
+registrationCache = TTLCache(maxsize=512, ttl=REGISTRATION_TTL)
+registrationLock = threading.Lock()
+
+#Registrations submitted to Neon at once by /bulkClassReg
+BULK_REG_CONCURRENCY = int(os.environ.get("BULK_REG_CONCURRENCY", 4))
+
+#Whole-event cancel/refund jobs started from /eventCancelConfirm, keyed by event ID. A job remembers which
+#registrations it has already cancelled and refunded, so starting it again only retries what is left.
+#Jobs live in this instance's memory only, and finished jobs are dropped EVENT_JOB_TTL seconds after they end.
+#A job's status and items are only changed or read while holding eventJobsLock.
+EVENT_JOB_CONCURRENCY = int(os.environ.get("EVENT_JOB_CONCURRENCY", 4))
+EVENT_JOB_TTL = int(os.environ.get("EVENT_JOB_TTL", 3600))
+eventJobs = {}
+eventJobsLock = threading.Lock()
 
 def verifyGoogleToken(token):
     try:
@@ -144,60 +219,105 @@ def decodeUser(token):
 
 def getFromGmailEmail(gevent: models.GEvent, creds: Credentials):
     
-    with build('gmail', 'v1', credentials=creds) as gmailClient:
-        messageToken = gevent.gmail.accessToken
-        messageId = gevent.gmail.messageId
+    messageId = gevent.gmail.messageId
 
-        acctEmail = gmailClient.users().messages().get(
-            userId='me', 
-            id=messageId, 
-            #accessToken=messageToken, 
-            format='metadata', 
-            metadataHeaders='From') \
-                .execute().get('payload').get('headers')[0].get('value')
-    
+    acctEmail = workspace.getMessageHeader(messageId, 'From', accessToken=creds.token)
 
     email = re.search("<(.*?)>", acctEmail).group(1)
     return email
 
 
-@lru_cache()
 def getUserKeys(creds: Credentials, userId: str):
+    with userKeysLock:
+        keys = userKeysCache.get(userId)
+    if keys is not None:
+        return keys
 
-    with build('people', 'v1', credentials=creds) as peopleClient:
-        user = peopleClient.people().get(
-            resourceName='people/me',
-            personFields='names'
-        ).execute()
-    firstName = user.get('names')[0].get('givenName').lower()
+    firstName = workspace.getGivenName(creds.token).lower()
 
     secret_id = firstName + '_' + userId
 
-    if keys := os.environ.get("secret_id", None):
-        return json.loads(keys)
-
-    client = secretmanager.SecretManagerServiceClient()
-
-    name = f"projects/{GCLOUD_PROJECT_ID}/secrets/{secret_id}/versions/latest"
     try:
-        secret = client.access_secret_version(request={"name": name})
+        keys = secretManager.accessSecret(GCLOUD_PROJECT_ID, secret_id)
+    except ValueError as e:
+        return createErrorResponseCard(str(e))
     except:
         return createErrorResponseCard("Secret not found. Please enter your access keys in settings.")
 
-    # Verify payload checksum.
-    crc32c = google_crc32c.Checksum()
-    crc32c.update(secret.payload.data)
-    if secret.payload.data_crc32c != int(crc32c.hexdigest(), 16):
-        return createErrorResponseCard("Checksum failed.")
-    
-    payload = secret.payload.data.decode("UTF-8")
-
-    keys = json.loads(payload)
-
-    os.environ["secret_id"] = json.dumps(keys)
+    # Only successful lookups are cached, so a user who hasn't entered keys yet is asked again next time
+    with userKeysLock:
+        userKeysCache[userId] = keys
 
     return keys
 
+def invalidateUserKeys(userId: str):
+    with userKeysLock:
+        userKeysCache.pop(userId, None)
+
+#Staff secrets are named <first name>_<Google user ID>. Load all of them into the key cache so the first
+#request from each staff member doesn't have to wait on the People API and Secret Manager.
+def prefetchUserKeys():
+    for secretId in secretManager.listSecretIds(GCLOUD_PROJECT_ID):
+        _, _, userId = secretId.rpartition('_')
+        if not userId.isdigit():
+            continue
+        try:
+            keys = secretManager.accessSecret(GCLOUD_PROJECT_ID, secretId)
+        except Exception:
+            logging.exception("Unable to prefetch secret %s", secretId)
+            continue
+        with userKeysLock:
+            userKeysCache[userId] = keys
+
+#Load the static keys, open the Secret Manager channel and import the card builders in the background,
+#so the instance starts accepting requests right away. Set PREFETCH_USER_KEYS to also warm the per-user key cache.
+#The event catalog's reconciler is started here too when the static keys include a service Neon key (N_APIkey);
+#without one the catalog is only refreshed by searches.
+def warmUp():
+    loadStaticKeys()
+    secretManager.getClient()
+    CardService.CardBuilder
+    if NEON_API_KEY:
+        eventCatalog.catalog.startReconciling(NEON_API_KEY, NEON_API_USER)
+    if BASE_URL:
+        for buildCard in STATIC_CARDS:
+            renderStaticCard(buildCard)
+    if os.environ.get("PREFETCH_USER_KEYS"):
+        prefetchUserKeys()
+
+@app.on_event("startup")
+def startWarmUp():
+    threading.Thread(target=warmUp, daemon=True).start()
+
+#Cards that are the same on every request apart from BASE_URL and the current time are built once with these
+#placeholders, encoded with orjson, and served as raw bytes with only those values patched in
+STATIC_BASE_URL = "__BASE_URL__"
+STATIC_NOW_MS = "__NOW_MS__"
+
+#Card builder -> (BASE_URL it was rendered with, encoded card)
+staticCards = {}
+staticCardsLock = threading.Lock()
+
+def renderStaticCard(buildCard) -> bytes:
+    rendered = staticCards.get(buildCard)
+    if rendered is None or rendered[0] != BASE_URL:
+        with staticCardsLock:
+            rendered = staticCards.get(buildCard)
+            if rendered is None or rendered[0] != BASE_URL:
+                if not BASE_URL:
+                    raise RuntimeError("BASE_URL is not set")
+                body = orjson.dumps(buildCard(STATIC_BASE_URL))
+                body = body.replace(STATIC_BASE_URL.encode(), orjson.dumps(BASE_URL)[1:-1])
+                rendered = (BASE_URL, body)
+                staticCards[buildCard] = rendered
+    return rendered[1]
+
+def staticCardResponse(buildCard, nowInMs: int = None) -> Response:
+    body = renderStaticCard(buildCard)
+    if nowInMs is not None:
+        body = body.replace(orjson.dumps(STATIC_NOW_MS), str(nowInMs).encode())
+    return Response(content=body, media_type="application/json")
+
 #Creates a general error reponse card with inputed error text
 def createErrorResponseCard(errorText: str):
     cardSection1TextParagraph1 = CardService.TextParagraph(text=errorText)
@@ -224,18 +344,16 @@ def createErrorResponseCard(errorText: str):
 #179 is WaiverDate
 #182 is Facility Tour Date
 def getNeonAcctByEmail(accountEmail: str, N_APIkey: str, N_APIuser: str) -> dict:
-    searchFields = f'''
-    [
-        {{
+    searchFields = [
+        {
             "field": "Email",
             "operator": "EQUAL",
-            "value": "{accountEmail}"
-        }}
+            "value": accountEmail
+        }
     ]
-    '''
+    searchFields = json.dumps(searchFields)
 
-    outputFields = f'''
-    [
+    outputFields = [
         "Account ID",
         "First Name",
         "Last Name",
@@ -244,7 +362,7 @@ def getNeonAcctByEmail(accountEmail: str, N_APIkey: str, N_APIuser: str) -> dict
         182,
         179
     ]
-    '''
+    outputFields = json.dumps(outputFields)
 
     response = neon.postAccountSearch(searchFields, outputFields, N_APIkey, N_APIuser)
 
@@ -252,10 +370,32 @@ def getNeonAcctByEmail(accountEmail: str, N_APIkey: str, N_APIuser: str) -> dict
 
     return searchResults
 
+#Gets the sender email of the open message and the Neon accounts matching it. With fresh=True only the sender
+#email may come from the cache; the Neon accounts are searched again so their access fields are current.
+def getMessageContext(gevent: models.GEvent, creds: Credentials, userId: str, N_APIkey: str,
+                      fresh: bool = False) -> tuple:
+    messageId = gevent.gmail.messageId
+    cacheKey = (userId, messageId)
+
+    with messageContextLock:
+        context = messageContextCache.get(cacheKey)
+    if context is not None and not fresh:
+        return context
+
+    acctEmail = context[0] if context is not None else getFromGmailEmail(gevent, creds)
+    searchResult = getNeonAcctByEmail(acctEmail, N_APIkey=N_APIkey, N_APIuser=NEON_API_USER)
+
+    context = (acctEmail, searchResult)
+    if messageId:
+        with messageContextLock:
+            messageContextCache[cacheKey] = context
+
+    return context
+
 #Pushes card to front of stack with Neon ID of account with associated email address, otherwise tell user there
 #are no Neon accounts associated with that email
 @app.post('/getNeonId', tags = ["User Info"], summary = "Get the user's Neon ID")
-async def getNeonId(gevent: models.GEvent):
+def getNeonId(gevent: models.GEvent):
     token = gevent.authorizationEventObject.systemIdToken
     if not verifyGoogleToken(token):
         errorText = " Unauthorized."
@@ -275,9 +415,7 @@ async def getNeonId(gevent: models.GEvent):
     if not apiKeys.get("N_APIkey"):
         return apiKeys
 
-    acctEmail = getFromGmailEmail(gevent, creds)
-
-    searchResult = getNeonAcctByEmail(acctEmail, N_APIkey=apiKeys['N_APIkey'], N_APIuser=NEON_API_USER)
+    _, searchResult = getMessageContext(gevent, creds, userId, N_APIkey=apiKeys['N_APIkey'])
 
     if len(searchResult) == 1:
         accountName = searchResult[0]["First Name"] + \
@@ -305,16 +443,9 @@ async def getNeonId(gevent: models.GEvent):
         responseCard = createErrorResponseCard(errorText)
         return responseCard
 
-#Create the class home page and push to front of stack
-@app.post('/classHomePage', tags = ["Classes"], summary = "Display the class home page")
-def classHomePage(gevent: models.GEvent):
-    token = gevent.authorizationEventObject.systemIdToken
-    if not verifyGoogleToken(token):
-        errorText = " Unauthorized."
-        responseCard = createErrorResponseCard(errorText)
-        return responseCard
-    
-    nowInMs = int(time.time() * 1000)
+#The class home page, with STATIC_NOW_MS as the date pickers' default
+def classHomeCard(baseUrl: str) -> dict:
+    nowInMs = STATIC_NOW_MS
 
     cardHeader1 = CardService.CardHeader(
         title="Account Classes Home",
@@ -325,6 +456,9 @@ def classHomePage(gevent: models.GEvent):
         field_name="className",
         title="Class Name",
         multiline=False,
+        suggestions_action=CardService.Action(
+            function_name = baseUrl + app.url_path_for('classNameSuggestions'),
+        ),
     )
 
     cardSection1DatePicker1 = CardService.DatePicker(
@@ -340,7 +474,7 @@ def classHomePage(gevent: models.GEvent):
     )
 
     cardSection1ButtonList1Button1Action1 = CardService.Action(
-        function_name = BASE_URL + app.url_path_for('searchClasses'),
+        function_name = baseUrl + app.url_path_for('searchClasses'),
     )
 
     cardSection1ButtonList1Button1 = CardService.TextButton(
@@ -363,7 +497,7 @@ def classHomePage(gevent: models.GEvent):
     )
         
     cardSection2DecoratedText1Button1Action1 = CardService.Action(
-        function_name = BASE_URL + app.url_path_for('getAcctRegClassRefund'),
+        function_name = baseUrl + app.url_path_for('getAcctRegClassRefund'),
     )
 
     cardSection2DecoratedText1 = CardService.DecoratedText(
@@ -375,9 +509,71 @@ def classHomePage(gevent: models.GEvent):
         widget=[cardSection2DecoratedText1]
     )
 
+    cardSection3TextInput1 = CardService.TextInput(
+        field_name="bulkEventID",
+        title="Event ID",
+        multiline=False,
+    )
+
+    cardSection3TextInput2 = CardService.TextInput(
+        field_name="attendees",
+        title="Emails or Neon IDs",
+        hint="One per line",
+        multiline=True,
+    )
+
+    cardSection3ButtonList1Button1 = CardService.TextButton(
+        text="Register All",
+        text_button_style=CardService.TextButtonStyle.TEXT,
+        on_click_action=CardService.Action(
+            function_name = baseUrl + app.url_path_for('bulkClassReg'),
+        )
+    )
+
+    cardSection3 = CardService.CardSection(
+        header="Bulk Registration",
+        collapsible=True,
+        widget=[cardSection3TextInput1,
+                cardSection3TextInput2,
+                CardService.ButtonSet(button=[cardSection3ButtonList1Button1])
+                ],
+    )
+
+    cardSection4TextInput1 = CardService.TextInput(
+        field_name="cancelEventID",
+        title="Event ID",
+        multiline=False,
+    )
+
+    cardSection4ButtonList1Button1 = CardService.TextButton(
+        text="Cancel All",
+        text_button_style=CardService.TextButtonStyle.TEXT,
+        on_click_action=CardService.Action(
+            function_name = baseUrl + app.url_path_for('eventCancel'),
+            parameters = {"refund": "false"}
+        )
+    )
+
+    cardSection4ButtonList1Button2 = CardService.TextButton(
+        text="Cancel and Refund All",
+        text_button_style=CardService.TextButtonStyle.TEXT,
+        on_click_action=CardService.Action(
+            function_name = baseUrl + app.url_path_for('eventCancel'),
+            parameters = {"refund": "true"}
+        )
+    )
+
+    cardSection4 = CardService.CardSection(
+        header="Cancel Entire Class",
+        collapsible=True,
+        widget=[cardSection4TextInput1,
+                CardService.ButtonSet(button=[cardSection4ButtonList1Button1, cardSection4ButtonList1Button2])
+                ],
+    )
+
     card = CardService.CardBuilder(
         header=cardHeader1,
-        section=[cardSection1, cardSection2],
+        section=[cardSection1, cardSection2, cardSection3, cardSection4],
         name = "classHomePage"
     )
 
@@ -389,113 +585,101 @@ def classHomePage(gevent: models.GEvent):
     
     return {"renderActions":responseCard}
 
-#Push a card to the front of the stack that has all future classes of the searched Event Name. If a date is picked, 
-#only classes on that date will be returned.
-#Every event is returned as its own widget with corresponding button. Clicking that button invokes /classReg to register 
-#the account for that class
-@app.post('/searchClasses', tags = ["Classes"], summary = "Get a list of classes that match the search criteria")
-def searchClasses(gevent: models.GEvent):
+#Create the class home page and push to front of stack
+@app.post('/classHomePage', tags = ["Classes"], summary = "Display the class home page")
+def classHomePage(gevent: models.GEvent):
     token = gevent.authorizationEventObject.systemIdToken
     if not verifyGoogleToken(token):
         errorText = " Unauthorized."
         responseCard = createErrorResponseCard(errorText)
         return responseCard
-    
-    try:
-        creds = Credentials(gevent.authorizationEventObject.userOAuthToken)
-    except:
-        errorText = " Credentials not found."
-        responseCard = createErrorResponseCard(errorText)
-        return responseCard
-    
-    userId = decodeUser(gevent.authorizationEventObject.userIdToken)
 
-    apiKeys = getUserKeys(creds, userId)
-    if not apiKeys.get("N_APIkey"):
-        return apiKeys
+    return staticCardResponse(classHomeCard, nowInMs=int(time.time() * 1000))
+
+#Keep cached seat counts in step with a registration change the add-on just made in Neon
+def recordRegistrationChange(eventId, delta: int):
+    eventCatalog.catalog.adjustRegistered(eventId, delta)
+    with registrantCountLock:
+        registrantCountCache.pop(str(eventId), None)
+
+#Current registrant count for each event in a list of event search results, keyed by event ID. The count comes from
+#the "Registrants" output field when Neon returns it; only events without one fall back to fetching their registrations,
+#concurrently and through registrantCountCache.
+def getRegistrantCounts(classes: list, N_APIkey: str) -> dict:
+    counts = {}
+    missing = []
+    for result in classes:
+        eventId = result["Event ID"]
+        if result.get("Registrants") not in (None, ""):
+            counts[eventId] = int(result["Registrants"])
+            continue
+
+        with registrantCountLock:
+            count = registrantCountCache.get(eventId)
+        if count is None:
+            missing.append(eventId)
+        else:
+            counts[eventId] = count
 
-    if gevent.commonEventObject.formInputs["className"]["stringInputs"]["value"][0]:
-        eventName = gevent.commonEventObject.formInputs["className"]["stringInputs"]["value"][0]
-    else:
-        errorText = " Event name is required."
+    def fetchCount(eventId):
+        event = neon.getEventRegistrants(eventId, N_APIkey, NEON_API_USER)
+        return neon.getEventRegistrantCount(event.get("eventRegistrations"))
+
+    for eventId, count in zip(missing, concurrentMap(fetchCount, missing)):
+        with registrantCountLock:
+            registrantCountCache[eventId] = count
+        counts[eventId] = count
+
+    return counts
+
+#Typeahead for the Class Name input on the class home page. Suggestions come from whatever the upcoming event
+#catalog holds, so typing never waits on Neon, the People API or Secret Manager. The catalog is only refreshed by
+#/searchClasses and by its reconciler, which is started at startup when a service Neon key is configured.
+@app.post('/classNameSuggestions', tags = ["Classes"], summary = "Suggest upcoming class names as the user types")
+def classNameSuggestions(gevent: models.GEvent):
+    token = gevent.authorizationEventObject.systemIdToken
+    if not verifyGoogleToken(token):
+        errorText = " Unauthorized."
         responseCard = createErrorResponseCard(errorText)
         return responseCard
-    if gevent.commonEventObject.formInputs["startDate"]["dateInput"]["msSinceEpoch"] and \
-        gevent.commonEventObject.formInputs["endDate"]["dateInput"]["msSinceEpoch"]:
-        #This will give UTC time - need to convert to CST
-        eventStartDateUTC = datetime.datetime.utcfromtimestamp(
-            gevent.commonEventObject.formInputs["startDate"]["dateInput"]["msSinceEpoch"]/1000
-            )
-        eventStartDate = eventStartDateUTC.date().isoformat()
 
-        eventEndDateUTC = datetime.datetime.utcfromtimestamp(
-            gevent.commonEventObject.formInputs["endDate"]["dateInput"]["msSinceEpoch"]/1000
-            )
-        eventEndDate = eventEndDateUTC.date().isoformat()
+    try:
+        className = gevent.commonEventObject.formInputs["className"]["stringInputs"]["value"][0]
+    except (KeyError, IndexError, TypeError):
+        className = ""
 
-        searchFields = [
-        {
-            "field": "Event Name",
-            "operator": "CONTAIN",
-            "value": eventName
-        },
-        {
-            "field": "Event Start Date",
-            "operator": "GREATER_AND_EQUAL",
-            "value": eventStartDate
-        },
-        {
-            "field": "Event End Date",
-            "operator": "LESS_AND_EQUAL",
-            "value": eventEndDate
-        }]
-    
-    elif gevent.commonEventObject.formInputs["startDate"]["dateInput"]["msSinceEpoch"]:
-        eventStartDateUTC = datetime.datetime.utcfromtimestamp(
-            gevent.commonEventObject.formInputs["startDate"]["dateInput"]["msSinceEpoch"]/1000
-            )
-        eventStartDate = eventStartDateUTC.date().isoformat()
+    suggestions = CardService.Suggestions(suggestion=eventCatalog.catalog.suggestNames(className))
 
-        searchFields = [
-        {
-            "field": "Event Name",  
-            "operator": "CONTAIN",
-            "value": eventName
-        },
-        {
-            "field": "Event Start Date",
-            "operator": "GREATER_AND_EQUAL",
-            "value": eventStartDate
-        }
-        ]
+    return CardService.SuggestionsResponseBuilder(suggestions=suggestions).build()
 
-    elif gevent.commonEventObject.formInputs["endDate"]["dateInput"]["msSinceEpoch"]:
-        eventEndDateUTC = datetime.datetime.utcfromtimestamp(
-            gevent.commonEventObject.formInputs["endDate"]["dateInput"]["msSinceEpoch"]/1000
-            )
-        eventEndDate = eventEndDateUTC.date().isoformat()
-        eventStartDate = datetime.date.today().isoformat()
+#Search results are sent CLASS_PAGE_SIZE classes to a card; the last widget on a page is a "More" button whose
+#continuation token carries the search and the offset of the next page. The token holds everything needed to run the
+#search again, so the next page can be served by any instance.
+CLASS_PAGE_SIZE = int(os.environ.get("CLASS_PAGE_SIZE", 10))
 
-        searchFields = [
-        {
-            "field": "Event Name",
-            "operator": "CONTAIN",
-            "value": eventName
-        },
-        {
-            "field": "Event End Date",
-            "operator": "LESS_AND_EQUAL",
-            "value": eventEndDate
-        },
-        {
-            "field": "Event Start Date",
-            "operator": "GREATER_AND_EQUAL",
-            "value": eventStartDate
-        }
-        ]
-    else:
-        eventStartDate = datetime.date.today().isoformat()
+def encodeContinuationToken(eventName: str, eventStartDate: str, eventEndDate: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps([eventName, eventStartDate, eventEndDate, offset])).decode()
 
+#Returns (eventName, eventStartDate, eventEndDate, offset), or None if the token can't be read
+def decodeContinuationToken(token: str):
+    try:
+        eventName, eventStartDate, eventEndDate, offset = orjson.loads(base64.urlsafe_b64decode(token))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(eventName, str) or not isinstance(eventStartDate, str) or \
+            not (eventEndDate is None or isinstance(eventEndDate, str)) or not isinstance(offset, int) or offset < 0:
+        return None
+    return eventName, eventStartDate, eventEndDate, offset
+
+#All classes matching the search, sorted by start date, or None if Neon couldn't be searched
+def findClasses(eventName: str, eventStartDate: str, eventEndDate: str, N_APIkey: str):
+    #Upcoming classes are searched in the local catalog, which is refreshed in the background with the caller's key.
+    #Neon is only searched while the catalog is empty or too old, or for dates before today.
+    classes = eventCatalog.catalog.search(eventName, eventStartDate, eventEndDate)
+    if eventCatalog.catalog.needsRefresh():
+        eventCatalog.catalog.refreshInBackground(N_APIkey, NEON_API_USER)
+
+    if classes is None:
         searchFields = [
         {
             "field": "Event Name",
@@ -507,33 +691,106 @@ def searchClasses(gevent: models.GEvent):
             "operator": "GREATER_AND_EQUAL",
             "value": eventStartDate
         }]
+        if eventEndDate:
+            searchFields.append({
+                "field": "Event End Date",
+                "operator": "LESS_AND_EQUAL",
+                "value": eventEndDate
+            })
+        searchFields = json.dumps(searchFields)
+        outputFields = [
+            "Event ID",
+            "Event Name",
+            "Event Start Date",
+            "Event Start Time",
+            "Event Capacity",
+            "Registrants"
+        ]
+        outputFields = json.dumps(outputFields)
+        try:
+            classResults = neon.postEventSearch(searchFields, outputFields, N_APIkey, NEON_API_USER)
+        except:
+            return None
+        classes = classResults["searchResults"]
 
-    searchFields = json.dumps(searchFields)
-    outputFields = [
-        "Event ID",
-        "Event Name",
-        "Event Start Date",
-        "Event Start Time",
-        "Event Capacity",
-        "Registrants"
-    ]
-    outputFields = json.dumps(outputFields)
+    classes.sort(key=lambda x: x["Event Start Date"])
+    return classes
+
+#Push a card to the front of the stack that has all future classes of the searched Event Name. If a date is picked, 
+#only classes on that date will be returned.
+#Every event is returned as its own widget with corresponding button. Clicking that button invokes /classReg to register 
+#the account for that class. Only one page of classes is sent at a time, and registrant counts are only looked up for
+#that page; the "More" button at the bottom comes back here with a continuation token and the next page replaces
+#the current card.
+@app.post('/searchClasses', tags = ["Classes"], summary = "Get a list of classes that match the search criteria")
+def searchClasses(gevent: models.GEvent):
+    token = gevent.authorizationEventObject.systemIdToken
+    if not verifyGoogleToken(token):
+        errorText = " Unauthorized."
+        responseCard = createErrorResponseCard(errorText)
+        return responseCard
+    
     try:
-        classResults = neon.postEventSearch(searchFields, outputFields, apiKeys["N_APIkey"], NEON_API_USER)
+        creds = Credentials(gevent.authorizationEventObject.userOAuthToken)
     except:
-        errorText = " Unable to find classes. Check your authentication or use the Neon website."
+        errorText = " Credentials not found."
         responseCard = createErrorResponseCard(errorText)
         return responseCard
     
-    if len(classResults["searchResults"]) > 0:
-        classes = classResults["searchResults"]
-        classes.sort(key=lambda x: x["Event Start Date"])
+    userId = decodeUser(gevent.authorizationEventObject.userIdToken)
+
+    apiKeys = getUserKeys(creds, userId)
+    if not apiKeys.get("N_APIkey"):
+        return apiKeys
+
+    if continuationToken := gevent.commonEventObject.parameters.get("continuationToken"):
+        search = decodeContinuationToken(continuationToken)
+        if search is None:
+            errorText = " Unable to load more classes. Please search again."
+            responseCard = createErrorResponseCard(errorText)
+            return responseCard
+        eventName, eventStartDate, eventEndDate, offset = search
+    else:
+        offset = 0
+        if gevent.commonEventObject.formInputs["className"]["stringInputs"]["value"][0]:
+            eventName = gevent.commonEventObject.formInputs["className"]["stringInputs"]["value"][0]
+        else:
+            errorText = " Event name is required."
+            responseCard = createErrorResponseCard(errorText)
+            return responseCard
+
+        #This will give UTC time - need to convert to CST
+        if gevent.commonEventObject.formInputs["startDate"]["dateInput"]["msSinceEpoch"]:
+            eventStartDateUTC = datetime.datetime.utcfromtimestamp(
+                gevent.commonEventObject.formInputs["startDate"]["dateInput"]["msSinceEpoch"]/1000
+                )
+            eventStartDate = eventStartDateUTC.date().isoformat()
+        else:
+            eventStartDate = datetime.date.today().isoformat()
+
+        eventEndDate = None
+        if gevent.commonEventObject.formInputs["endDate"]["dateInput"]["msSinceEpoch"]:
+            eventEndDateUTC = datetime.datetime.utcfromtimestamp(
+                gevent.commonEventObject.formInputs["endDate"]["dateInput"]["msSinceEpoch"]/1000
+                )
+            eventEndDate = eventEndDateUTC.date().isoformat()
+
+    classes = findClasses(eventName, eventStartDate, eventEndDate, apiKeys["N_APIkey"])
+    if classes is None:
+        errorText = " Unable to find classes. Check your authentication or use the Neon website."
+        responseCard = createErrorResponseCard(errorText)
+        return responseCard
+
+    #The first page is pushed; later pages replace it, so paging doesn't stack cards to back out of
+    navigation = "updateCard" if offset else "pushCard"
+    page = classes[offset:offset + CLASS_PAGE_SIZE]
+    if len(page) > 0:
         responseCard = {
             "renderActions": {
                 "action": {
                     "navigations": [
                         {
-                            "pushCard": {
+                            navigation: {
                                 "sections": [
                                     {
                                         "collapsible": False,
@@ -547,19 +804,22 @@ def searchClasses(gevent: models.GEvent):
                 }
             }
         }
-        for result in classes:
-            maxAttendees = result["Event Capacity"]
-            event = neon.getEventRegistrants(result['Event ID'], apiKeys["N_APIkey"], NEON_API_USER)
-            currentAttendees = neon.getEventRegistrantCount(event["eventRegistrations"])
+        widgets = responseCard["renderActions"]["action"]["navigations"][0][navigation]["sections"][0]["widgets"]
+        registrantCounts = getRegistrantCounts(page, apiKeys["N_APIkey"])
+        for result in page:
+            #A blank or zero capacity means the event has no limit, as in getSeatsLeft
+            maxAttendees = eventCatalog.toInt(result.get("Event Capacity"))
+            currentAttendees = int(registrantCounts[result["Event ID"]])
             disabled = False
             text = "Register"
-            if int(currentAttendees) == int(maxAttendees):
+            if maxAttendees and currentAttendees >= maxAttendees:
                 disabled = True
                 text = "Full"
+            attendance = f"{currentAttendees}/{maxAttendees}" if maxAttendees else f"{currentAttendees} registered"
             newWidget = {
                             "decorated_text": {
                                 "top_label": result["Event ID"],
-                                "text": f"{result['Event Name']} ({currentAttendees}/{maxAttendees})",
+                                "text": f"{result['Event Name']} ({attendance})",
                                 "bottom_label": result["Event Start Date"],
                                 "wrap_text": True,
                                 "button": {
@@ -583,20 +843,41 @@ def searchClasses(gevent: models.GEvent):
                                 }
                             }
                         }
-
-            responseCard["renderActions"]["action"]["navigations"][0] \
-                ["pushCard"]["sections"][0]["widgets"].append(newWidget)
+            widgets.append(newWidget)
+
+        nextOffset = offset + len(page)
+        if nextOffset < len(classes):
+            widgets.append({
+                "decorated_text": {
+                    "text": f"Showing {offset + 1}-{nextOffset} of {len(classes)} classes",
+                    "wrap_text": True,
+                    "button": {
+                        "text": "More",
+                        "on_click": {
+                            "action": {
+                                "function": BASE_URL + app.url_path_for('searchClasses'),
+                                "parameters": [
+                                    {
+                                        "key": "continuationToken",
+                                        "value": encodeContinuationToken(eventName, eventStartDate, eventEndDate,
+                                                                         nextOffset)
+                                    }
+                                ]
+                            }
+                        }
+                    }
+                }
+            })
         return responseCard
     else:
         errorText = "No classes found. Check your spelling or try a different date."
         responseCard = createErrorResponseCard(errorText)
         return responseCard
     
-
 # Registers the active gmail user for the selected class with a $0 price. Pulls the eventID from the bottom label of the
 # previous card
 @app.post('/classReg', tags = ["Classes"], summary = "Register the user for the selected class")
-async def classReg(gevent: models.GEvent):
+def classReg(gevent: models.GEvent):
     token = gevent.authorizationEventObject.systemIdToken
     if not verifyGoogleToken(token):
         errorText = " Unauthorized."
@@ -616,9 +897,7 @@ async def classReg(gevent: models.GEvent):
     if not apiKeys.get("N_APIkey"):
         return apiKeys
 
-    acctEmail = getFromGmailEmail(gevent, creds)
-
-    searchResult = getNeonAcctByEmail(acctEmail, N_APIkey=apiKeys['N_APIkey'], N_APIuser=NEON_API_USER)
+    _, searchResult = getMessageContext(gevent, creds, userId, N_APIkey=apiKeys['N_APIkey'])
 
     eventID = gevent.commonEventObject.parameters.get('eventID')
     eventName = gevent.commonEventObject.parameters.get('eventName')
@@ -638,13 +917,16 @@ async def classReg(gevent: models.GEvent):
     accountID = searchResult[0]["Account ID"]
 
     try:
-        neon.postEventRegistration(accountID, 
-                                   eventID, 
-                                   accountFirstName, 
-                                   accountLastName, 
-                                   N_APIkey=apiKeys['N_APIkey'], 
-                                   N_APIuser=NEON_API_USER
-                                   )
+        regResponse = neon.postEventRegistration(accountID, 
+                                                 eventID, 
+                                                 accountFirstName, 
+                                                 accountLastName, 
+                                                 N_APIkey=apiKeys['N_APIkey'], 
+                                                 N_APIuser=NEON_API_USER
+                                                 )
+        invalidateRegistrations(accountID)
+        if regResponse.status_code in range(200, 300):
+            recordRegistrationChange(eventID, 1)
     except:
         errorText = " Registration failed. Use Neon to register individual."
         responseCard = createErrorResponseCard(errorText)
@@ -663,11 +945,266 @@ async def classReg(gevent: models.GEvent):
         notification=notification
     )
 
-    responseCard = navAction.build()
+    responseCard = navAction.build()
+
+    return responseCard
+
+#Split the attendee list from the bulk registration card into entries (emails or Neon IDs)
+def parseAttendees(text: str) -> list:
+    return [entry for entry in re.split(r"[\s,;]+", text or "") if entry]
+
+#Resolve bulk registration entries to Neon accounts. Neon IDs are looked up together with account searches over ID
+#ranges and emails are searched concurrently. Returns one {"entry", "account", "result"} dict per entry, in order;
+#"account" is None and "result" says why when an entry can't be registered.
+def resolveAttendees(entries: list, N_APIkey: str) -> list:
+    ids = [entry for entry in entries if entry.isdigit()]
+    emails = list(dict.fromkeys(entry.lower() for entry in entries if "@" in entry))
+
+    accountsById = neonUtil.getAccountsByIds(ids, N_APIkey, NEON_API_USER) if ids else {}
+    searchEmail = lambda email: getNeonAcctByEmail(email, N_APIkey=N_APIkey, N_APIuser=NEON_API_USER) or []
+    accountsByEmail = dict(zip(emails, concurrentMap(searchEmail, emails)))
+
+    attendees = []
+    seen = set()
+    for entry in entries:
+        account = None
+        result = None
+        if entry.isdigit():
+            account = accountsById.get(str(int(entry)))
+            if account is None:
+                result = "No Neon account found"
+        elif "@" in entry:
+            matches = accountsByEmail[entry.lower()]
+            if len(matches) == 1:
+                account = matches[0]
+            elif matches:
+                result = "Multiple Neon accounts found"
+            else:
+                result = "No Neon account found"
+        else:
+            result = "Not an email or Neon ID"
+
+        if account is not None and account["Account ID"] in seen:
+            account = None
+            result = "Duplicate"
+        elif account is not None:
+            seen.add(account["Account ID"])
+
+        attendees.append({"entry": entry, "account": account, "result": result})
+
+    return attendees
+
+#Seats left in an event, from its capacity and current succeeded registrations. None if the event has no capacity
+#limit, which Neon reports as a missing or zero maximumAttendees.
+def getSeatsLeft(eventId, N_APIkey: str):
+    event, registrants = concurrentMap(lambda fetch: fetch(eventId, N_APIkey=N_APIkey, N_APIuser=NEON_API_USER),
+                                       [neon.getEvent, neon.getEventRegistrants])
+    maxAttendees = int(event.get("maximumAttendees") or 0)
+    if not maxAttendees:
+        return None
+    registered = neon.getEventRegistrantCount(registrants.get("eventRegistrations"))
+    return maxAttendees - registered
+
+#Register resolved attendees for an event, at most BULK_REG_CONCURRENCY at a time. Capacity is checked once up front
+#and attendees past the remaining seats aren't submitted. Fills in each attendee's "result".
+def bulkRegister(eventId, attendees: list, N_APIkey: str) -> list:
+    toRegister = [attendee for attendee in attendees if attendee["account"] is not None]
+    if not toRegister:
+        return attendees
+
+    seatsLeft = getSeatsLeft(eventId, N_APIkey)
+    if seatsLeft is not None:
+        seatsLeft = max(seatsLeft, 0)
+        for attendee in toRegister[seatsLeft:]:
+            attendee["result"] = "Not registered, class is full"
+        toRegister = toRegister[:seatsLeft]
+
+    def register(attendee):
+        account = attendee["account"]
+        try:
+            response = neon.postEventRegistration(account["Account ID"],
+                                                  eventId,
+                                                  account["First Name"],
+                                                  account["Last Name"],
+                                                  N_APIkey=N_APIkey,
+                                                  N_APIuser=NEON_API_USER
+                                                  )
+        except:
+            return "Registration failed"
+        if response.status_code not in range(200, 300):
+            return f"Registration failed ({response.status_code})"
+        invalidateRegistrations(account["Account ID"])
+        return "Registered"
+
+    for attendee, result in zip(toRegister, concurrentMap(register, toRegister, maxWorkers=BULK_REG_CONCURRENCY)):
+        attendee["result"] = result
+
+    recordRegistrationChange(eventId, sum(1 for attendee in toRegister if attendee["result"] == "Registered"))
+
+    return attendees
+
+# Registers every email or Neon ID entered on the bulk registration card of the class home page for one class, then
+# pushes a card with the result for each attendee
+@app.post('/bulkClassReg', tags = ["Classes"], summary = "Register a list of emails or Neon IDs for a class")
+def bulkClassReg(gevent: models.GEvent):
+    token = gevent.authorizationEventObject.systemIdToken
+    if not verifyGoogleToken(token):
+        errorText = " Unauthorized."
+        responseCard = createErrorResponseCard(errorText)
+        return responseCard
+
+    try:
+        creds = Credentials(gevent.authorizationEventObject.userOAuthToken)
+    except:
+        errorText = " Credentials not found."
+        responseCard = createErrorResponseCard(errorText)
+        return responseCard
+
+    userId = decodeUser(gevent.authorizationEventObject.userIdToken)
+
+    apiKeys = getUserKeys(creds, userId)
+    if not apiKeys.get("N_APIkey"):
+        return apiKeys
+
+    formInputs = gevent.commonEventObject.formInputs or {}
+    try:
+        eventID = formInputs["bulkEventID"]["stringInputs"]["value"][0].strip()
+    except (KeyError, IndexError):
+        eventID = ""
+    try:
+        entries = parseAttendees(formInputs["attendees"]["stringInputs"]["value"][0])
+    except (KeyError, IndexError):
+        entries = []
+
+    if not eventID.isdigit():
+        errorText = " A numeric Event ID is required."
+        responseCard = createErrorResponseCard(errorText)
+        return responseCard
+    if not entries:
+        errorText = " Enter at least one email or Neon ID."
+        responseCard = createErrorResponseCard(errorText)
+        return responseCard
+
+    try:
+        attendees = resolveAttendees(entries, apiKeys["N_APIkey"])
+        attendees = bulkRegister(eventID, attendees, apiKeys["N_APIkey"])
+    except:
+        errorText = " Bulk registration failed. Check your authentication or use the Neon website."
+        responseCard = createErrorResponseCard(errorText)
+        return responseCard
+
+    registered = sum(1 for attendee in attendees if attendee["result"] == "Registered")
+
+    temp_widgets = []
+    for attendee in attendees:
+        account = attendee["account"]
+        temp_widgets.append(CardService.DecoratedText(
+            text = f"{account['First Name']} {account['Last Name']}" if account else attendee["entry"],
+            top_label = attendee["entry"],
+            bottom_label = attendee["result"],
+            wrap_text = True
+        ))
+
+    cardSection1ButtonList1Button1 = CardService.TextButton(
+        text = "Return to Class Page",
+        text_button_style=CardService.TextButtonStyle.TEXT,
+        on_click_action = CardService.Action(
+            function_name = BASE_URL + app.url_path_for('popToClassPage'),
+        )
+    )
+
+    cardSection1 = CardService.CardSection(
+        header = f"Registered {registered} of {len(attendees)} for event {eventID}",
+        widget = temp_widgets + [CardService.ButtonSet(button=[cardSection1ButtonList1Button1])],
+    )
+
+    card = CardService.CardBuilder(
+        section = [cardSection1],
+        name = "bulkClassRegResultCard"
+    )
+
+    responseCard = card.build()
 
-    return responseCard
+    return {"renderActions": responseCard}
     
 
+#Event details for several events at once, keyed by event ID. Cached events are served from eventDetailCache and the
+#rest are looked up together with neon.getEventsByIds. Anything the search doesn't return is fetched from Neon one
+#event at a time, concurrently.
+def getEvents(eventIds, N_APIkey: str) -> dict:
+    events = {}
+    missing = []
+    for eventId in dict.fromkeys(eventIds):
+        with eventDetailLock:
+            event = eventDetailCache.get(eventId)
+        if event is None:
+            missing.append(eventId)
+        else:
+            events[eventId] = event
+
+    found = neon.getEventsByIds(missing, N_APIkey, NEON_API_USER) if missing else {}
+    fetched = {eventId: found[str(eventId)] for eventId in missing if str(eventId) in found}
+
+    notFound = [eventId for eventId in missing if eventId not in fetched]
+    fetchEvent = lambda eventId: neon.getEvent(eventId, N_APIkey=N_APIkey, N_APIuser=NEON_API_USER)
+    fetched.update(zip(notFound, concurrentMap(fetchEvent, notFound)))
+
+    with eventDetailLock:
+        for eventId, event in fetched.items():
+            eventDetailCache[eventId] = event
+    events.update(fetched)
+
+    return events
+
+#An account's registrations from the last REGISTRATION_LOOKBACK_DAYS days, newest first
+def getRegistrations(neonId, N_APIkey: str) -> list:
+    with registrationLock:
+        registrations = registrationCache.get(str(neonId))
+    if registrations is not None:
+        return registrations
+
+    since = datetime.date.today() - datetime.timedelta(days=REGISTRATION_LOOKBACK_DAYS)
+    registrations = list(neon.iterAccountEventRegistrations(neonId, N_APIkey=N_APIkey, N_APIuser=NEON_API_USER,
+                                                            since=since))
+    with registrationLock:
+        registrationCache[str(neonId)] = registrations
+    return registrations
+
+#A cached registration by registration ID, or None if the account's registrations aren't cached
+def getCachedRegistration(neonId, registrationId):
+    with registrationLock:
+        registrations = registrationCache.get(str(neonId)) or []
+    for registration in registrations:
+        if str(registration.get("id")) == str(registrationId):
+            return registration
+    return None
+
+def invalidateRegistrations(neonId):
+    with registrationLock:
+        registrationCache.pop(str(neonId), None)
+
+#Registrations from an account's history (getRegistrations) that are SUCCEEDED and for a class
+#starting today or later, sorted by start date. Only events with a succeeded registration are looked up.
+def getUpcomingClasses(registrations: list, N_APIkey: str) -> list:
+    succeeded = [registration for registration in registrations or []
+                 if registration["tickets"][0]["attendees"][0]["registrationStatus"] == "SUCCEEDED"]
+    events = getEvents([registration["eventId"] for registration in succeeded], N_APIkey)
+
+    today = datetime.date.today()
+    upcomingClasses = []
+    for registration in succeeded:
+        eventInfo = events[registration["eventId"]]
+        eventDate = datetime.datetime.fromisoformat(eventInfo["eventDates"]["startDate"]).date()
+        if eventDate >= today:
+            upcomingClasses.append({"regID": registration["id"],
+                                    "eventID": registration["eventId"],
+                                    "eventName": eventInfo["name"],
+                                    "startDate": eventInfo["eventDates"]["startDate"]
+                                    })
+
+    upcomingClasses.sort(key=lambda x: x["startDate"])
+    return upcomingClasses
+
 #Pushes card to front of stack showing all classes the user is currrently registered for. Each class is shown
 # as its own widget with a corresponding button to cancel the registration for that class.
 @app.post('/getAcctRegClassCancel', tags=["Classes"])
@@ -691,35 +1228,19 @@ def getAcctRegClassCancel(gevent: models.GEvent):
     if not apiKeys.get("N_APIkey"):
         return apiKeys
 
-    acctEmail = getFromGmailEmail(gevent, creds)
-
-    searchResult = getNeonAcctByEmail(acctEmail, N_APIkey=apiKeys['N_APIkey'], N_APIuser=NEON_API_USER)
+    _, searchResult = getMessageContext(gevent, creds, userId, N_APIkey=apiKeys['N_APIkey'])
 
     if len(searchResult) == 1:
         neonID = searchResult[0]['Account ID']
         try:
-            classDict = neon.getAccountEventRegistrations(neonID, N_APIkey=apiKeys['N_APIkey'], N_APIuser=NEON_API_USER)
+            registrations = getRegistrations(neonID, apiKeys['N_APIkey'])
+            upcomingClasses = getUpcomingClasses(registrations, apiKeys['N_APIkey'])
         except:
             errorText = " Unable to find classes. Account may not have registered for any classes. \
                 Alternaively, check your authentication or use the Neon website."
             responseCard = createErrorResponseCard(errorText)
             return responseCard
-        today = datetime.date.today()
-        upcomingClasses = []
-        for event in classDict["eventRegistrations"]:
-            registrationID = event["id"]
-            eventID = event["eventId"]
-            regStatus = event["tickets"][0]["attendees"][0]["registrationStatus"]
-            eventInfo = neon.getEvent(eventID, N_APIkey=apiKeys['N_APIkey'], N_APIuser=NEON_API_USER)
-            eventDate = datetime.datetime.fromisoformat(eventInfo["eventDates"]["startDate"]).date()
-            eventName = eventInfo["name"]
-            if eventDate - today >= datetime.timedelta(days=0) and regStatus == "SUCCEEDED":
-                upcomingClasses.append({"regID":registrationID, 
-                                        "eventID":eventID, 
-                                        "eventName":eventName, 
-                                        "startDate": eventInfo["eventDates"]["startDate"]
-                                        })
-        
+
         if not len(upcomingClasses):
             errorText = "No upcoming classes found."
             responseCard = createErrorResponseCard(errorText)
@@ -809,42 +1330,24 @@ def getAcctRegClassRefund(gevent: models.GEvent):
     if not apiKeys.get("N_APIkey"):
         return apiKeys
 
-    acctEmail = getFromGmailEmail(gevent, creds)
-
-    searchResult = getNeonAcctByEmail(acctEmail, N_APIkey=apiKeys['N_APIkey'], N_APIuser=NEON_API_USER)
+    _, searchResult = getMessageContext(gevent, creds, userId, N_APIkey=apiKeys['N_APIkey'])
 
     if len(searchResult) == 1:
         neonID = searchResult[0]['Account ID']
         try:
-            classDict = neon.getAccountEventRegistrations(neonID, N_APIkey=apiKeys['N_APIkey'], N_APIuser=NEON_API_USER)
+            registrations = getRegistrations(neonID, apiKeys['N_APIkey'])
+            upcomingClasses = getUpcomingClasses(registrations, apiKeys['N_APIkey'])
         except:
             errorText = " Unable to find classes. Account may not have registered for any classes. \
                 Alternaively, check your authentication or use the Neon website."
             responseCard = createErrorResponseCard(errorText)
             return responseCard
-        today = datetime.date.today()
-        upcomingClasses = []
-        for event in classDict["eventRegistrations"]:
-            registrationID = event["id"]
-            eventID = event["eventId"]
-            regStatus = event["tickets"][0]["attendees"][0]["registrationStatus"]
-            eventInfo = neon.getEvent(eventID, N_APIkey=apiKeys['N_APIkey'], N_APIuser=NEON_API_USER)
-            eventDate = datetime.datetime.fromisoformat(eventInfo["eventDates"]["startDate"]).date()
-            eventName = eventInfo["name"]
-            if eventDate - today >= datetime.timedelta(days=0) and regStatus == "SUCCEEDED":
-                upcomingClasses.append({"regID":registrationID, 
-                                        "eventID":eventID, 
-                                        "eventName":eventName, 
-                                        "startDate": eventInfo["eventDates"]["startDate"]
-                                        })
-        
+
         if not len(upcomingClasses):
             errorText = "No upcoming classes found."
             responseCard = createErrorResponseCard(errorText)
             return responseCard
-        
-        upcomingClasses.sort(key=lambda x: x["startDate"])
-        
+
         temp_widgets = []
 
         cardHeader1 = CardService.CardHeader(
@@ -1003,13 +1506,17 @@ def classCancelConfirm(gevent: models.GEvent):
                                           eventId = eventID, 
                                           neonId = neonId, 
                                           N_APIkey=apiKeys['N_APIkey'], 
-                                          N_APIuser=NEON_API_USER
+                                          N_APIuser=NEON_API_USER,
+                                          registration=getCachedRegistration(neonId, regId)
                                           )
+        invalidateRegistrations(neonId)
     except:
         errorText = " Cancelation failed. Check your authentication or use the Neon website."
         responseCard = createErrorResponseCard(errorText)
         return responseCard
     if cancelResponse.status_code in range(200, 300):
+        recordRegistrationChange(eventID, -1)
+
         cardSection1TextParagraph1 = CardService.TextParagraph(
             text = f"Successfully canceled registration."
         )
@@ -1058,9 +1565,7 @@ def classCancelConfirm(gevent: models.GEvent):
         return responseCard
 
 
-@app.post('/popCard', tags = ["Navigation"], summary="Pop a card from the navigation stack")
-def popCard():
-
+def popCardResponse(baseUrl: str) -> dict:
     popOneCard = CardService.Navigation().popCard()
 
     response = CardService.ActionResponseBuilder(
@@ -1069,8 +1574,11 @@ def popCard():
 
     return response.build()
 
-@app.post('/popToClassPage', tags = ["Navigation"], summary="Navigate back to the class home page")
-def popToClassPage():
+@app.post('/popCard', tags = ["Navigation"], summary="Pop a card from the navigation stack")
+def popCard():
+    return staticCardResponse(popCardResponse)
+
+def popToClassPageResponse(baseUrl: str) -> dict:
     returnToClassPage = CardService.Navigation().popToNamedCard(
         card_name  = "classHomePage"
     )
@@ -1081,8 +1589,11 @@ def popToClassPage():
 
     return response.build()
 
-@app.post('/popToHome', tags = ["Navigation"], summary="Pop to the root of the card stack")
-def popToHome():
+@app.post('/popToClassPage', tags = ["Navigation"], summary="Navigate back to the class home page")
+def popToClassPage():
+    return staticCardResponse(popToClassPageResponse)
+
+def popToHomeResponse(baseUrl: str) -> dict:
     returnToHome = CardService.Navigation().popToRoot()
 
     response = CardService.ActionResponseBuilder(
@@ -1091,6 +1602,10 @@ def popToHome():
 
     return response.build()
 
+@app.post('/popToHome', tags = ["Navigation"], summary="Pop to the root of the card stack")
+def popToHome():
+    return staticCardResponse(popToHomeResponse)
+
 @app.post('/classRefund', tags = ["Classes"], summary = "Display the refund confirmation card")
 def classRefund(gevent: models.GEvent):
     token = gevent.authorizationEventObject.systemIdToken
@@ -1179,17 +1694,43 @@ def classRefundConfirm(gevent: models.GEvent):
     if not apiKeys.get("N_APIkey"):
         return apiKeys
 
+    #A refund cancels the registration first, then refunds its payment, the same as an event-wide cancel job. The seat
+    #is released as soon as the cancel succeeds, whether or not the refund goes through.
+    registration = getCachedRegistration(neonId, regId)
     try:
-        cancelResponse = neon.refundClass(eventId = eventID, 
-                                          neonId = neonId, 
-                                          N_APIkey=apiKeys['N_APIkey'], 
-                                          N_APIuser=NEON_API_USER
+        cancelResponse = neon.cancelClass(regId,
+                                          eventID,
+                                          neonId,
+                                          N_APIkey=apiKeys['N_APIkey'],
+                                          N_APIuser=NEON_API_USER,
+                                          registration=registration
                                           )
     except:
+        invalidateRegistrations(neonId)
         errorText = " Cancellation failed. Check your authentication or use the Neon website."
         responseCard = createErrorResponseCard(errorText)
         return responseCard
-    if cancelResponse.status_code in range(200, 300):
+    if cancelResponse.status_code not in range(200, 300):
+        invalidateRegistrations(neonId)
+        errorText = f" Cancellation failed with status code {cancelResponse.status_code}. \
+            Use Neon to cancel registration."
+        responseCard = createErrorResponseCard(errorText)
+        return responseCard
+    recordRegistrationChange(eventID, -1)
+
+    try:
+        refundResponse = neon.refundClass(eventId = eventID, 
+                                          neonId = neonId, 
+                                          N_APIkey=apiKeys['N_APIkey'], 
+                                          N_APIuser=NEON_API_USER,
+                                          registration=registration
+                                          )
+        refundStatus = refundResponse.status_code
+    except:
+        refundStatus = None
+    finally:
+        invalidateRegistrations(neonId)
+    if refundStatus in range(200, 300):
         cardSection1TextParagraph1 = CardService.TextParagraph(
             text = f"Successfully cancelled and refunded registration."
         )
@@ -1232,11 +1773,293 @@ def classRefundConfirm(gevent: models.GEvent):
  
         return {"renderActions": responseCard}
     else:
-        errorText = f" Cancellation failed with status code {cancelResponse.status_code}. \
-            Use Neon to cancel registration."
+        status = f" with status code {refundStatus}" if refundStatus is not None else ""
+        errorText = f" Registration was canceled, but the refund failed{status}. \
+            Use Neon to refund the payment."
+        responseCard = createErrorResponseCard(errorText)
+        return responseCard
+
+#Cancel (and optionally refund) one registration of an event-wide job, skipping steps it has already done. The
+#registration is canceled first so a payment problem never keeps someone enrolled; a failed refund is reported on its
+#own and retried by itself when the job is started again.
+def processEventJobItem(job: dict, item: dict, N_APIkey: str):
+    registration = item["registration"]
+    neonId = registration.get("registrantAccountId")
+    try:
+        if not item["canceled"]:
+            try:
+                response = neon.cancelClass(registration["id"], job["eventId"], neonId, N_APIkey, NEON_API_USER,
+                                            registration=registration)
+                if response.status_code not in range(200, 300):
+                    raise ValueError(f"cancel returned status code {response.status_code}")
+            except Exception as e:
+                with eventJobsLock:
+                    item["result"] = f"Failed: {e}"
+                    item["failed"] = True
+                return
+            with eventJobsLock:
+                item["canceled"] = True
+            recordRegistrationChange(job["eventId"], -1)
+
+        if job["refund"] and registration.get("payments") and not item["refunded"]:
+            try:
+                response = neon.refundClass(job["eventId"], neonId, N_APIkey, NEON_API_USER,
+                                            registration=registration)
+                if response.status_code not in range(200, 300):
+                    raise ValueError(f"refund returned status code {response.status_code}")
+            except Exception as e:
+                with eventJobsLock:
+                    item["result"] = f"Canceled; refund failed: {e}"
+                    item["failed"] = True
+                return
+            with eventJobsLock:
+                item["refunded"] = True
+
+        with eventJobsLock:
+            item["result"] = "Canceled and refunded" if item["refunded"] else "Canceled"
+            item["failed"] = False
+    finally:
+        invalidateRegistrations(neonId)
+
+#Pull the event roster once, then work through every registration that was active when the job first saw it.
+#The items for the roster are filled in on a new dict that replaces job["items"] in one step, so a status poll never
+#sees a half built list.
+def runEventJob(job: dict, N_APIkey: str):
+    try:
+        roster = neon.getEventRegistrants(job["eventId"], N_APIkey, NEON_API_USER).get("eventRegistrations") or []
+
+        with eventJobsLock:
+            items = dict(job["items"])
+        for registration in roster:
+            attendee = registration["tickets"][0]["attendees"][0]
+            item = items.get(str(registration["id"]))
+            if item is None:
+                active = attendee.get("registrationStatus") == "SUCCEEDED"
+                item = {"name": f"{attendee.get('firstName', '')} {attendee.get('lastName', '')}".strip(),
+                        "active": active,
+                        "canceled": not active,
+                        "refunded": False,
+                        "failed": False,
+                        "result": "Pending" if active else "Already canceled"}
+                items[str(registration["id"])] = item
+            item["registration"] = registration
+        with eventJobsLock:
+            job["items"] = items
+
+        pending = [item for item in items.values()
+                   if item["active"] and (not item["canceled"] or (job["refund"] and not item["refunded"]
+                                                                   and item["registration"].get("payments")))]
+        concurrentMap(lambda item: processEventJobItem(job, item, N_APIkey), pending,
+                      maxWorkers=EVENT_JOB_CONCURRENCY)
+    except Exception as e:
+        logging.exception("Event cancel job for %s failed", job["eventId"])
+        with eventJobsLock:
+            job["error"] = str(e)
+    finally:
+        with eventJobsLock:
+            job["status"] = "done"
+            job["finished"] = time.monotonic()
+
+#Forget finished jobs that ended more than EVENT_JOB_TTL seconds ago. Call with eventJobsLock held.
+def pruneEventJobs():
+    expired = time.monotonic() - EVENT_JOB_TTL
+    for eventId, job in list(eventJobs.items()):
+        if job["status"] == "done" and job.get("finished", expired) <= expired:
+            del eventJobs[eventId]
+
+#Start (or resume) the cancel job for an event on a background thread. A job that is still running is returned as is.
+def startEventJob(eventId: str, refund: bool, N_APIkey: str) -> dict:
+    with eventJobsLock:
+        pruneEventJobs()
+        job = eventJobs.get(eventId)
+        if job is not None and job["status"] == "running":
+            return job
+        if job is None:
+            job = {"eventId": eventId, "items": {}}
+            eventJobs[eventId] = job
+        job.update({"status": "running", "refund": refund, "error": None})
+
+    threading.Thread(target=runEventJob, args=(job, N_APIkey), daemon=True).start()
+    return job
+
+#Progress card for an event cancel job, with a row per registration once the job has finished. The card is built
+#from a copy of the job taken under eventJobsLock while the worker threads keep updating it.
+def createEventJobCard(job: dict):
+    with eventJobsLock:
+        items = [dict(item) for item in list(job["items"].values()) if item["active"]]
+        job = {"eventId": job["eventId"], "status": job["status"], "refund": job["refund"], "error": job.get("error")}
+    done = sum(1 for item in items if item["result"] != "Pending")
+    failed = [item for item in items if item["failed"]]
+
+    if job["status"] == "running":
+        summary = f"In progress: {done} of {len(items)} registrations processed."
+    elif job.get("error"):
+        summary = f"Stopped: {job['error']}"
+    else:
+        summary = f"Finished: {len(items) - len(failed)} of {len(items)} registrations canceled" + \
+            (" and refunded." if job["refund"] else ".")
+
+    temp_widgets = [CardService.TextParagraph(text=summary)]
+    if job["status"] == "done":
+        for item in items:
+            temp_widgets.append(CardService.DecoratedText(
+                text = item["name"],
+                bottom_label = item["result"],
+                wrap_text = True
+            ))
+
+    buttons = []
+    parameters = {"eventID": job["eventId"], "refund": str(job["refund"]).lower()}
+    if job["status"] == "running":
+        buttons.append(CardService.TextButton(
+            text = "Refresh",
+            text_button_style=CardService.TextButtonStyle.TEXT,
+            on_click_action = CardService.Action(
+                function_name = BASE_URL + app.url_path_for('eventCancelStatus'),
+                parameters = parameters
+            )
+        ))
+    elif failed or job.get("error"):
+        buttons.append(CardService.TextButton(
+            text = "Retry Failed",
+            text_button_style=CardService.TextButtonStyle.TEXT,
+            on_click_action = CardService.Action(
+                function_name = BASE_URL + app.url_path_for('eventCancelConfirm'),
+                parameters = parameters
+            )
+        ))
+    buttons.append(CardService.TextButton(
+        text = "Return to Class Page",
+        text_button_style=CardService.TextButtonStyle.TEXT,
+        on_click_action = CardService.Action(
+            function_name = BASE_URL + app.url_path_for('popToClassPage'),
+        )
+    ))
+    temp_widgets.append(CardService.ButtonSet(button=buttons))
+
+    cardSection1 = CardService.CardSection(
+        header = f"Cancel Event {job['eventId']}",
+        widget = temp_widgets
+    )
+
+    card = CardService.CardBuilder(
+        section=[cardSection1],
+        name = "eventCancelStatusCard"
+    )
+
+    return card.build()
+
+#Confirmation card for canceling every registration of an event, from the Cancel Entire Class section of the class
+#home page
+@app.post('/eventCancel', tags=["Classes"], summary="Confirmation card for canceling a whole class")
+def eventCancel(gevent: models.GEvent):
+    token = gevent.authorizationEventObject.systemIdToken
+    if not verifyGoogleToken(token):
+        errorText = " Unauthorized."
+        responseCard = createErrorResponseCard(errorText)
+        return responseCard
+
+    formInputs = gevent.commonEventObject.formInputs or {}
+    try:
+        eventID = formInputs["cancelEventID"]["stringInputs"]["value"][0].strip()
+    except (KeyError, IndexError):
+        eventID = ""
+    refund = gevent.commonEventObject.parameters.get('refund') == "true"
+
+    if not eventID.isdigit():
+        errorText = " A numeric Event ID is required."
+        responseCard = createErrorResponseCard(errorText)
+        return responseCard
+
+    action = "cancel and refund" if refund else "cancel"
+    cardSection1TextParagraph1 = CardService.TextParagraph(
+        text = f"Are you sure you want to {action} every registration for event {eventID}?"
+    )
+
+    cardSection1ButtonList1Button1 = CardService.TextButton(
+        text = "Yes",
+        text_button_style=CardService.TextButtonStyle.TEXT,
+        on_click_action = CardService.Action(
+            function_name = BASE_URL + app.url_path_for('eventCancelConfirm'),
+            parameters = {"eventID": eventID, "refund": str(refund).lower()}
+        )
+    )
+
+    cardSection1ButtonList1Button2 = CardService.TextButton(
+        text = "No",
+        text_button_style=CardService.TextButtonStyle.TEXT,
+        on_click_action = CardService.Action(
+            function_name = BASE_URL + app.url_path_for('popCard'),
+        )
+    )
+
+    cardSection1 = CardService.CardSection(
+        header = "Confirmation",
+        widget = [cardSection1TextParagraph1,
+                  CardService.ButtonSet(button=[cardSection1ButtonList1Button1, cardSection1ButtonList1Button2])]
+    )
+
+    card = CardService.CardBuilder(
+        section=[cardSection1],
+        name = "eventCancelCard"
+    )
+
+    responseCard = card.build()
+
+    return {"renderActions": responseCard}
+
+#Starts (or resumes) the cancel job for an event and shows its progress
+@app.post('/eventCancelConfirm', tags=["Classes"], summary="Cancel every registration for a class in the background")
+def eventCancelConfirm(gevent: models.GEvent):
+    token = gevent.authorizationEventObject.systemIdToken
+    if not verifyGoogleToken(token):
+        errorText = " Unauthorized."
+        responseCard = createErrorResponseCard(errorText)
+        return responseCard
+
+    try:
+        creds = Credentials(gevent.authorizationEventObject.userOAuthToken)
+    except:
+        errorText = " Credentials not found."
+        responseCard = createErrorResponseCard(errorText)
+        return responseCard
+
+    userId = decodeUser(gevent.authorizationEventObject.userIdToken)
+
+    apiKeys = getUserKeys(creds, userId)
+    if not apiKeys.get("N_APIkey"):
+        return apiKeys
+
+    eventID = gevent.commonEventObject.parameters.get('eventID')
+    refund = gevent.commonEventObject.parameters.get('refund') == "true"
+
+    job = startEventJob(eventID, refund, apiKeys["N_APIkey"])
+
+    nav = CardService.Navigation().updateCard(createEventJobCard(job))
+
+    return CardService.ActionResponseBuilder(navigation=nav).build()
+
+@app.post('/eventCancelStatus', tags=["Classes"], summary="Show the progress of a class cancellation")
+def eventCancelStatus(gevent: models.GEvent):
+    token = gevent.authorizationEventObject.systemIdToken
+    if not verifyGoogleToken(token):
+        errorText = " Unauthorized."
+        responseCard = createErrorResponseCard(errorText)
+        return responseCard
+
+    eventID = gevent.commonEventObject.parameters.get('eventID')
+    with eventJobsLock:
+        pruneEventJobs()
+        job = eventJobs.get(eventID)
+    if job is None:
+        errorText = f" No cancellation found for event {eventID}. It may have run on another instance."
         responseCard = createErrorResponseCard(errorText)
         return responseCard
 
+    nav = CardService.Navigation().updateCard(createEventJobCard(job))
+
+    return CardService.ActionResponseBuilder(navigation=nav).build()
+
 @app.post('/checkAccess', tags = ["User Info"], summary = "Display the user's access requirements")
 def checkAccess(gevent: models.GEvent):
     token = gevent.authorizationEventObject.systemIdToken
@@ -1280,8 +2103,7 @@ def checkAccess(gevent: models.GEvent):
             searchResult = getNeonAcctByEmail(input, N_APIkey=apiKeys['N_APIkey'], N_APIuser=NEON_API_USER)
 
     else:
-        acctEmail = getFromGmailEmail(gevent, creds)
-        searchResult = getNeonAcctByEmail(acctEmail, N_APIkey=apiKeys['N_APIkey'], N_APIuser=NEON_API_USER)
+        _, searchResult = getMessageContext(gevent, creds, userId, N_APIkey=apiKeys['N_APIkey'], fresh=True)
 
 
     if searchResult is not None:
@@ -1309,19 +2131,19 @@ def checkAccess(gevent: models.GEvent):
         if searchResult[0]['Membership Start Date']:
             memBoolean = True
 
-    cardSection1SelectionInput1Selection1 = SelectionItem(
+    cardSection1SelectionInput1Selection1 = CardService.SelectionItem(
         text = "Waiver",
         value = "1",
         selected = waiverBoolean
     )
 
-    cardSection1SelectionInput1Selection2 = SelectionItem(
+    cardSection1SelectionInput1Selection2 = CardService.SelectionItem(
         text = "Orientation/Facility Tour",
         value = "2",
         selected = orientBoolean
     )
 
-    cardSection1SelectionInput1Selection3 = SelectionItem(
+    cardSection1SelectionInput1Selection3 = CardService.SelectionItem(
         text = "Active Membership",
         value = "3",
         selected = memBoolean
@@ -1417,8 +2239,7 @@ def updateOP(gevent: models.GEvent):
             searchResult = getNeonAcctByEmail(input, N_APIkey=apiKeys['N_APIkey'], N_APIuser=NEON_API_USER)
 
     else:
-        acctEmail = getFromGmailEmail(gevent, creds)
-        searchResult = getNeonAcctByEmail(acctEmail, N_APIkey=apiKeys['N_APIkey'], N_APIuser=NEON_API_USER)
+        _, searchResult = getMessageContext(gevent, creds, userId, N_APIkey=apiKeys['N_APIkey'], fresh=True)
 
     if len(searchResult) > 1:
         errorText = " Multiple Neon accounts found. \
@@ -1497,7 +2318,14 @@ def giftCertSearch(gevent: models.GEvent):
     if not apiKeys.get("N_APIkey"):
         return apiKeys
 
-    searchFields = f'''
+    #Completed orders never change, so purchasers are answered from the local order index, which is kept in sync in
+    #the background. Cart IDs it doesn't have yet (e.g. orders since the last sync) are searched in Neon.
+    purchaser = orderIndex.index.lookup(certNumber)
+    if orderIndex.index.needsSync():
+        orderIndex.index.syncInBackground(apiKeys['N_APIkey'], NEON_API_USER)
+
+    if purchaser is None:
+        searchFields = f'''
 [
     {{
         "field": "Shopping Cart ID",
@@ -1507,7 +2335,7 @@ def giftCertSearch(gevent: models.GEvent):
 ]
 '''
 
-    outputFields = '''
+        outputFields = '''
 [
     "Account ID",
     "First Name",
@@ -1516,19 +2344,22 @@ def giftCertSearch(gevent: models.GEvent):
 ]
 '''
 
-    response = neon.postOrderSearch(searchFields, outputFields, N_APIkey=apiKeys['N_APIkey'], N_APIuser=NEON_API_USER)
+        response = neon.postOrderSearch(searchFields, outputFields, N_APIkey=apiKeys['N_APIkey'], N_APIuser=NEON_API_USER)
 
-    searchResults = response.get("searchResults")
+        searchResults = response.get("searchResults")
 
-    if len(searchResults) == 0:
-        errorText = " No gift certificate found with that number."
-        responseCard = createErrorResponseCard(errorText)
-        return responseCard
+        if len(searchResults) == 0:
+            errorText = " No gift certificate found with that number."
+            responseCard = createErrorResponseCard(errorText)
+            return responseCard
+
+        purchaser = searchResults[0]
+        orderIndex.index.add(certNumber, purchaser)
     
     cardSection1DecoratedText1 = CardService.DecoratedText(
-        text = searchResults[0]['First Name'] + ' ' + searchResults[0]['Last Name'],
-        bottom_label = searchResults[0]['Email 1'],
-        top_label = "Neon ID: " + searchResults[0]['Account ID'],
+        text = purchaser['First Name'] + ' ' + purchaser['Last Name'],
+        bottom_label = purchaser['Email 1'],
+        top_label = "Neon ID: " + purchaser['Account ID'],
     )
 
     cardSection1 = CardService.CardSection(
@@ -1544,6 +2375,46 @@ def giftCertSearch(gevent: models.GEvent):
 
     return {"renderActions": responseCard}
 
+def composeTriggerResponse(baseUrl: str) -> dict:
+    response = {
+                "action": {
+                    "navigations": [
+                        {
+                            "pushCard": {
+                                "sections": [
+                                    {
+                                        "collapsible": False,
+                                        "uncollapsible_widgets_count": 1,
+                                        "widgets": [
+                                            {
+                                                "textParagraph": {
+                                                    "text": "Email headers updated."
+                                                }
+                                            }
+                                        ],
+                                    }
+                                ]
+                            }
+                        }]
+                },
+                "hostAppAction": {
+                    "gmailAction": {
+                        "updateDraftActionMarkup": {
+                            "updateCcRecipients": {
+                                "ccRecipients": [
+                                    {
+                                        "email": "membership@asmbly.org"
+                                    }
+                                ]
+                            }
+                        }
+                    }
+                }
+            }
+        
+
+    return response
+
 @app.post('/composeTrigger', tags = ["Drafts"], summary = "Add CC to draft email")
 def composeTrigger(gevent: models.GEvent):
     token = gevent.authorizationEventObject.systemIdToken
@@ -1613,45 +2484,7 @@ def composeTrigger(gevent: models.GEvent):
 
     responseCard = card.build() """
 
-    response = {
-                "action": {
-                    "navigations": [
-                        {
-                            "pushCard": {
-                                "sections": [
-                                    {
-                                        "collapsible": False,
-                                        "uncollapsible_widgets_count": 1,
-                                        "widgets": [
-                                            {
-                                                "textParagraph": {
-                                                    "text": "Email headers updated."
-                                                }
-                                            }
-                                        ],
-                                    }
-                                ]
-                            }
-                        }]
-                },
-                "hostAppAction": {
-                    "gmailAction": {
-                        "updateDraftActionMarkup": {
-                            "updateCcRecipients": {
-                                "ccRecipients": [
-                                    {
-                                        "email": "membership@asmbly.org"
-                                    }
-                                ]
-                            }
-                        }
-                    }
-                }
-            }
-        
-
-    return response
-                
+    return staticCardResponse(composeTriggerResponse)
 
 @app.post('/settings', tags = ["Settings"], summary = "Display the API keys card")
 def settings(gevent: models.GEvent):
@@ -1737,13 +2570,7 @@ def submitSettings(gevent: models.GEvent):
         responseCard = createErrorResponseCard(errorText)
         return responseCard
     
-    with build('people', 'v1', credentials=creds) as peopleClient:
-        user = peopleClient.people().get(
-            resourceName='people/me',
-            personFields='names'
-        ).execute()
-    print(user)
-    firstName = user.get('names')[0].get('givenName').lower()
+    firstName = workspace.getGivenName(creds.token).lower()
     
     userId = decodeUser(gevent.authorizationEventObject.userIdToken)
 
@@ -1763,30 +2590,24 @@ def submitSettings(gevent: models.GEvent):
 
     jsonSecretVersion = json.dumps(newSecretVersion)
 
-    client = secretmanager.SecretManagerServiceClient()
-
     secret_id = firstName + '_' + userId
 
-    name = f"projects/{GCLOUD_PROJECT_ID}/secrets/{secret_id}/versions/latest"
-
     try:
-        secret = client.access_secret_version(request={"name": name})
-
-        # Verify payload checksum.
-        crc32c = google_crc32c.Checksum()
-        crc32c.update(secret.payload.data)
-        if secret.payload.data_crc32c != int(crc32c.hexdigest(), 16):
-            return createErrorResponseCard("Checksum failed.")
+        secretManager.accessSecret(GCLOUD_PROJECT_ID, secret_id)
         currentSecret = True
+    except json.JSONDecodeError:
+        currentSecret = True
+    except ValueError:
+        return createErrorResponseCard("Checksum failed.")
     except:
         currentSecret = False
 
     if currentSecret:
-        path = client.secret_path(GCLOUD_PROJECT_ID, secret_id)
-
-        client.delete_secret(request={"name": path})
+        secretManager.deleteSecret(GCLOUD_PROJECT_ID, secret_id)
         
-    create_secret(client, GCLOUD_PROJECT_ID, secret_id, jsonSecretVersion)
+    secretManager.createSecret(GCLOUD_PROJECT_ID, secret_id, jsonSecretVersion)
+
+    invalidateUserKeys(userId)
 
     text = "API Keys Updated."
 
@@ -1805,16 +2626,9 @@ def submitSettings(gevent: models.GEvent):
 
     return responseCard
 
-@app.post('/contextualHome', tags = ["Navigation"], summary = "Display the contextual home card")
-def contextualHome(gevent: models.GEvent):
-    token = gevent.authorizationEventObject.systemIdToken
-    if not verifyGoogleToken(token):
-        errorText = " Unauthorized."
-        responseCard = createErrorResponseCard(errorText)
-        return responseCard
-    
+def contextualHomeCard(baseUrl: str) -> dict:
     cardSection1ButtonList1Button1Action1 = CardService.Action(
-        function_name = BASE_URL + app.url_path_for('getNeonId')
+        function_name = baseUrl + app.url_path_for('getNeonId')
     )
 
     cardSection1ButtonList1Button1 = CardService.TextButton(
@@ -1830,7 +2644,7 @@ def contextualHome(gevent: models.GEvent):
     cardSection1Divider1 = CardService.Divider()
 
     cardSection1ButtonList2Button1Action1 = CardService.Action(
-        function_name = BASE_URL + app.url_path_for('checkAccess')
+        function_name = baseUrl + app.url_path_for('checkAccess')
     )
 
     cardSection1ButtonList2Button1 = CardService.TextButton(
@@ -1846,7 +2660,7 @@ def contextualHome(gevent: models.GEvent):
     cardSection1Divider2 = CardService.Divider()
 
     cardSection1ButtonList3Button1Action1 = CardService.Action(
-        function_name = BASE_URL + app.url_path_for('updateOP')
+        function_name = baseUrl + app.url_path_for('updateOP')
     )
 
     cardSection1ButtonList3Button1 = CardService.TextButton(
@@ -1862,7 +2676,7 @@ def contextualHome(gevent: models.GEvent):
     cardSection1Divider3 = CardService.Divider()
 
     cardSection1ButtonList4Button1Action1 = CardService.Action(
-        function_name = BASE_URL + app.url_path_for('classHomePage')
+        function_name = baseUrl + app.url_path_for('classHomePage')
     )
 
     cardSection1ButtonList4Button1 = CardService.TextButton(  
@@ -1896,14 +2710,17 @@ def contextualHome(gevent: models.GEvent):
 
     return responseCard
 
-@app.post('/home', tags = ["Navigation"], summary="Display the home card")
-def home(gevent: models.GEvent):
+@app.post('/contextualHome', tags = ["Navigation"], summary = "Display the contextual home card")
+def contextualHome(gevent: models.GEvent):
     token = gevent.authorizationEventObject.systemIdToken
     if not verifyGoogleToken(token):
         errorText = " Unauthorized."
         responseCard = createErrorResponseCard(errorText)
         return responseCard
 
+    return staticCardResponse(contextualHomeCard)
+
+def homeCard(baseUrl: str) -> dict:
     cardSection1TextInput1 = CardService.TextInput(
         field_name = "checkAccess",
         title = "Account ID or Email",
@@ -1911,7 +2728,7 @@ def home(gevent: models.GEvent):
     )
 
     cardSection1ButtonList1Button1Action1 = CardService.Action(
-        function_name = BASE_URL + app.url_path_for('checkAccess')
+        function_name = baseUrl + app.url_path_for('checkAccess')
     )
 
     cardSection1ButtonList1Button1 = CardService.TextButton(
@@ -1933,7 +2750,7 @@ def home(gevent: models.GEvent):
     )
 
     cardSection1ButtonList2Button1Action1 = CardService.Action(
-        function_name = BASE_URL + app.url_path_for('updateOP')
+        function_name = baseUrl + app.url_path_for('updateOP')
     )
 
     cardSection1ButtonList2Button1 = CardService.TextButton(
@@ -1955,7 +2772,7 @@ def home(gevent: models.GEvent):
     )
 
     cardSection1ButtonList3Button1Action1 = CardService.Action(
-        function_name = BASE_URL + app.url_path_for('giftCertSearch')
+        function_name = baseUrl + app.url_path_for('giftCertSearch')
     )
 
     cardSection1ButtonList3Button1 = CardService.TextButton(
@@ -1990,5 +2807,19 @@ def home(gevent: models.GEvent):
 
     return responseCard
 
+@app.post('/home', tags = ["Navigation"], summary="Display the home card")
+def home(gevent: models.GEvent):
+    token = gevent.authorizationEventObject.systemIdToken
+    if not verifyGoogleToken(token):
+        errorText = " Unauthorized."
+        responseCard = createErrorResponseCard(errorText)
+        return responseCard
+
+    return staticCardResponse(homeCard)
+
+STATIC_CARDS = [classHomeCard, popCardResponse, popToClassPageResponse, popToHomeResponse, composeTriggerResponse,
+                contextualHomeCard, homeCard]
+
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,114 @@
+###############################################################################
+# Compare CardBuilder.build against the to_dict + delete_none + update_actions
+# path it replaced, on a class-list card like the one /searchClasses returns.
+# Both paths must produce the same card, for that card and for a search form
+# with date pickers like the class home page, before anything is timed.
+#
+# Usage: python benchmarks/cardBuild.py [--classes N] [--runs N]
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from gapps import CardService
+from gapps.cardservice import api
+from gapps.cardservice.utilities import delete_none, update_actions
+
+BASE_URL = "https://example.com"
+
+def classListCard(classes: int) -> "api.CardBuilder":
+    section = CardService.newCardSection().setHeader("Classes")
+    for i in range(classes):
+        action = CardService.newAction()  \
+            .setFunctionName(f"{BASE_URL}/classHomePage")  \
+            .setParameters({"eventId": str(1000 + i), "eventName": f"Intro to Woodturning {i}"})
+        section.addWidget(CardService.newDecoratedText()
+                          .setText(f"Intro to Woodturning {i}")
+                          .setTopLabel("Mon, Oct 19 6:00 PM")
+                          .setBottomLabel(f"{i % 8} seats left")
+                          .setWrapText(True)
+                          .setOnClickAction(action))
+        section.addWidget(CardService.newButtonSet()
+                          .addButton(CardService.newTextButton().setText("Register").setOnClickAction(action))
+                          .addButton(CardService.newTextButton().setText("Refund").setOnClickAction(action)))
+
+    return CardService.newCardBuilder()  \
+        .setHeader(CardService.newCardHeader().setTitle("Search Results"))  \
+        .addSection(section)
+
+# The class home page's search form: a text input with typeahead, two date pickers and a search button
+def classSearchCard() -> "api.CardBuilder":
+    section = CardService.newCardSection()  \
+        .setHeader("Search Classes")  \
+        .addWidget(CardService.newTextInput()
+                   .setFieldName("className")
+                   .setTitle("Class Name")
+                   .setSuggestionsAction(CardService.newAction().setFunctionName(f"{BASE_URL}/classNameSuggestions")))  \
+        .addWidget(CardService.newDatePicker().setFieldName("startDate").setTitle("Start Date").setValueInMsSinceEpoch(0))  \
+        .addWidget(CardService.newDatePicker().setFieldName("endDate").setTitle("End Date").setValueInMsSinceEpoch(0))  \
+        .addWidget(CardService.newButtonSet()
+                   .addButton(CardService.newTextButton()
+                              .setText("Search")
+                              .setOnClickAction(CardService.newAction().setFunctionName(f"{BASE_URL}/searchClasses"))))
+
+    return CardService.newCardBuilder().addSection(section)
+
+# CardBuilder.build as it was before the single-pass serializer, without the payload print
+def toDictBuild(self) -> dict:
+    card = self.to_dict()
+    card['sections'] = []
+    for section in self.section:
+        d_section = section.to_dict()
+        d_section['widgets'] = []
+        for widget in section.widget:
+            if hasattr(widget, "field_name") and  \
+               callable(getattr(widget, "field_name")):
+                name = widget.field_name()
+            else:
+                name = widget.__class__.__name__
+                name = name[0].lower() + name[1:]
+            if isinstance(widget, (api.DatePicker, api.DateTimePicker, api.TimePicker)):
+                name = "dateTimePicker"
+            d_section['widgets'].append({name: widget.to_dict()})
+        card['sections'].append(d_section)
+
+    card = delete_none(card)
+    card = update_actions(card)
+
+    page = {"action": {"navigations": [{"pushCard": card}]}}
+    return page
+
+def timeBuild(build, builder, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        build(builder)
+        samples.append((time.perf_counter() - t) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="CardBuilder.build benchmark")
+    parser.add_argument("--classes", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    builder = classListCard(args.classes)
+    for card in (builder, classSearchCard()):
+        if repr(card.build()) != repr(toDictBuild(card)):
+            print("CardBuilder.build output differs from to_dict")
+            sys.exit(1)
+
+    before = timeBuild(toDictBuild, builder, args.runs)
+    after = timeBuild(api.CardBuilder.build, builder, args.runs)
+
+    print(f"{args.classes} classes, median of {args.runs} runs")
+    print(f"to_dict + delete_none + update_actions: {before:8.2f} ms")
+    print(f"CardBuilder.build:                      {after:8.2f} ms ({before / after:.1f}x)")
+
+if __name__ == "__main__":
+    main()
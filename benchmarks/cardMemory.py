@@ -0,0 +1,74 @@
+###############################################################################
+# Measure the memory held by the widgets of a class-list card, using the
+# slotted classes in gapps.cardservice.api against plain (__dict__) dataclass
+# copies of the same classes.
+#
+# Usage: python benchmarks/cardMemory.py [--classes N]
+
+import argparse
+import dataclasses
+import os
+import sys
+import tracemalloc
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from gapps.cardservice import api
+
+WIDGET_CLASSES = ["Action", "DecoratedText", "TextButton", "ButtonSet"]
+
+# Same fields and defaults as cls, but without slots
+def unslotted(cls) -> type:
+    fields = []
+    for field in dataclasses.fields(cls):
+        if field.default_factory is not dataclasses.MISSING:
+            fields.append((field.name, field.type, dataclasses.field(default_factory=field.default_factory)))
+        else:
+            fields.append((field.name, field.type, dataclasses.field(default=field.default)))
+    return dataclasses.make_dataclass(cls.__name__, fields)
+
+# The widgets /searchClasses builds for each class: a decorated text and a register button, each with an action
+def classListWidgets(classes, count: int) -> list:
+    widgets = []
+    for i in range(count):
+        action = classes.Action(function_name="https://example.com/classReg",
+                                parameters={"eventID": str(1000 + i), "eventName": f"Intro to Woodturning {i}"})
+        widgets.append(classes.DecoratedText(text=f"Intro to Woodturning {i}", top_label="Mon, Oct 19 6:00 PM",
+                                             bottom_label=f"{i % 8} seats left", on_click_action=action))
+        button = classes.TextButton(text="Register", on_click_action=action)
+        widgets.append(classes.ButtonSet(button=[button]))
+    return widgets
+
+def measure(classes, count: int) -> int:
+    tracemalloc.start()
+    widgets = classListWidgets(classes, count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del widgets
+    return size
+
+def main():
+    parser = argparse.ArgumentParser(description="Card widget memory benchmark")
+    parser.add_argument("--classes", type=int, default=500)
+    args = parser.parse_args()
+
+    slotted = SimpleNamespace(**{name: getattr(api, name) for name in WIDGET_CLASSES})
+    plain = SimpleNamespace(**{name: unslotted(getattr(api, name)) for name in WIDGET_CLASSES})
+
+    before = measure(plain, args.classes)
+    after = measure(slotted, args.classes)
+
+    print(f"{args.classes} classes ({args.classes * len(WIDGET_CLASSES)} widget objects)")
+    print(f"dataclass:        {before / 1024:8.1f} KiB ({before / args.classes:6.0f} bytes per class)")
+    print(f"slots dataclass:  {after / 1024:8.1f} KiB ({after / args.classes:6.0f} bytes per class, "
+          f"{100 * (before - after) / before:.0f}% less)")
+
+    for name in WIDGET_CLASSES:
+        plainWidget, slottedWidget = getattr(plain, name)(), getattr(slotted, name)()
+        plainSize = sys.getsizeof(plainWidget) + sys.getsizeof(plainWidget.__dict__)
+        print(f"  {name:14} {plainSize:4d} -> {sys.getsizeof(slottedWidget):4d} bytes per instance")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+###############################################################################
+# Time how long it takes to turn a built class-list card into a response body:
+# FastAPI's old default (jsonable_encoder, then JSONResponse's json.dumps)
+# against the ORJSONResponse the add-on now returns, and against a card that
+# is already encoded (see staticCardResponse).
+#
+# Usage: python benchmarks/cardSerialization.py [--classes N] [--runs N]
+
+import argparse
+import statistics
+import time
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from cardBuild import classListCard
+
+def jsonResponse(card) -> bytes:
+    return JSONResponse(jsonable_encoder(card)).body
+
+def orjsonResponse(card) -> bytes:
+    return ORJSONResponse(card).body
+
+def timeRender(render, card, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        render(card)
+        samples.append((time.perf_counter() - t) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="Card serialization benchmark")
+    parser.add_argument("--classes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    for classes in args.classes:
+        card = {"renderActions": classListCard(classes).build()}
+        encoded = orjsonResponse(card)
+
+        before = timeRender(jsonResponse, card, args.runs)
+        after = timeRender(orjsonResponse, card, args.runs)
+        raw = timeRender(lambda body: Response(content=body, media_type="application/json"), encoded, args.runs)
+
+        print(f"{classes} classes ({len(encoded) / 1024:.0f} KiB), median of {args.runs} runs")
+        print(f"  jsonable_encoder + json.dumps: {before:8.3f} ms")
+        print(f"  ORJSONResponse:                {after:8.3f} ms ({before / after:.0f}x)")
+        print(f"  pre-encoded bytes:             {raw:8.3f} ms")
+
+if __name__ == "__main__":
+    main()
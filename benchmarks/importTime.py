@@ -0,0 +1,63 @@
+###############################################################################
+# Measure how long a fresh interpreter takes to import the add-on, which is the
+# part of a Cloud Run cold start we control. Exits non-zero when the median
+# import time is over budget so it can be tracked from release to release.
+#
+# Usage: python benchmarks/importTime.py [--runs N] [--budget MS] [--top N]
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULE = "asmblyWorkspaceIntegration"
+
+#Median wall time in milliseconds to import MODULE in a new interpreter. Medians measured on a single-core
+#container ranged from about 1100 to 1450 ms, most of it importing fastapi; the budget leaves room for that noise.
+DEFAULT_BUDGET_MS = 2000
+
+def timeImport(module: str) -> float:
+    code = f"import time; t = time.perf_counter(); import {module}; print((time.perf_counter() - t) * 1000)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+#Largest cumulative import times reported by python -X importtime
+def slowestImports(module: str, top: int) -> list:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings.append((int(cumulative), name.rstrip()))
+    timings.sort(reverse=True)
+    return timings[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description=f"Import-time benchmark for {MODULE}")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=float(os.environ.get("IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS)),
+                        help="median import budget in milliseconds")
+    parser.add_argument("--top", type=int, default=0, help="also list the N slowest imports")
+    args = parser.parse_args()
+
+    samples = [timeImport(MODULE) for _ in range(args.runs)]
+    median = statistics.median(samples)
+
+    print(f"import {MODULE}: median {median:.0f} ms, min {min(samples):.0f} ms, max {max(samples):.0f} ms "
+          f"over {args.runs} runs (budget {args.budget:.0f} ms)")
+
+    if args.top:
+        for cumulative, name in slowestImports(MODULE, args.top):
+            print(f"{cumulative / 1000:8.1f} ms  {name}")
+
+    if median > args.budget:
+        print("Import time is over budget")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -4,21 +4,28 @@ from .constants import (BorderType, ComposedEmailType, ContentType,
                         Icon, ImageCropType, ImageStyle, LoadIndicator,
                         OnClose, OpenAs, SelectionInputType, SwitchControlType,
                         TextButtonStyle, UpdateDraftBodyType)
-from .api import (IconImage, Action, OpenLink, Switch, DecoratedText,
-                  CardSection, ActionResponseBuilder, Attachment,
-                  AuthorizationAction, AuthorizationException, BorderStyle,
-                  ButtonSet, CalendarEventActionResponseBuilder, CardAction,
-                  CardBuilder, CardHeader, ComposeActionResponseBuilder,
-                  DatePicker, DateTimePicker, Divider, FixedFooter, Grid,
-                  DriveItemsSelectedActionResponseBuilder, GridItem, Image,
-                  EditorFileScopeActionResponseBuilder, ImageButton,
-                  ImageComponent, ImageCropStyle, Navigation,
-                  Notification, SelectionInput, Suggestions, TextButton,
-                  SuggestionsResponseBuilder, TextInput, TextParagraph,
-                  TimePicker, UniversalActionResponseBuilder,
-                  UpdateDraftActionResponseBuilder, UpdateDraftSubjectAction,
-                  UpdateDraftBccRecipientsAction, UpdateDraftBodyAction,
-                  UpdateDraftToRecipientsAction, UpdateDraftCcRecipientsAction)
+
+# The widget classes live in ``api`` which pulls in dataclasses_json and
+# marshmallow. Import it on first use instead of with the package so that
+# importing ``models`` (or the constants) stays cheap.
+_API_NAMES = {'Action', 'ActionResponseBuilder', 'Attachment',
+              'AuthorizationAction', 'AuthorizationException', 'BorderStyle',
+              'ButtonSet', 'CalendarEventActionResponseBuilder', 'CardAction',
+              'CardBuilder', 'CardHeader', 'CardSection',
+              'ComposeActionResponseBuilder', 'DatePicker', 'DateTimePicker',
+              'DecoratedText', 'Divider',
+              'DriveItemsSelectedActionResponseBuilder',
+              'EditorFileScopeActionResponseBuilder', 'FixedFooter', 'Grid',
+              'GridItem', 'IconImage', 'Image', 'ImageButton',
+              'ImageComponent', 'ImageCropStyle', 'Navigation',
+              'Notification', 'OpenLink', 'SelectionInput', 'SelectionItem',
+              'Suggestions', 'SuggestionsResponseBuilder', 'Switch',
+              'TextButton', 'TextInput', 'TextParagraph', 'TimePicker',
+              'UniversalActionResponseBuilder',
+              'UpdateDraftActionResponseBuilder',
+              'UpdateDraftBccRecipientsAction', 'UpdateDraftBodyAction',
+              'UpdateDraftCcRecipientsAction', 'UpdateDraftSubjectAction',
+              'UpdateDraftToRecipientsAction'}
 
 
 __all__ = ['BorderType', 'ComposedEmailType', 'ContentType', 'DisplayStyle',
@@ -28,226 +35,237 @@ __all__ = ['BorderType', 'ComposedEmailType', 'ContentType', 'DisplayStyle',
            'UpdateDraftBodyType']
 
 
+def _api():
+    from . import api
+    return api
+
+
+def __getattr__(name):
+    if name in _API_NAMES:
+        return getattr(_api(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def newAction():
     """Create a new Action."""
-    return Action()
+    return _api().Action()
 
 
 def newActionResponseBuilder():
     """Create a new ActionResponseBuilder."""
-    return ActionResponseBuilder()
+    return _api().ActionResponseBuilder()
 
 
 def newAttachment():
     """Create a new Attachment."""
-    return Attachment()
+    return _api().Attachment()
 
 
 def newAuthorizationAction():
     """Create a new AuthorizationAction."""
-    return AuthorizationAction()
+    return _api().AuthorizationAction()
 
 
 def newAuthorizationException():
     """Create a new AuthorizationException."""
-    return AuthorizationException()
+    return _api().AuthorizationException()
 
 
 def newBorderStyle():
     """Create a new BorderStyle."""
-    return BorderStyle()
+    return _api().BorderStyle()
 
 
 def newButtonSet():
     """Create a new ButtonSet."""
-    return ButtonSet()
+    return _api().ButtonSet()
 
 
 def newCalendarEventActionResponseBuilder():
     """Create a new CalendarEventActionResponseBuilder."""
-    return CalendarEventActionResponseBuilder()
+    return _api().CalendarEventActionResponseBuilder()
 
 
 def newCardAction():
     """Create a new CardAction."""
-    return CardAction()
+    return _api().CardAction()
 
 
 def newCardBuilder():
     """Create a new CardBuilder."""
-    return CardBuilder()
+    return _api().CardBuilder()
 
 
 def newCardHeader():
     """Create a new CardHeader."""
-    return CardHeader()
+    return _api().CardHeader()
 
 
 def newCardSection():
     """Create a new CardSection."""
-    return CardSection()
+    return _api().CardSection()
 
 
 def newComposeActionResponseBuilder():
     """Create a new ComposeActionResponseBuilder."""
-    return ComposeActionResponseBuilder()
+    return _api().ComposeActionResponseBuilder()
 
 
 def newDatePicker():
     """Create a new DatePicker."""
-    return DatePicker()
+    return _api().DatePicker()
 
 
 def newDateTimePicker():
     """Create a new DateTimePicker."""
-    return DateTimePicker()
+    return _api().DateTimePicker()
 
 
 def newDecoratedText():
     """Create a new DecoratedText."""
-    return DecoratedText()
+    return _api().DecoratedText()
 
 
 def newDivider():
     """Create a new Divider."""
-    return Divider()
+    return _api().Divider()
 
 
 def newDriveItemsSelectedActionResponseBuilder():
     """Create a new DriveItemsSelectedActionResponseBuilder."""
-    return DriveItemsSelectedActionResponseBuilder()
+    return _api().DriveItemsSelectedActionResponseBuilder()
 
 
 def newEditorFileScopeActionResponseBuilder():
     """Create a new EditorFileScopeActionResponseBuilder."""
-    return EditorFileScopeActionResponseBuilder()
+    return _api().EditorFileScopeActionResponseBuilder()
 
 
 def newFixedFooter():
     """Create a new FixedFooter."""
-    return FixedFooter()
+    return _api().FixedFooter()
 
 
 def newGrid():
     """Create a new Grid."""
-    return Grid()
+    return _api().Grid()
 
 
 def newGridItem():
     """Create a new GridItem."""
-    return GridItem()
+    return _api().GridItem()
 
 
 def newIconImage():
     """Create a new IconImage."""
-    return IconImage()
+    return _api().IconImage()
 
 
 def newImage():
     """Create a new Image."""
-    return Image()
+    return _api().Image()
 
 
 def newImageButton():
     """Create a new ImageButton."""
-    return ImageButton()
+    return _api().ImageButton()
 
 
 def newImageComponent():
     """Create a new ImageComponent."""
-    return ImageComponent()
+    return _api().ImageComponent()
 
 
 def newImageCropStyle():
     """Create a new ImageCropStyle."""
-    return ImageCropStyle()
+    return _api().ImageCropStyle()
 
 
 def newNavigation():
     """Create a new Navigation."""
-    return Navigation()
+    return _api().Navigation()
 
 
 def newNotification():
     """Create a new Notification."""
-    return Notification()
+    return _api().Notification()
 
 
 def newOpenLink():
     """Create a new OpenLink."""
-    return OpenLink()
+    return _api().OpenLink()
 
 
 def newSelectionInput():
     """Create a new SelectionInput."""
-    return SelectionInput()
+    return _api().SelectionInput()
 
 
 def newSuggestions():
     """Create a new Suggestions."""
-    return Suggestions()
+    return _api().Suggestions()
 
 
 def newSuggestionsResponseBuilder():
     """Create a new SuggestionsResponseBuilder."""
-    return SuggestionsResponseBuilder()
+    return _api().SuggestionsResponseBuilder()
 
 
 def newSwitch():
     """Create a new Switch."""
-    return Switch()
+    return _api().Switch()
 
 
 def newTextButton():
     """Create a new TextButton."""
-    return TextButton()
+    return _api().TextButton()
 
 
 def newTextInput():
     """Create a new TextInput."""
-    return TextInput()
+    return _api().TextInput()
 
 
 def newTextParagraph():
     """Create a new TextParagraph."""
-    return TextParagraph()
+    return _api().TextParagraph()
 
 
 def newTimePicker():
     """Create a new TimePicker."""
-    return TimePicker()
+    return _api().TimePicker()
 
 
 def newUniversalActionResponseBuilder():
     """Create a new UniversalActionResponseBuilder."""
-    return UniversalActionResponseBuilder()
+    return _api().UniversalActionResponseBuilder()
 
 
 def newUpdateDraftActionResponseBuilder():
     """Create a new UpdateDraftActionResponseBuilder."""
-    return UpdateDraftActionResponseBuilder()
+    return _api().UpdateDraftActionResponseBuilder()
 
 
 def newUpdateDraftBccRecipientsAction():
     """Create a new UpdateDraftBccRecipientsAction"""
-    return UpdateDraftBccRecipientsAction()
+    return _api().UpdateDraftBccRecipientsAction()
 
 
 def newUpdateDraftBodyAction():
     """Create a new UpdateDraftBodyAction."""
-    return UpdateDraftBodyAction()
+    return _api().UpdateDraftBodyAction()
 
 
 def newUpdateDraftCcRecipientsAction():
     """Create a new UpdateDraftCcRecipientsAction."""
-    return UpdateDraftCcRecipientsAction()
+    return _api().UpdateDraftCcRecipientsAction()
 
 
 def newUpdateDraftSubjectAction():
     """Create a new UpdateDraftSubjectAction."""
-    return UpdateDraftSubjectAction()
+    return _api().UpdateDraftSubjectAction()
 
 
 def newUpdateDraftToRecipientsAction():
     """Create a new UpdateDraftToRecipientsAction."""
-    return UpdateDraftToRecipientsAction()
+    return _api().UpdateDraftToRecipientsAction()
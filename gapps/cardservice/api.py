@@ -1,5 +1,6 @@
 
 
+import logging
 from dataclasses import dataclass, field
 from dataclasses_json import dataclass_json, config, LetterCase
 
@@ -9,12 +10,16 @@ from .constants import (BorderType, ComposedEmailType, ContentType,
                         Icon, ImageCropType, ImageStyle, LoadIndicator,
                         OnClose, OpenAs, SelectionInputType, SwitchControlType,
                         TextButtonStyle, UpdateDraftBodyType, DateTimePickerType)
-from .utilities import delete_none, update_actions, hex2floats, floats2hex
+from .utilities import (delete_none, update_actions, hex2floats, floats2hex,
+                        encode_suggestions)
+from .serializer import serialize
+
+logger = logging.getLogger(__name__)
 
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class SelectionItem:
     text: str = ''
     value: str = ''
@@ -23,7 +28,7 @@ class SelectionItem:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class Action:
     function_name: str = field(metadata=config(field_name="function"),
                                default=None)
@@ -38,7 +43,7 @@ class Action:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class ActionResponse:
 
     def printJson(self):
@@ -47,7 +52,7 @@ class ActionResponse:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class IconImage:
     alt_text: str = None
     icon: Icon = field(
@@ -61,7 +66,7 @@ class IconImage:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class OpenLink:
     on_close: OnClose = None
     open_as: OpenAs = None
@@ -70,7 +75,7 @@ class OpenLink:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class Navigation:
 
     def popCard(self):
@@ -107,14 +112,14 @@ class Navigation:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class Notification:
     text: str = None
 
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class ActionResponseBuilder:
     navigation: Navigation = field(metadata=config(field_name="navigations"),
                                    default=None)
@@ -124,16 +129,15 @@ class ActionResponseBuilder:
 
     def build(self):
         """Build the current action response and validates it."""
-        card = self.to_dict()
-        card = delete_none(card)
+        card = serialize(self, actions=False)
         card = {'renderActions': {"action": card}}
-        print(card)
+        logger.debug('%s: %s', self.__class__.__name__, card)
         return card
 
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class Attachment:
     icon_url: str = ''
     mime_type: str = ''
@@ -143,14 +147,14 @@ class Attachment:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class AuthorizationAction:
     authorization_url: str = ''
 
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class AuthorizationException:
     authorization_url: str = ''
     custom_ui_callback: str = ''
@@ -167,7 +171,7 @@ class AuthorizationException:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class BorderStyle:
     corner_radius: int = 8
     stroke_color: str = '#000000'
@@ -176,7 +180,7 @@ class BorderStyle:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class Button:
     authorization_action: Action = None
     compose_action: tuple[Action, ComposedEmailType] = None
@@ -188,7 +192,7 @@ class Button:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class ButtonSet:
     button: list[Button] = field(metadata=config(field_name="buttons"),
                                  default=None)
@@ -204,7 +208,7 @@ class ButtonSet:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class Card:
 
     def printJson(self):
@@ -214,7 +218,7 @@ class Card:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class CardAction:
     authorization_action: AuthorizationAction = None
     compose_action: tuple[Action, ComposedEmailType] = None
@@ -227,7 +231,7 @@ class CardAction:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class CardHeader:
     image_alt_text: str = ''
     image_style: ImageStyle = field(
@@ -241,7 +245,7 @@ class CardHeader:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class TextButton:
     alt_text: str = None
     authorization_action: AuthorizationAction = None
@@ -269,7 +273,7 @@ class TextButton:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class FixedFooter:
     primary_button: TextButton = None
     secondary_button: TextButton = None
@@ -277,14 +281,14 @@ class FixedFooter:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class Divider:
     pass
 
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class DriveItemsSelectedActionResponse:
 
     def printJson(self):
@@ -294,7 +298,7 @@ class DriveItemsSelectedActionResponse:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class DriveItemsSelectedActionResponseBuilder:
     _item_id: str = field(metadata=config(exclude=lambda x: True),
                           default='')
@@ -305,7 +309,7 @@ class DriveItemsSelectedActionResponseBuilder:
                 {"hostAppAction":
                     {"driveAction":
                         {"requestFileScope": {"itemId": self._item_id}}}}}
-        print(card)
+        logger.debug('%s: %s', self.__class__.__name__, card)
         return card
 
     def requestFileScope(self, itemId):
@@ -316,7 +320,7 @@ class DriveItemsSelectedActionResponseBuilder:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class EditorFileScopeActionResponse:
 
     def printJson(self):
@@ -326,7 +330,7 @@ class EditorFileScopeActionResponse:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class EditorFileScopeActionResponseBuilder:
     _item_id: str = field(metadata=config(exclude=lambda x: True),
                           default='')
@@ -337,7 +341,7 @@ class EditorFileScopeActionResponseBuilder:
                 {"hostAppAction":
                     {"editorAction":
                         {"requestFileScopeForActiveDocument": {}}}}}
-        print(card)
+        logger.debug('%s: %s', self.__class__.__name__, card)
         return card
 
     def requestFileScopeForActiveDocument(self, itemId=''):
@@ -348,7 +352,7 @@ class EditorFileScopeActionResponseBuilder:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class Switch:
     control_type: SwitchControlType = field(
         metadata=config(encoder=lambda x: x.value, decoder=SwitchControlType),
@@ -361,7 +365,7 @@ class Switch:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class DecoratedText:
     authorization_action: Action = None
     bottom_label: str = None
@@ -381,7 +385,7 @@ class DecoratedText:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class DatePicker:
     field_name: str = field(metadata=config(field_name="name"), default='')
     on_change_action: Action = None
@@ -394,7 +398,7 @@ class DatePicker:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class DateTimePicker:
     field_name: str = field(metadata=config(field_name="name"), default='')
     on_change_action: Action = None
@@ -407,7 +411,7 @@ class DateTimePicker:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class Image:
     alt_text: str = ''
     authorization_action: AuthorizationAction = None
@@ -421,7 +425,7 @@ class Image:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class ImageButton:
     alt_text: str = ''
     authorization_action: AuthorizationAction = None
@@ -436,7 +440,7 @@ class ImageButton:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class ImageCropStyle:
     aspect_ratio: float = 1.0
     image_crop_type: ImageCropType = field(
@@ -446,7 +450,7 @@ class ImageCropStyle:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class ImageComponent:
     alt_text: str = ''
     border_style: BorderStyle = None
@@ -456,7 +460,7 @@ class ImageComponent:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class CardSection:
     widget: list = field(metadata=config(field_name="widgets"), default=None)
     collapsible: bool = False
@@ -467,7 +471,7 @@ class CardSection:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class CardBuilder:
     card_action: list[CardAction] = None
     section: list[CardSection] = field(metadata=config(field_name="sections"),
@@ -480,11 +484,9 @@ class CardBuilder:
 
     def build(self):
         """Build the current card and validates it."""
-        card = self.to_dict()
-        card['sections'] = []
+        sections = []
         for section in self.section:
-            d_section = section.to_dict()
-            d_section['widgets'] = []
+            widgets = []
             for widget in section.widget:
                 if hasattr(widget, "field_name") and  \
                    callable(getattr(widget, "field_name")):
@@ -494,12 +496,11 @@ class CardBuilder:
                     name = name[0].lower() + name[1:]
                 if isinstance(widget, (DatePicker, DateTimePicker, TimePicker)):
                     name = "dateTimePicker"
-                d_section['widgets'].append({name: widget.to_dict()})
-            card['sections'].append(d_section)
+                widgets.append({name: serialize(widget)})
+            sections.append(serialize(section, replace={'widget': widgets}))
 
-        card = delete_none(card)
-        card = update_actions(card)
-        print(card)
+        card = serialize(self, replace={'section': sections})
+        logger.debug('%s: %s', self.__class__.__name__, card)
 
         page = {"action": {"navigations": [{"pushCard": card}]}}
         return page
@@ -507,7 +508,7 @@ class CardBuilder:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class ComposeActionResponse:
 
     def printJson(self):
@@ -517,7 +518,7 @@ class ComposeActionResponse:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class ComposeActionResponseBuilder:
     # gmail_draft: GmailDraft = None
 
@@ -527,13 +528,13 @@ class ComposeActionResponseBuilder:
                 {"hostAppAction":
                     {"gmailAction":
                         {"addonComposeUiActionMarkup": {"type": {}}}}}}
-        print(card)
+        logger.debug('%s: %s', self.__class__.__name__, card)
         return card
 
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class ConferenceData:
 
     def printJson(self):
@@ -543,7 +544,7 @@ class ConferenceData:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class CalendarEventActionResponse:
 
     def printJson(self):
@@ -553,7 +554,7 @@ class CalendarEventActionResponse:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class CalendarEventActionResponseBuilder:
     attachments: list[Attachment] = field(
         metadata=config(field_name="addAttachmentsActionMarkup"), default=None)
@@ -570,13 +571,13 @@ class CalendarEventActionResponseBuilder:
         card = {'renderActions':
                 {"hostAppAction":
                     {"calendarAction": card}}}
-        print(card)
+        logger.debug('%s: %s', self.__class__.__name__, card)
         return card
 
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class GridItem:
     identifier: str = None
     image: ImageComponent = None
@@ -593,7 +594,7 @@ class GridItem:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class Grid:
     item: list[GridItem] = None
     authorization_action: AuthorizationAction = None
@@ -609,7 +610,7 @@ class Grid:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class SelectionInput:
     item: list[SelectionItem] = field(
         metadata=config(field_name="selection_item"), default=None)
@@ -623,7 +624,7 @@ class SelectionInput:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class Suggestions:
     suggestion: list[str] = None
     suggestions: list[list[str]] = None
@@ -631,7 +632,7 @@ class Suggestions:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class SuggestionsResponse:
 
     def printJson(self):
@@ -641,18 +642,19 @@ class SuggestionsResponse:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class SuggestionsResponseBuilder:
     suggestions: Suggestions = None
 
     def build(self):
         """Builds the current suggestions response and validates it."""
-        return SuggestionsResponse()
+        suggestions = encode_suggestions(self.suggestions) or {'items': []}
+        return {'renderActions': {'action': {'suggestions': suggestions}}}
 
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class TextInput:
     field_name: str = field(metadata=config(field_name="name"), default='')
     hint: str = field(metadata=config(field_name="hintText"), default='')
@@ -663,22 +665,27 @@ class TextInput:
             decoder=lambda x: x == 'MULTIPLE_LINE'),
         default=False)
     on_change_action: Action = None
-    suggestions: Suggestions = None
-    suggestions_action: Action = None
+    suggestions: Suggestions = field(
+        metadata=config(
+            field_name="initialSuggestions",
+            encoder=encode_suggestions),
+        default=None)
+    suggestions_action: Action = field(
+        metadata=config(field_name="autoCompleteAction"), default=None)
     title: str = field(metadata=config(field_name="label"), default='')
     value: str = ''
 
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class TextParagraph:
     text: str = ''
 
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class TimePicker:
     field_name: str = ''
     hours: int = 0   # 0-23
@@ -689,7 +696,7 @@ class TimePicker:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class UniversalActionResponse:
     def printJson(self):
         """Prints the JSON representation of this object."""
@@ -698,7 +705,7 @@ class UniversalActionResponse:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class UniversalActionResponseBuilder:
     open_link: OpenLink = None
 
@@ -713,7 +720,7 @@ class UniversalActionResponseBuilder:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class UpdateDraftActionResponse:
     def printJson(self):
         """Prints the JSON representation of this object."""
@@ -722,14 +729,14 @@ class UpdateDraftActionResponse:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class UpdateDraftBccRecipientsAction:
     update_bcc_recipients: list[str] = None
 
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class InsertContent:
     content: str = None
     content_type: ContentType = field(
@@ -740,7 +747,7 @@ class InsertContent:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class UpdateDraftBodyAction:
     update_content: list[InsertContent] = field(
         metadata=config(
@@ -757,28 +764,28 @@ class UpdateDraftBodyAction:
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class UpdateDraftCcRecipientsAction:
     update_cc_recipients: list[str] = None
 
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class UpdateDraftSubjectAction:
     update_subject: list[str] = None
 
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class UpdateDraftToRecipientsAction:
     update_to_recipients: list[str] = None
 
 
 @appscript
 @dataclass_json(letter_case=LetterCase.CAMEL)
-@dataclass
+@dataclass(slots=True)
 class UpdateDraftActionResponseBuilder:
     update_draft_bcc_recipients_action: UpdateDraftBccRecipientsAction = field(
         metadata=config(field_name="updateBccRecipients"), default=None)
@@ -799,5 +806,5 @@ class UpdateDraftActionResponseBuilder:
                 {"hostAppAction":
                     {"gmailAction":
                         {"updateDraftActionMarkup": card}}}}
-        print(card)
+        logger.debug('%s: %s', self.__class__.__name__, card)
         return card
@@ -0,0 +1,177 @@
+
+import copy
+from collections.abc import Collection, Mapping
+from dataclasses import fields, is_dataclass
+from enum import Enum
+
+from dataclasses_json import cfg
+
+# Values that ``to_dict`` hands back unchanged
+_ATOMIC = (str, int, float, bool, type(None), Enum)
+
+# Keys ``update_actions`` moves or rebuilds without descending into them
+_LINK_KEYS = ('openLink', 'openDynamicLinkAction')
+_OPAQUE_KEYS = _LINK_KEYS + ('selection_item',)
+
+_plans = {}
+
+
+def field_plan(cls):
+    """Return how each field of a dataclass is written out.
+
+    Plans are computed once per class from the same configuration
+    ``to_dict`` reads: global encoders, then the class's
+    ``dataclass_json_config``, then each field's ``config()`` metadata. Key
+    renames, encoders and exclusions therefore stay in step with
+    dataclasses_json.
+
+    Parameters
+    ----------
+    cls : type
+        dataclass_json decorated class
+
+    Returns
+    -------
+    tuple
+        ``(attribute, key, encoder, exclude)`` for every field, in order
+
+    """
+    plan = _plans.get(cls)
+    if plan is None:
+        cls_config = getattr(cls, 'dataclass_json_config', None) or {}
+        plan = []
+        for f in fields(cls):
+            override = {}
+            if f.type in cfg.global_config.encoders:
+                override['encoder'] = cfg.global_config.encoders[f.type]
+            override.update(cls_config)
+            override.update(f.metadata.get('dataclasses_json', {}))
+            key = f.name
+            if override.get('letter_case') is not None:
+                key = override['letter_case'](key)
+            plan.append((f.name, key, override.get('encoder'),
+                         override.get('exclude')))
+        plan = tuple(plan)
+        _plans[cls] = plan
+    return plan
+
+
+def serialize(obj, actions=True, replace=None):
+    """Serialize a card object in a single traversal.
+
+    The result equals ``update_actions(delete_none(obj.to_dict()))``, or
+    ``delete_none(obj.to_dict())`` when ``actions`` is False, without
+    building the intermediate dictionaries.
+
+    Parameters
+    ----------
+    obj : object
+        dataclass, mapping, collection or scalar to serialize
+    actions : bool
+        wrap ``onClick`` values and move links the way ``update_actions``
+        does
+    replace : dict, optional
+        already serialized values for some of ``obj``'s fields, by attribute
+        name
+
+    Returns
+    -------
+    object
+        camelCase, None-free structure ready to be encoded as JSON
+
+    """
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return _object(obj, actions, replace or {})
+    return _value(obj, actions)
+
+
+def _object(obj, actions, replace):
+    out = {}
+    for attr, key, encoder, exclude in field_plan(type(obj)):
+        if attr in replace:
+            value = replace[attr]
+        else:
+            raw = getattr(obj, attr)
+            if encoder is not None:
+                if exclude is not None and exclude(raw):
+                    continue
+                value = _clean(encoder(raw), actions and key not in _OPAQUE_KEYS)
+            else:
+                value = _value(raw, actions and key not in _OPAQUE_KEYS)
+                if exclude is not None and exclude(value):
+                    continue
+        if value is not None:
+            out[key] = value
+    return _finish(out, actions)
+
+
+def _value(value, actions):
+    if isinstance(value, _ATOMIC):
+        return value
+    if is_dataclass(value) and not isinstance(value, type):
+        return _object(value, actions, {})
+    if isinstance(value, Mapping):
+        out = {}
+        for key, item in value.items():
+            key = _plain(key)
+            item = _value(item, actions and key not in _OPAQUE_KEYS)
+            if item is not None:
+                out[key] = item
+        return _finish(out, actions)
+    if isinstance(value, Collection) and not isinstance(value, bytes):
+        return [_item(item, actions) for item in value]
+    return copy.deepcopy(value)
+
+
+def _item(item, actions):
+    # delete_none and update_actions only look inside dicts directly in a list
+    if isinstance(item, _ATOMIC):
+        return item
+    if isinstance(item, Mapping) or (is_dataclass(item) and not isinstance(item, type)):
+        return _value(item, actions)
+    return _plain(item)
+
+
+def _plain(value):
+    # What to_dict makes of values outside dataclass fields: no None removal
+    if is_dataclass(value) and not isinstance(value, type):
+        return value.to_dict()
+    if isinstance(value, Mapping):
+        return {_plain(key): _plain(item) for key, item in value.items()}
+    if isinstance(value, Collection) and \
+            not isinstance(value, (str, bytes, Enum)):
+        return [_plain(item) for item in value]
+    return copy.deepcopy(value)
+
+
+def _clean(value, actions):
+    # Encoder output, which to_dict leaves as is
+    if isinstance(value, dict):
+        out = {}
+        for key, item in value.items():
+            item = _clean(item, actions and key not in _OPAQUE_KEYS)
+            if item is not None:
+                out[key] = item
+        return _finish(out, actions)
+    if isinstance(value, list):
+        return [_clean(item, actions) if isinstance(item, dict) else item
+                for item in value]
+    return value
+
+
+def _finish(out, actions):
+    if not actions:
+        return out
+    for key, value in list(out.items()):
+        if key == 'onClick':
+            out[key] = {'action': value}
+        elif key in _LINK_KEYS:
+            on_click = out.get('onClick', {})
+            on_click[key] = value
+            out['onClick'] = on_click
+            del out[key]
+        elif key == 'selection_item':
+            del out[key]
+            out['items'] = [{'text': item['text'], 'value': item['value'],
+                             'selected': item['selected']} for item in value]
+    return out
@@ -365,4 +365,26 @@ def test_footer():
 # navigation = CardService.newNavigation().updateCard(card)
 # te = CardService.newActionResponseBuilder().setNavigation(navigation)
 # import ipdb; ipdb.set_trace()
-# te.build()
\ No newline at end of file
+# te.build()
+
+def test_suggestions():
+    suggestions = CardService.newSuggestions()  \
+        .addSuggestion('Woodshop Safety')  \
+        .addSuggestions(['Laser Cutter Basics', 'Intro to Woodturning'])
+
+    textInput = CardService.newTextInput()  \
+        .setFieldName('className')  \
+        .setSuggestions(suggestions)  \
+        .setSuggestionsAction(CardService.newAction().setFunctionName('https://example.com/suggest'))  \
+        .to_dict()
+
+    items = [{'text': 'Woodshop Safety'},
+             {'text': 'Laser Cutter Basics'},
+             {'text': 'Intro to Woodturning'}]
+    assert textInput['initialSuggestions'] == {'items': items}
+    assert textInput['autoCompleteAction']['function'] == 'https://example.com/suggest'
+
+    response = CardService.newSuggestionsResponseBuilder()  \
+        .setSuggestions(suggestions)  \
+        .build()
+    assert response == {'renderActions': {'action': {'suggestions': {'items': items}}}}
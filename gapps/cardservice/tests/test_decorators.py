@@ -61,3 +61,16 @@ def test_to_camel_case():
     for word in ['set_my_function', 'set_My_Function', 'set_MY_FUNCTION',
                  'set_my_FUNCTION']:
         assert dec.to_camel_case(word) == 'setMyFunction'
+
+
+def test_appscript_slotted_widgets():
+    widget = CardService.newDecoratedText()  \
+        .setText('John Doe')  \
+        .setOnClickAction(CardService.newAction().setFunctionName('f'))
+
+    assert not hasattr(widget, '__dict__')
+    assert widget.text == 'John Doe'
+    assert widget.to_dict()['onClick']['function'] == 'f'
+
+    section = CardService.newCardSection().addWidget(widget).addWidget(widget)
+    assert section.widget == [widget, widget]
@@ -0,0 +1,95 @@
+import datetime
+from dataclasses import dataclass, field
+
+from dataclasses_json import LetterCase, cfg, config, dataclass_json
+
+from gapps import CardService
+from gapps.cardservice import utilities as ut
+from gapps.cardservice.serializer import serialize
+
+
+def expected(obj, actions=True):
+    card = ut.delete_none(obj.to_dict())
+    return ut.update_actions(card) if actions else card
+
+
+def action(name, **parameters):
+    return CardService.newAction().setFunctionName(name).setParameters(parameters)
+
+
+def test_widgets_match_to_dict():
+    link = CardService.newOpenLink().setUrl('https://example.com')
+    widgets = [
+        CardService.newDecoratedText()
+        .setText('Intro to Woodturning')
+        .setTopLabel('Mon Oct 19')
+        .setStartIcon(CardService.newIconImage().setIconUrl('https://example.com/i.png'))
+        .setOnClickAction(action('https://example.com/class', eventId='123')),
+        CardService.newTextButton()
+        .setText('Refund')
+        .setBackgroundColor('#123456')
+        .setOnClickAction(action('https://example.com/refund'))
+        .setOpenLink(link),
+        CardService.newTextButton()
+        .setText('Open')
+        .setOnClickOpenLinkAction(action('https://example.com/open'))
+        .setOpenLink(link),
+        CardService.newButtonSet()
+        .addButton(CardService.newTextButton().setText('A').setOnClickAction(action('a', x=None)))
+        .addButton(CardService.newTextButton().setText('B').setDisabled(True)),
+        CardService.newSelectionInput()
+        .setFieldName('choice')
+        .addItem(CardService.SelectionItem(text='One', value='1', selected=True))
+        .addItem(CardService.SelectionItem(text='Two', value='2')),
+        CardService.newTextInput()
+        .setFieldName('className')
+        .setMultiline(True)
+        .setSuggestions(CardService.newSuggestions().addSuggestion('Woodshop Safety'))
+        .setSuggestionsAction(action('https://example.com/suggest')),
+        CardService.newDatePicker().setFieldName('date').setValueInMsSinceEpoch(1),
+        CardService.newDivider(),
+    ]
+
+    for widget in widgets:
+        assert repr(serialize(widget)) == repr(expected(widget))
+
+
+def test_card_matches_to_dict():
+    section = CardService.newCardSection()  \
+        .setHeader('Classes')  \
+        .addWidget(CardService.newTextParagraph().setText('None found'))
+    card = CardService.newCardBuilder()  \
+        .setHeader(CardService.newCardHeader().setTitle('Classes'))  \
+        .addCardAction(CardService.newCardAction().setText('Home').setOnClickAction(action('home')))  \
+        .addSection(section)
+
+    assert repr(serialize(card)) == repr(expected(card))
+
+
+def test_action_response_matches_to_dict():
+    card = CardService.newCardBuilder()  \
+        .addSection(CardService.newCardSection().addWidget(CardService.newTextParagraph().setText('Done')))  \
+        .build()
+    response = CardService.newActionResponseBuilder()  \
+        .setNavigation(CardService.newNavigation().pushCard(card))  \
+        .setNotification(CardService.newNotification().setText('Saved'))
+
+    assert repr(serialize(response, actions=False)) == repr(expected(response, actions=False))
+
+
+def test_plan_follows_dataclasses_json_config():
+    @dataclass_json(letter_case=LetterCase.CAMEL)
+    @dataclass
+    class Event:
+        event_date: datetime.date
+        event_name: str = field(metadata=config(field_name='name'))
+        internal: str = field(default='', metadata=config(exclude=lambda x: True))
+
+    event = Event(datetime.date(2030, 1, 1), 'Woodshop Safety', 'hidden')
+    cfg.global_config.encoders[datetime.date] = datetime.date.isoformat
+    try:
+        assert repr(serialize(event)) == repr(expected(event))
+        assert serialize(event) == {'eventDate': '2030-01-01',
+                                    'name': 'Woodshop Safety'}
+    finally:
+        del cfg.global_config.encoders[datetime.date]
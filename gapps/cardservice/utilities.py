@@ -70,6 +70,28 @@ def update_actions(_dict):
     return _dict
 
 
+def encode_suggestions(suggestions):
+    """Encode Suggestions as a card suggestion list.
+
+    Parameters
+    ----------
+    suggestions : Suggestions
+        suggestions added with ``addSuggestion`` or ``addSuggestions``
+
+    Returns
+    -------
+    dict
+        suggestions in the form ``{'items': [{'text': ...}]}``
+
+    """
+    if suggestions is None:
+        return None
+    texts = list(suggestions.suggestion or [])
+    for group in suggestions.suggestions or []:
+        texts.extend(group)
+    return {'items': [{'text': text} for text in texts]}
+
+
 def decode_user(token: str):
     """Decode Google User ID Token.
 
@@ -9,7 +9,7 @@ def sendMIMEmessage(MIMEmessage, G_user, G_password):
 
     MIMEmessage['From'] = "Asmbly AdminBot"
 
-    logging.debug(f'''Sending email subject "{MIMEmessage['Subject']}" to {MIMEmessage['To']}''')
+    logging.debug('Sending email subject "%s" to %s', MIMEmessage['Subject'], MIMEmessage['To'])
 
     context = ssl.create_default_context()
     try:
@@ -17,4 +17,4 @@ def sendMIMEmessage(MIMEmessage, G_user, G_password):
             server.login(G_user, G_password)
             server.sendmail(G_user, MIMEmessage['To'], MIMEmessage.as_string())
     except:
-        logging.exception(f'''Failed sending email subject "{MIMEmessage['Subject']}" to {MIMEmessage['To']}''')
+        logging.exception('Failed sending email subject "%s" to %s', MIMEmessage['Subject'], MIMEmessage['To'])
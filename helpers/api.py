@@ -1,23 +1,42 @@
+import logging
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+
+# Connections are kept alive and reused across calls and worker threads
+session = requests.Session()
+session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
+# Most calls that fan out across events or accounts stay well under Neon's rate limit at this width
+MAX_CONCURRENCY = 8
 
 ## Helper function for API calls
 def apiCall(httpVerb, url, data, headers):
     # Make request
     if httpVerb == 'GET':
-        response = requests.get(url, data=data, headers=headers)
+        response = session.get(url, data=data, headers=headers)
     elif httpVerb == 'POST':
-        response = requests.post(url, data=data, headers=headers)
+        response = session.post(url, data=data, headers=headers)
     elif httpVerb == 'PUT':
-        response = requests.put(url, data=data, headers=headers)
+        response = session.put(url, data=data, headers=headers)
     elif httpVerb == 'PATCH':
-        response = requests.patch(url, data=data, headers=headers)
+        response = session.patch(url, data=data, headers=headers)
     elif httpVerb == 'DELETE':
-        response = requests.delete(url, data=data, headers=headers)
+        response = session.delete(url, data=data, headers=headers)
     else:
-        print(f"HTTP verb {httpVerb} not recognized")
+        logging.error("HTTP verb %s not recognized", httpVerb)
 
     # These lines break the code for PATCH requests
     # response = response.json()
     # pprint(response)
 
-    return response
\ No newline at end of file
+    return response
+
+## Helper function to run the same API call for several items at once. Results come back in the same order as items.
+def concurrentMap(func, items, maxWorkers=MAX_CONCURRENCY):
+    items = list(items)
+    if len(items) <= 1:
+        return [func(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(maxWorkers, len(items))) as executor:
+        return list(executor.map(func, items))
@@ -0,0 +1,253 @@
+############### In-memory catalog of upcoming Neon events ###################
+#  Refreshed from /events/search in the background and searched locally    #
+############################################################################
+
+import datetime
+import json
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+
+from helpers import neon
+
+#Refresh the catalog in the background once it is older than this many seconds
+REFRESH_INTERVAL = int(os.environ.get("EVENT_CATALOG_REFRESH", 300))
+#Stop answering searches from a catalog that is older than this, e.g. while Neon is down
+MAX_AGE = int(os.environ.get("EVENT_CATALOG_MAX_AGE", 900))
+#How often the reconciler checks whether the catalog is due for a refresh
+RECONCILE_INTERVAL = int(os.environ.get("EVENT_CATALOG_RECONCILE", 60))
+
+OUTPUT_FIELDS = [
+    "Event ID",
+    "Event Name",
+    "Event Start Date",
+    "Event Start Time",
+    "Event End Date",
+    "Event Capacity",
+    "Registrants",
+    "Event Category Name",
+]
+
+def toInt(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+def tokenize(text: str) -> list:
+    return re.findall(r"[a-z0-9]+", text.casefold())
+
+class EventCatalog:
+    def __init__(self, refreshInterval: int = REFRESH_INTERVAL, maxAge: int = MAX_AGE):
+        self.refreshInterval = refreshInterval
+        self.maxAge = maxAge
+
+        self.lock = threading.Lock()
+        self.refreshLock = threading.Lock()
+
+        #Event ID -> search result row, in the same shape /events/search returns
+        self.events = {}
+        #Every suffix of every name token, sorted, so a bisect over it finds tokens containing a search term
+        self.suffixes = []
+        self.suffixEvents = {}
+        #(start date, event ID) pairs sorted by date
+        self.byStartDate = []
+        #(lowercased name from the start of each word, event name) pairs, sorted, for typeahead
+        self.nameKeys = []
+
+        #Event ID -> {"capacity", "registered", "updatedAt"}. Seeded from Neon's counts on every refresh and adjusted
+        #in between by the add-on's own registrations and cancellations.
+        self.availability = {}
+
+        self.refreshedAt = None
+        #Events starting on or after this date are in the catalog
+        self.windowStart = None
+
+        self.reconciler = None
+
+    def age(self):
+        if self.refreshedAt is None:
+            return None
+        return time.monotonic() - self.refreshedAt
+
+    def needsRefresh(self) -> bool:
+        age = self.age()
+        return age is None or age > self.refreshInterval or self.windowStart != datetime.date.today().isoformat()
+
+    def isFresh(self) -> bool:
+        age = self.age()
+        return age is not None and age <= self.maxAge
+
+    # Fetch every upcoming event from Neon and swap in the new catalog and indexes
+    def refresh(self, N_APIkey: str, N_APIuser: str):
+        startedAt = time.time()
+        windowStart = datetime.date.today().isoformat()
+        searchFields = json.dumps([{
+            "field": "Event Start Date",
+            "operator": "GREATER_AND_EQUAL",
+            "value": windowStart
+        }])
+        outputFields = json.dumps(OUTPUT_FIELDS)
+
+        rows = []
+        page = 0
+        while True:
+            response = neon.postEventSearch(searchFields, outputFields, N_APIkey, N_APIuser, page=page)
+            rows.extend(response.get("searchResults") or [])
+            page += 1
+            if page >= response.get("pagination", {}).get("totalPages", 0):
+                break
+
+        events = {row["Event ID"]: row for row in rows}
+
+        suffixEvents = {}
+        for eventId, row in events.items():
+            for token in tokenize(row["Event Name"]):
+                for i in range(len(token)):
+                    suffixEvents.setdefault(token[i:], set()).add(eventId)
+
+        byStartDate = sorted((row["Event Start Date"] or "", eventId) for eventId, row in events.items())
+
+        nameKeys = set()
+        for row in events.values():
+            name = row["Event Name"]
+            folded = name.casefold()
+            for word in re.finditer(r"[a-z0-9]+", folded):
+                nameKeys.add((folded[word.start():], name))
+
+        with self.lock:
+            #Neon's counts correct any drift, except for events written to since this refresh started, whose local
+            #count may be newer than what the search returned
+            availability = {}
+            for eventId, row in events.items():
+                current = self.availability.get(eventId)
+                if current is not None and current["updatedAt"] >= startedAt:
+                    availability[eventId] = current
+                else:
+                    availability[eventId] = {"capacity": toInt(row.get("Event Capacity")),
+                                             "registered": toInt(row.get("Registrants")),
+                                             "updatedAt": startedAt}
+
+            self.availability = availability
+            self.events = events
+            self.suffixes = sorted(suffixEvents)
+            self.suffixEvents = suffixEvents
+            self.byStartDate = byStartDate
+            self.nameKeys = sorted(nameKeys)
+            self.windowStart = windowStart
+            self.refreshedAt = time.monotonic()
+
+    # Start a refresh on a daemon thread unless one is already running
+    def refreshInBackground(self, N_APIkey: str, N_APIuser: str):
+        if not self.refreshLock.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.refresh(N_APIkey, N_APIuser)
+            except Exception:
+                logging.exception("Event catalog refresh failed")
+            finally:
+                self.refreshLock.release()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    # Refresh once the catalog is due, so seat counts are reconciled with Neon even while nobody is searching
+    def reconcile(self, N_APIkey: str, N_APIuser: str):
+        if self.needsRefresh():
+            self.refreshInBackground(N_APIkey, N_APIuser)
+
+    # Call reconcile every RECONCILE_INTERVAL seconds on a daemon thread, started once per catalog. The key should be
+    # the service's own Neon key, not a staff member's, since it is used for as long as the process runs.
+    def startReconciling(self, N_APIkey: str, N_APIuser: str):
+        with self.lock:
+            if self.reconciler is not None:
+                return
+            self.reconciler = threading.Thread(target=self.reconcileForever, args=(N_APIkey, N_APIuser), daemon=True)
+        self.reconciler.start()
+
+    def reconcileForever(self, N_APIkey: str, N_APIuser: str):
+        while True:
+            time.sleep(RECONCILE_INTERVAL)
+            try:
+                self.reconcile(N_APIkey, N_APIuser)
+            except Exception:
+                logging.exception("Event catalog reconcile failed")
+
+    # IDs of events with a name token containing term
+    def matchToken(self, term: str) -> set:
+        matches = set()
+        i = bisect_left(self.suffixes, term)
+        while i < len(self.suffixes) and self.suffixes[i].startswith(term):
+            matches |= self.suffixEvents[self.suffixes[i]]
+            i += 1
+        return matches
+
+    # Same results as a Neon search with "Event Name" CONTAIN eventName, "Event Start Date" GREATER_AND_EQUAL startDate
+    # and (if given) "Event End Date" LESS_AND_EQUAL endDate. Dates are ISO strings. Returns None when the catalog
+    # can't answer, either because it is too old or startDate is before the events it holds.
+    def search(self, eventName: str, startDate: str, endDate: str = None):
+        with self.lock:
+            if not self.isFresh() or startDate < self.windowStart:
+                return None
+
+            terms = tokenize(eventName)
+            if terms:
+                candidates = self.matchToken(terms[0])
+                for term in terms[1:]:
+                    candidates &= self.matchToken(term)
+            else:
+                first = bisect_left(self.byStartDate, (startDate,))
+                candidates = [eventId for _, eventId in self.byStartDate[first:]]
+
+            name = eventName.casefold()
+            results = []
+            for eventId in candidates:
+                row = self.events[eventId]
+                if name not in row["Event Name"].casefold() or (row["Event Start Date"] or "") < startDate:
+                    continue
+                if endDate and (not row.get("Event End Date") or row["Event End Date"] > endDate):
+                    continue
+                result = dict(row)
+                result["Registrants"] = str(self.availability[eventId]["registered"])
+                results.append(result)
+
+        return results
+
+    # Capacity and registered count for an event in the catalog, or None
+    def getAvailability(self, eventId) -> dict:
+        with self.lock:
+            availability = self.availability.get(str(eventId))
+            return dict(availability) if availability else None
+
+    # Record registrations (positive delta) or cancellations (negative delta) the add-on made for an event
+    def adjustRegistered(self, eventId, delta: int):
+        with self.lock:
+            availability = self.availability.get(str(eventId))
+            if availability is None:
+                return
+            availability["registered"] = max(availability["registered"] + delta, 0)
+            availability["updatedAt"] = time.time()
+
+    # Up to limit distinct event names with a word starting with prefix, e.g. "turn" -> "Intro to Woodturning" is not
+    # suggested but "wood" -> "Intro to Woodturning" is
+    def suggestNames(self, prefix: str, limit: int = 10) -> list:
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            return []
+
+        names = []
+        with self.lock:
+            i = bisect_left(self.nameKeys, (prefix,))
+            while i < len(self.nameKeys) and self.nameKeys[i][0].startswith(prefix) and len(names) < limit:
+                name = self.nameKeys[i][1]
+                if name not in names:
+                    names.append(name)
+                i += 1
+
+        return names
+
+catalog = EventCatalog()
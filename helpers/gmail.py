@@ -9,7 +9,7 @@ def sendMIMEmessage(MIMEmessage, G_user, G_password):
 
     MIMEmessage['From'] = "Asmbly AdminBot"
 
-    logging.debug(f'''Sending email subject "{MIMEmessage['Subject']}" to {MIMEmessage['To']} and CCing {MIMEmessage['CC']}''')
+    logging.debug('Sending email subject "%s" to %s and CCing %s', MIMEmessage['Subject'], MIMEmessage['To'], MIMEmessage['CC'])
 
     context = ssl.create_default_context()
     try:
@@ -17,4 +17,4 @@ def sendMIMEmessage(MIMEmessage, G_user, G_password):
             server.login(G_user, G_password)
             server.send_message(MIMEmessage)
     except:
-        logging.exception(f'''Failed sending email subject "{MIMEmessage['Subject']}" to {MIMEmessage['To']}''')
\ No newline at end of file
+        logging.exception('Failed sending email subject "%s" to %s', MIMEmessage['Subject'], MIMEmessage['To'])
\ No newline at end of file
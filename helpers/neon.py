@@ -4,7 +4,7 @@ import json
 import datetime
 from functools import lru_cache
 
-from helpers.api import apiCall
+from helpers.api import apiCall, concurrentMap
 
 N_baseURL = 'https://api.neoncrm.com/v2'
 
@@ -208,10 +208,10 @@ def getOrderOutputFields(N_APIkey, N_APIuser):
 
     return responseOutputFields
 
-# Post search query to get back orders (only gets 200 events, pagination not currently supported)
+# Post search query to get back orders (200 orders per page)
 
 
-def postOrderSearch(searchFields, outputFields, N_APIkey, N_APIuser):
+def postOrderSearch(searchFields, outputFields, N_APIkey, N_APIuser, page=0):
     httpVerb = 'POST'
     resourcePath = '/orders/search'
     queryParams = ''
@@ -220,7 +220,7 @@ def postOrderSearch(searchFields, outputFields, N_APIkey, N_APIuser):
         "searchFields": {searchFields},
         "outputFields": {outputFields},
         "pagination": {{
-        "currentPage": 0,
+        "currentPage": {page},
         "pageSize": 200
         }}
     }}
@@ -346,6 +346,32 @@ def getAccountEventRegistrations(neonId, N_APIkey, N_APIuser):
 
     return responseEvents
 
+# Iterate over an account's event registrations, newest first, a page at a time. Once a registration made before
+# `since` (a datetime.date) is reached, no further pages are requested.
+def iterAccountEventRegistrations(neonId, N_APIkey, N_APIuser, since=None, pageSize=20):
+    httpVerb = 'GET'
+    resourcePath = f'/accounts/{neonId}/eventRegistrations'
+    data = ''
+
+    # Neon Account Info
+    N_headers = getHeaders(N_APIkey, N_APIuser)
+
+    page = 0
+    while True:
+        queryParams = f'?sortColumn=registrationDateTime&sortDirection=DESC&currentPage={page}&pageSize={pageSize}'
+        url = N_baseURL + resourcePath + queryParams
+        responseEvents = apiCall(httpVerb, url, data, N_headers).json()
+
+        for registration in responseEvents.get("eventRegistrations") or []:
+            registered = registration.get("registrationDateTime")
+            if since and registered and datetime.date.fromisoformat(registered[:10]) < since:
+                return
+            yield registration
+
+        page += 1
+        if page >= responseEvents.get("pagination", {}).get("totalPages", 0):
+            return
+
 def getAccountSingleEventRegistration(neonId, eventId, N_APIkey, N_APIuser):
     httpVerb = 'GET'
     resourcePath = f'/accounts/{neonId}/eventRegistrations'
@@ -374,11 +400,74 @@ def getEvent(eventId, N_APIkey, N_APIuser):
 
     return responseEvent
 
-def cancelClass(registrationId, eventId: str, neonId: str, N_APIkey, N_APIuser):
+# Largest range of event IDs covered by one search in getEventsByIds
+EVENT_ID_SPAN = 200
+
+# Get several events by ID with /events/search instead of one GET per event. IDs are grouped into ranges no wider than
+# EVENT_ID_SPAN, each range is searched once (all pages), and rows for IDs that weren't asked for are dropped.
+# Returns a dict keyed by event ID (str) of events in the shape getEvent returns, limited to id, name and eventDates.
+# IDs the search doesn't return are left out.
+def getEventsByIds(eventIds, N_APIkey, N_APIuser):
+    wanted = {str(eventId) for eventId in eventIds}
+    if not wanted:
+        return {}
+
+    ranges = []
+    for eventId in sorted(wanted, key=int):
+        if ranges and int(eventId) - int(ranges[-1][0]) < EVENT_ID_SPAN:
+            ranges[-1][1] = eventId
+        else:
+            ranges.append([eventId, eventId])
+
+    outputFields = json.dumps([
+        "Event ID",
+        "Event Name",
+        "Event Start Date",
+        "Event Start Time",
+        "Event End Date",
+        "Event End Time",
+    ])
+
+    def searchRange(idRange):
+        searchFields = json.dumps([
+            {"field": "Event ID", "operator": "GREATER_AND_EQUAL", "value": idRange[0]},
+            {"field": "Event ID", "operator": "LESS_AND_EQUAL", "value": idRange[1]},
+        ])
+        rows = []
+        page = 0
+        while True:
+            response = postEventSearch(searchFields, outputFields, N_APIkey, N_APIuser, page=page)
+            rows.extend(response.get("searchResults") or [])
+            page += 1
+            if page >= response.get("pagination", {}).get("totalPages", 0):
+                return rows
+
+    events = {}
+    for rows in concurrentMap(searchRange, ranges):
+        for row in rows:
+            eventId = str(row["Event ID"])
+            if eventId not in wanted:
+                continue
+            events[eventId] = {
+                "id": eventId,
+                "name": row["Event Name"],
+                "eventDates": {
+                    "startDate": row["Event Start Date"],
+                    "endDate": row.get("Event End Date"),
+                    "startTime": row.get("Event Start Time"),
+                    "endTime": row.get("Event End Time"),
+                },
+            }
+
+    return events
+
+# Cancel a registration. Pass the registration record (as returned by getAccountEventRegistrations) if the caller
+# already has it, otherwise it is fetched to find the attendee ID.
+def cancelClass(registrationId, eventId: str, neonId: str, N_APIkey, N_APIuser, registration: dict = None):
     httpVerb = 'PATCH'
     resourcePath = f'/eventRegistrations/{registrationId}'
     queryParams = ''
-    reg = getAccountSingleEventRegistration(neonId, eventId, N_APIkey, N_APIuser).get('eventRegistrations')[0]
+    reg = registration or getAccountSingleEventRegistration(neonId, eventId, N_APIkey, N_APIuser).get('eventRegistrations')[0]
     #ticketId = reg.get("tickets")[0].get("ticketId")
     attendeeId = reg.get("tickets")[0].get("attendees")[0].get("attendeeId")
     data = {
@@ -405,12 +494,15 @@ def cancelClass(registrationId, eventId: str, neonId: str, N_APIkey, N_APIuser):
 
     return responseStatus
 
-def refundClass(eventId: str, neonId: str, N_APIkey, N_APIuser):
+# Refund the payment for a registration. Pass the registration record if the caller already has it, otherwise the
+# account's latest registration for the event is fetched to find the payment ID.
+def refundClass(eventId: str, neonId: str, N_APIkey, N_APIuser, registration: dict = None):
+    reg = registration or getAccountSingleEventRegistration(neonId, eventId, N_APIkey, N_APIuser).get('eventRegistrations')[0]
+    paymentId = reg.get("payments")[0].get("id")
+
     httpVerb = 'POST'
     resourcePath = f'/payments/{paymentId}/refund'
     queryParams = ''
-    reg = getAccountSingleEventRegistration(neonId, eventId, N_APIkey, N_APIuser).get('eventRegistrations')[0]
-    paymentId = reg.get("payments")[0].get("id")
     data = ""
 
     # Neon Account Info
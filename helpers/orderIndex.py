@@ -0,0 +1,109 @@
+############### In-memory index of Neon orders by shopping cart ID ###################
+#  Synced incrementally from /orders/search by order date for gift certificate lookup #
+#######################################################################################
+
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+
+from helpers import neon
+
+#Sync new orders in the background once the last sync is older than this many seconds
+SYNC_INTERVAL = int(os.environ.get("ORDER_INDEX_SYNC", 600))
+#How far back the first sync goes
+HISTORY_DAYS = int(os.environ.get("ORDER_INDEX_DAYS", 730))
+
+OUTPUT_FIELDS = [
+    "Shopping Cart ID",
+    "Order Date",
+    "Account ID",
+    "First Name",
+    "Last Name",
+    "Email 1",
+]
+
+class OrderIndex:
+    def __init__(self, syncInterval: int = SYNC_INTERVAL, historyDays: int = HISTORY_DAYS):
+        self.syncInterval = syncInterval
+        self.historyDays = historyDays
+
+        self.lock = threading.Lock()
+        self.syncLock = threading.Lock()
+
+        #Shopping cart ID -> purchaser (Account ID, First Name, Last Name, Email 1)
+        self.orders = {}
+        #Latest order date seen. The next sync starts from this day again, since orders placed later that same day
+        #weren't there yet, and re-reading an order just overwrites it with the same purchaser.
+        self.syncedThrough = None
+        self.syncedAt = None
+
+    def needsSync(self) -> bool:
+        return self.syncedAt is None or time.monotonic() - self.syncedAt > self.syncInterval
+
+    # Add every successful order placed since the last sync (or in the last historyDays days on the first sync).
+    # Gift certificates are only redeemable from paid orders, so failed, canceled and refunded carts are left to the
+    # direct Neon search rather than scanned on every cold start.
+    def sync(self, N_APIkey: str, N_APIuser: str):
+        since = self.syncedThrough or (datetime.date.today() - datetime.timedelta(days=self.historyDays)).isoformat()
+        searchFields = json.dumps([
+            {
+                "field": "Order Date",
+                "operator": "GREATER_AND_EQUAL",
+                "value": since
+            },
+            {
+                "field": "Order Status",
+                "operator": "EQUAL",
+                "value": "SUCCEEDED"
+            }
+        ])
+        outputFields = json.dumps(OUTPUT_FIELDS)
+
+        orders = {}
+        syncedThrough = since
+        page = 0
+        while True:
+            response = neon.postOrderSearch(searchFields, outputFields, N_APIkey, N_APIuser, page=page)
+            for row in response.get("searchResults") or []:
+                orders[str(row["Shopping Cart ID"])] = {field: row.get(field) for field in OUTPUT_FIELDS[2:]}
+                if row.get("Order Date"):
+                    syncedThrough = max(syncedThrough, row["Order Date"][:10])
+            page += 1
+            if page >= response.get("pagination", {}).get("totalPages", 0):
+                break
+
+        with self.lock:
+            self.orders.update(orders)
+            self.syncedThrough = syncedThrough
+            self.syncedAt = time.monotonic()
+
+    # Start a sync on a daemon thread unless one is already running
+    def syncInBackground(self, N_APIkey: str, N_APIuser: str):
+        if not self.syncLock.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.sync(N_APIkey, N_APIuser)
+            except Exception:
+                logging.exception("Order index sync failed")
+            finally:
+                self.syncLock.release()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    # Purchaser of an indexed order, or None if the cart ID isn't in the index (yet)
+    def lookup(self, cartId) -> dict:
+        with self.lock:
+            order = self.orders.get(str(cartId))
+            return dict(order) if order else None
+
+    # Add an order found with a direct Neon search, e.g. one placed since the last sync
+    def add(self, cartId, purchaser: dict):
+        with self.lock:
+            self.orders[str(cartId)] = {field: purchaser.get(field) for field in OUTPUT_FIELDS[2:]}
+
+index = OrderIndex()
@@ -0,0 +1,110 @@
+############### Google Secret Manager helpers ###################
+#  Secret Manager docs - https://cloud.google.com/secret-manager/docs  #
+########################################################################
+
+import json
+from functools import lru_cache
+
+SECRET_MANAGER_HOST = "secretmanager.googleapis.com:443"
+
+#Keep the gRPC channel alive between requests so secret lookups don't pay for a new connection each time.
+#The last two options match the defaults the generated transport would otherwise use.
+CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+    ("grpc.max_send_message_length", -1),
+    ("grpc.max_receive_message_length", -1),
+]
+
+# One long-lived client (and gRPC channel) per process. The client library is imported here rather than at
+# module level because it is slow to import and not every instance needs it before the first request.
+@lru_cache
+def getClient() -> "secretmanager.SecretManagerServiceClient":
+    from google.cloud import secretmanager
+    from google.cloud.secretmanager_v1.services.secret_manager_service.transports import SecretManagerServiceGrpcTransport
+
+    channel = SecretManagerServiceGrpcTransport.create_channel(SECRET_MANAGER_HOST, options=CHANNEL_OPTIONS)
+    transport = SecretManagerServiceGrpcTransport(channel=channel)
+
+    return secretmanager.SecretManagerServiceClient(transport=transport)
+
+# Get the latest version of a JSON secret, verifying the payload checksum
+def accessSecret(project_id: str, secret_id: str) -> dict:
+    client = getClient()
+
+    name = f"projects/{project_id}/secrets/{secret_id}/versions/latest"
+    secret = client.access_secret_version(request={"name": name})
+
+    # Verify payload checksum. google_crc32c is imported here for the same reason as the client library: its
+    # package metadata lookup costs a noticeable part of the app's import time.
+    import google_crc32c
+    crc32c = google_crc32c.Checksum()
+    crc32c.update(secret.payload.data)
+    if secret.payload.data_crc32c != int(crc32c.hexdigest(), 16):
+        raise ValueError("Checksum failed.")
+
+    payload = secret.payload.data.decode("UTF-8")
+
+    return json.loads(payload)
+
+def createSecret(project_id: str, secret_id: str, payload: str) -> "secretmanager.SecretVersion":
+    """
+    Create a new secret with the given name, then create a secret version. A secret is a logical wrapper
+    around a collection of secret versions. Secret versions hold the actual
+    secret material.
+    """
+    client = getClient()
+
+    # Build the resource name of the parent project.
+    parent = f"projects/{project_id}"
+
+    # Create the secret.
+    secret = client.create_secret(
+        request={
+            "parent": parent,
+            "secret_id": secret_id,
+            "secret": {"replication": {"automatic": {}}},
+        }
+    )
+
+    # Convert the string payload into a bytes. This step can be omitted if you
+    # pass in bytes instead of a str for the payload argument.
+    payload_bytes = payload.encode("UTF-8")
+
+    # Calculate payload checksum. Passing a checksum in add-version request
+    # is optional.
+    import google_crc32c
+    crc32c = google_crc32c.Checksum()
+    crc32c.update(payload_bytes)
+
+    # Add the secret version.
+    version = client.add_secret_version(
+        request={
+            "parent": secret.name,
+            "payload": {
+                "data": payload_bytes,
+                "data_crc32c": int(crc32c.hexdigest(), 16),
+                }
+            }
+    )
+
+    return version
+
+def deleteSecret(project_id: str, secret_id: str):
+    client = getClient()
+
+    path = client.secret_path(project_id, secret_id)
+
+    client.delete_secret(request={"name": path})
+
+# Get the IDs of all secrets in the project
+def listSecretIds(project_id: str) -> list:
+    client = getClient()
+
+    secretIds = []
+    for secret in client.list_secrets(request={"parent": f"projects/{project_id}"}):
+        secretIds.append(secret.name.split('/')[-1])
+
+    return secretIds
@@ -0,0 +1,69 @@
+############### Structured logging for Cloud Logging ###################
+#  Cloud Run parses one JSON object per line on stdout into a log entry  #
+#  https://cloud.google.com/logging/docs/structured-logging              #
+##########################################################################
+
+import datetime
+import logging
+import os
+import sys
+from pprint import pformat
+
+import orjson
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+
+#Attributes every LogRecord has. Anything else on a record was passed with extra= and is written as its own field.
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+#Cloud Logging severities for the standard levels
+SEVERITY = {
+    logging.DEBUG: "DEBUG",
+    logging.INFO: "INFO",
+    logging.WARNING: "WARNING",
+    logging.ERROR: "ERROR",
+    logging.CRITICAL: "CRITICAL",
+}
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        if record.exc_info:
+            #Error Reporting picks up stack traces from the message
+            message = f"{message}\n{self.formatException(record.exc_info)}"
+        elif record.stack_info:
+            message = f"{message}\n{self.formatStack(record.stack_info)}"
+
+        entry = {
+            "severity": SEVERITY.get(record.levelno, record.levelname),
+            "message": message,
+            "time": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "logger": record.name,
+            "logging.googleapis.com/sourceLocation": {
+                "file": record.pathname,
+                "line": record.lineno,
+                "function": record.funcName,
+            },
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+
+        return orjson.dumps(entry, default=str).decode()
+
+# Send every log record to stdout as one JSON line, replacing any handlers already on the root logger
+def configure(level: str = LOG_LEVEL):
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter())
+    logging.basicConfig(handlers=[handler], level=level, force=True)
+
+# Pretty-printed form of obj that is only built if a handler actually formats the record, e.g.
+# logging.debug("PUT to %s %s", url, Pretty(data))
+class Pretty:
+    __slots__ = ("obj",)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self) -> str:
+        return pformat(self.obj)
@@ -0,0 +1,48 @@
+############### Google Workspace REST helpers ####################
+#  Gmail API docs - https://developers.google.com/gmail/api/reference/rest   #
+#  People API docs - https://developers.google.com/people/api/rest           #
+###############################################################################
+
+# The add-on only needs two read-only calls, so call the REST endpoints directly over a pooled
+# session instead of building a discovery-based client on every request.
+
+import requests
+from requests.adapters import HTTPAdapter
+
+G_gmailURL = 'https://gmail.googleapis.com/gmail/v1'
+G_peopleURL = 'https://people.googleapis.com/v1'
+
+# Connections are kept alive and reused across requests and worker threads
+session = requests.Session()
+session.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=32))
+
+TIMEOUT = 10
+
+def getHeaders(accessToken: str):
+    return {'Authorization': f'Bearer {accessToken}'}
+
+# Get the value of a single header of a Gmail message (e.g. "From") without fetching the message body
+def getMessageHeader(messageId: str, header: str, accessToken: str) -> str:
+    url = G_gmailURL + f'/users/me/messages/{messageId}'
+    queryParams = {
+        'format': 'metadata',
+        'metadataHeaders': header,
+        'fields': 'payload/headers',
+    }
+
+    response = session.get(url, params=queryParams, headers=getHeaders(accessToken), timeout=TIMEOUT)
+    response.raise_for_status()
+
+    return response.json().get('payload').get('headers')[0].get('value')
+
+# Get the given name of the authorized user
+def getGivenName(accessToken: str) -> str:
+    url = G_peopleURL + '/people/me'
+    queryParams = {
+        'personFields': 'names',
+    }
+
+    response = session.get(url, params=queryParams, headers=getHeaders(accessToken), timeout=TIMEOUT)
+    response.raise_for_status()
+
+    return response.json().get('names')[0].get('givenName')
@@ -2,13 +2,15 @@
 #      Neon API docs - https://developer.neoncrm.com/api-v2/     #
 ##################################################################
 
-from pprint import pformat, pprint
 import base64
 import datetime, pytz
 import requests
 import logging
 from functools import lru_cache
 
+from helpers.api import concurrentMap
+from helpers.structuredLog import Pretty
+
 #I'm not absolutely certain NeonCRM thinks it's in central time, but it's in the ballpark.
 #pacific time might be slightly more accurate.  Maybe I'll ask their support.
 today = datetime.datetime.now(pytz.timezone("America/Chicago")).date()
@@ -99,15 +101,13 @@ def updateDID(account: dict, N_APIkey, N_APIuser):
 
 
 ####################################################################
-# Update a valid Neon account to include membership information
+# Fetch the membership records for a Neon account ID
 ####################################################################
-def appendMemberships(account: dict, N_APIkey, N_APIuser, detailed=False):
+def getMemberships(id, N_APIkey, N_APIuser):
     #this should be a pretty thorough check for sane argument
-    assert(int(account.get("Account ID")) > 0)
+    assert(int(id) > 0)
 
-    #Neon counts a failed renewal as a valid subscription so long as automatic renewal is enabled.
-    #WE only think a subscription is valid if the payment transaction was successful, so check payment status.
-    url = N_baseURL + f'/accounts/{account.get("Account ID")}/memberships'
+    url = N_baseURL + f'/accounts/{id}/memberships'
     response = requests.get(url, headers=getHeaders(N_APIkey, N_APIuser))
 
     if (response.status_code != 200):
@@ -115,9 +115,22 @@ def appendMemberships(account: dict, N_APIkey, N_APIuser, detailed=False):
 
     #logging.debug(pformat(response.json()))
 
-    account["validMembership"] = False
+    return response.json().get("memberships")
 
-    memberships = response.json().get("memberships")
+####################################################################
+# Update a valid Neon account to include membership information
+####################################################################
+def appendMemberships(account: dict, N_APIkey, N_APIuser, detailed=False):
+    memberships = getMemberships(account.get("Account ID"), N_APIkey, N_APIuser)
+    return applyMemberships(account, memberships, detailed=detailed)
+
+####################################################################
+# Update a Neon account with already fetched membership records
+####################################################################
+def applyMemberships(account: dict, memberships: list, detailed=False):
+    #Neon counts a failed renewal as a valid subscription so long as automatic renewal is enabled.
+    #WE only think a subscription is valid if the payment transaction was successful, so check payment status.
+    account["validMembership"] = False
 
     if len(memberships) > 0:
         account["membershipDates"] = {}
@@ -134,7 +147,7 @@ def appendMemberships(account: dict, N_APIkey, N_APIuser, detailed=False):
             membershipExpiration = datetime.datetime.strptime(membership["termEndDate"], '%Y-%m-%d').date()
             membershipStart = datetime.datetime.strptime(membership["termStartDate"], '%Y-%m-%d').date()
 
-            logging.debug(f'''Membership ending {membershipExpiration} status {membership["status"]} autorenewal is {membership["autoRenewal"]} ''')
+            logging.debug("Membership ending %s status %s autorenewal is %s", membershipExpiration, membership["status"], membership["autoRenewal"])
 
             if membershipExpiration >= today and membershipStart <= today:
                 currentMembershipStatus = membership["status"]
@@ -172,9 +185,10 @@ def appendMemberships(account: dict, N_APIkey, N_APIuser, detailed=False):
         if not account["validMembership"] and lastActiveMembershipExpiration == yesterday:
             if account["autoRenewal"] == True and currentMembershipStatus == "No Record":
                 account["validMembership"] = True
-                logging.info(f'''Neon {account.get("Account ID")} expired yesterday. Keeping active pending auto-renewal processing''')
+                logging.info("Neon %s expired yesterday. Keeping active pending auto-renewal processing", account.get("Account ID"))
             else:
-                logging.info(f'''Neon {account.get("Account ID")} expired yesterday. autoRenewal = {account["autoRenewal"]}, current membership status = {currentMembershipStatus}''')
+                logging.info("Neon %s expired yesterday. autoRenewal = %s, current membership status = %s",
+                             account.get("Account ID"), account["autoRenewal"], currentMembershipStatus)
 
         if (detailed):
             account["MembershipDetails"] = memberships
@@ -188,13 +202,18 @@ def appendMemberships(account: dict, N_APIkey, N_APIuser, detailed=False):
 ####################################################################
 def getMemberById(id: int, N_APIkey, N_APIuser, detailed = False):
     url = N_baseURL + f'/accounts/{id}'
-    response = requests.get(url, headers=getHeaders(N_APIkey, N_APIuser))
+
+    #The account and its memberships are separate endpoints, so fetch both at once
+    response, memberships = concurrentMap(lambda fetch: fetch(), [
+        lambda: requests.get(url, headers=getHeaders(N_APIkey, N_APIuser)),
+        lambda: getMemberships(id, N_APIkey, N_APIuser),
+    ])
 
     if (response.status_code != 200):
         raise ValueError(f'Get {url} returned status code {response.status_code}')
 
     account = response.json().get("individualAccount")
-    logging.debug(pformat(account))
+    logging.debug("%s", Pretty(account))
 
     if account.get('accountCustomFields'):
         #raise custom fields to top-level so they're easier to reach by calling functions
@@ -216,8 +235,8 @@ def getMemberById(id: int, N_APIkey, N_APIuser, detailed = False):
     account["Last Name"] = account.get("primaryContact").get("lastName")
     account["Account ID"] = account.get("accountId")
 
-    #This only contains basic account info.  We have to fetch the membership data separately
-    account = appendMemberships(account, N_APIkey, N_APIuser, detailed=detailed)
+    #The account record only contains basic account info, so merge in the membership data
+    account = applyMemberships(account, memberships, detailed=detailed)
     return account
 
 ####################################################################
@@ -234,26 +253,17 @@ def fixTypes(account: dict):
     return account
 
 ####################################################################
-# Get Neon accounts matching given criteria
+# Output fields for account searches
 ####################################################################
-def getNeonAccounts(searchFields, N_APIkey, N_APIuser, neonAccountDict = {}):
-    #Output Fields
-    #85 is DiscourseId
-    #77 is OrientationDate
-    #179 is WaiverDate
-    #88 is KeyCardID
-    #178 is OpenPathID
-    #180 is AccessSuspended
-    #274 is ShaperOrigin Date
-    #440 is Domino date
-
-    # Neon does pagination as a data parameter, so need to update data for each page
-    page = 0
-    while True:
-        data = f'''
-{{
-    "searchFields": {searchFields},
-    "outputFields": [
+#85 is DiscourseId
+#77 is OrientationDate
+#179 is WaiverDate
+#88 is KeyCardID
+#178 is OpenPathID
+#180 is AccessSuspended
+#274 is ShaperOrigin Date
+#440 is Domino date
+ACCOUNT_OUTPUT_FIELDS = '''[
         "First Name", 
         "Last Name",
         "Preferred Name",
@@ -265,7 +275,19 @@ def getNeonAccounts(searchFields, N_APIkey, N_APIuser, neonAccountDict = {}):
         "Membership Start Date",
         "Individual Type",
         85, 77, 179, 178, 88, 180, 182, 274, 440
-    ],
+    ]'''
+
+####################################################################
+# Get Neon accounts matching given criteria
+####################################################################
+def getNeonAccounts(searchFields, N_APIkey, N_APIuser, neonAccountDict = {}):
+    # Neon does pagination as a data parameter, so need to update data for each page
+    page = 0
+    while True:
+        data = f'''
+{{
+    "searchFields": {searchFields},
+    "outputFields": {ACCOUNT_OUTPUT_FIELDS},
     "pagination": {{
     "currentPage": {page},
     "pageSize": 200
@@ -278,9 +300,10 @@ def getNeonAccounts(searchFields, N_APIkey, N_APIuser, neonAccountDict = {}):
         if (response.status_code != 200):
             raise ValueError(f'Post {url} returned status code {response.status_code}')
 
-        logging.info(f'''Fetching Accounts: {response.json().get("pagination")}''')
+        results = response.json()
+        logging.info("Fetching Accounts: %s", results.get("pagination"))
         #re-shuffle the data into a format that's a little easier to work with
-        for acct in response.json()["searchResults"]:
+        for acct in results["searchResults"]:
             #don't clobber an existing local account record that may have been updated since the last Neon query
             if neonAccountDict.get(acct["Account ID"]) is None:
                 neonAccountDict[acct["Account ID"]] = fixTypes(acct)
@@ -292,6 +315,60 @@ def getNeonAccounts(searchFields, N_APIkey, N_APIuser, neonAccountDict = {}):
     return neonAccountDict
 
 
+####################################################################
+# Given many Neon account IDs, return their account search results keyed by Account ID.
+# Sorted IDs are split into ranges wherever two neighbours are more than ACCOUNT_ID_GAP apart, so sparse
+# IDs don't pull in the accounts between them. The ranges are searched concurrently.
+# IDs Neon doesn't return are left out.
+####################################################################
+ACCOUNT_ID_GAP = 50
+
+def getAccountsByIds(ids, N_APIkey, N_APIuser):
+    wanted = {str(int(id)) for id in ids}
+
+    ranges = []
+    for id in sorted(wanted, key=int):
+        if ranges and int(id) - int(ranges[-1][1]) <= ACCOUNT_ID_GAP:
+            ranges[-1][1] = id
+        else:
+            ranges.append([id, id])
+
+    def searchRange(idRange):
+        low, high = idRange
+        searchFields = f'''[
+    {{
+        "field": "Account ID",
+        "operator": "GREATER_AND_EQUAL",
+        "value": "{low}"
+    }},
+    {{
+        "field": "Account ID",
+        "operator": "LESS_AND_EQUAL",
+        "value": "{high}"
+    }}
+]'''
+        return getNeonAccounts(searchFields, N_APIkey, N_APIuser, neonAccountDict = {})
+
+    accounts = {}
+    for neonAccountDict in concurrentMap(searchRange, ranges):
+        accounts.update((id, acct) for id, acct in neonAccountDict.items() if str(id) in wanted)
+    return accounts
+
+####################################################################
+# Given many Neon account IDs, return accounts including membership info, keyed by Account ID.
+# Accounts have the search result fields (as in getRealAccounts) rather than the full /accounts/{id}
+# record. Memberships are fetched concurrently.
+####################################################################
+def getMembersByIds(ids, N_APIkey, N_APIuser, detailed = False):
+    accounts = list(getAccountsByIds(ids, N_APIkey, N_APIuser).values())
+    for acct in accounts:
+        #copy primary contact info to match getMemberById
+        acct["fullName"] = f'''{acct.get("First Name")} {acct.get("Last Name")}'''
+
+    accounts = concurrentMap(lambda acct: appendMemberships(acct, N_APIkey, N_APIuser, detailed=detailed), accounts)
+
+    return {acct["Account ID"]: acct for acct in accounts}
+
 ####################################################################
 # Get all accounts in neon with OP IDs but no memberships 
 ####################################################################
@@ -383,7 +460,7 @@ def getRealAccounts(N_APIkey, N_APIuser):
         if counter > loops_per_ping:
             counter = 0
             progress += progress_per_ping
-            logging.info(f'Updating Membership Info {int(progress)}% complete')
+            logging.info("Updating Membership Info %d%% complete", progress)
 
         #copy primary contact info to match search results format
         neonAccountDict[account]["fullName"] = f'''{neonAccountDict[account].get("First Name")} {neonAccountDict[account].get("Last Name")}'''
@@ -407,7 +484,7 @@ def getRealAccounts(N_APIkey, N_APIuser):
         if neonAccountDict[account].get("validMembership"):
             activeSubscriptions += 1
         
-    logging.info(f"In {accountCount} Neon accounts we found {activeSubscriptions} active subscriptions")
+    logging.info("In %s Neon accounts we found %s active subscriptions", accountCount, activeSubscriptions)
 
     return neonAccountDict
 
@@ -456,13 +533,14 @@ def accountHasDominoAccess(account: dict):
 ####################################################################
 def subscriberHasFacilityAccess(account: dict):
     if account.get("validMembership") == True and not account.get("AccessSuspended") and account.get("WaiverDate") and account.get("FacilityTourDate"):
-        logging.debug(f'''Account {account.get("Account ID")} is a subscriber with facility access''')
+        logging.debug("Account %s is a subscriber with facility access", account.get("Account ID"))
         return True
-    logging.debug(f'''Subscriber Account {account.get("Account ID")} DOES NOT have access: 
-ValidMembership({account.get("validMembership")}),
-WaiverDate({account.get("WaiverDate")})
-FacilityTourDate({account.get("FacilityTourDate")})
-AccountSuspended({account.get("AccessSuspended")})''')
+    logging.debug('''Subscriber Account %s DOES NOT have access: 
+ValidMembership(%s),
+WaiverDate(%s)
+FacilityTourDate(%s)
+AccountSuspended(%s)''', account.get("Account ID"), account.get("validMembership"), account.get("WaiverDate"),
+                  account.get("FacilityTourDate"), account.get("AccessSuspended"))
     return False
 
 ####################################################################
@@ -475,7 +553,7 @@ def accountHasFacilityAccess(account: dict):
     # CoWorking is a moderately permissive group - they can ride out subscription lapses, but not other membership requirements
     if (accountIsType(account, COWORKING_TYPE)):
         if account.get("WaiverDate") and account.get("FacilityTourDate") and not account.get("AccessSuspended"):
-            logging.warning(f'''Cowrking subscriber {account.get("fullName")} has access despite a lapsed membership.''')
+            logging.warning("Cowrking subscriber %s has access despite a lapsed membership.", account.get("fullName"))
             return True
 
     return False
@@ -7,11 +7,6 @@ import openPathUtil
 import logging
 import sys
 
-logging.basicConfig(
-         format='%(asctime)s %(levelname)-8s %(message)s',
-         level=logging.INFO,
-         datefmt='%Y-%m-%d %H:%M:%S')
-
 def openPathUpdateSingle(neonID, N_APIkey, N_APIuser, O_APIkey, O_APIuser, G_user, G_pass):
     account = neonUtil.getMemberById(neonID, N_APIkey, N_APIuser)
     success = False
@@ -27,17 +22,22 @@ def openPathUpdateSingle(neonID, N_APIkey, N_APIuser, O_APIkey, O_APIuser, G_use
         success = True
     elif account.get("validMembership"):
         if not account.get("WaiverDate"):
-            logging.info(f'''{account.get("fullName")} ({account.get("Email 1")}) is missing the Waiver''')
+            logging.info("%s (%s) is missing the Waiver", account.get("fullName"), account.get("Email 1"))
         if not account.get("FacilityTourDate"):
-            logging.info(f'''{account.get("fullName")} ({account.get("Email 1")}) is missing the Facility Tour''')
+            logging.info("%s (%s) is missing the Facility Tour", account.get("fullName"), account.get("Email 1"))
     elif not account.get("validMembership"):
-        logging.info(f'''{account.get("fullName")} ({account.get("Email 1")}) does not have an active membership''')
+        logging.info("%s (%s) does not have an active membership", account.get("fullName"), account.get("Email 1"))
 
     return success
 
 
 #begin standalone script functionality -- update single account provided on command line
 def main():
+    logging.basicConfig(
+        format='%(asctime)s %(levelname)-8s %(message)s',
+        level=logging.INFO,
+        datefmt='%Y-%m-%d %H:%M:%S')
+
     if len(sys.argv) != 2 or not str(sys.argv[1]).isnumeric():
         print(f'''Usage: {sys.argv[0]} <integer NeonID>''')
     else:
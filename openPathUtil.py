@@ -4,7 +4,6 @@
 
 from curses import use_default_colors
 from os import openpty
-from pprint import pformat
 from base64 import b64encode
 import datetime, pytz
 import requests
@@ -17,6 +16,7 @@ from functools import lru_cache
 import neonUtil
 import AsmblyMessageFactory
 import gmailUtil
+from helpers.structuredLog import Pretty
 
 #OpenPath Group IDs
 GROUP_MANAGEMENT = 23174
@@ -80,7 +80,7 @@ def getUser(opId:int, O_APIkey, O_APIuser):
 def deactivateUser(opId:int, O_APIkey, O_APIuser):
     url = O_baseURL + f'/users/{opId}/status'
     data = '''{"status": "I"}'''
-    logging.debug(f'''PUT to {url} {pformat(data)}''')
+    logging.debug("PUT to %s %s", url, Pretty(data))
 
     response=requests.put(url, data=data, headers=getHeaders(O_APIkey, O_APIuser))
     if (response.status_code != 204):
@@ -92,7 +92,7 @@ def deactivateUser(opId:int, O_APIkey, O_APIuser):
 # USE WITH EXTREME CAUTION
 ####################################################################
 def reallyActuallyDeleteUser(opId:int, O_APIkey, O_APIuser):
-    logging.warn(f'''ACTUALLY DELETING OpenPath User {opId}! User will no longer show up in logs!''')
+    logging.warn("ACTUALLY DELETING OpenPath User %s! User will no longer show up in logs!", opId)
     url = O_baseURL + f'/users/{opId}'
     response = requests.delete(url, headers=getHeaders(O_APIkey, O_APIuser))
 
@@ -152,7 +152,7 @@ def deleteAllCredentialsForId(id:int, O_APIkey, O_APIuser):
             logging.info("Deleting credential found in stale OpenPath user")
             deleteCredential(id, credential.get("id"), O_APIkey, O_APIuser)
         else:
-            logging.warning(f'''Malformed credential in stale OpenPath user {neonAccount.get("primaryContact").get("email1")}''')
+            logging.warning("Malformed credential in stale OpenPath user %s", neonAccount.get("primaryContact").get("email1"))
 
 #################################################################################
 # Remove given openPath user from all groups
@@ -161,14 +161,14 @@ def disableAccount(neonAccount, O_APIkey, O_APIuser):
     #this should be a pretty thorough check for sane argument
     assert(int(neonAccount.get("OpenPathID")) > 0)
 
-    logging.info(f'''Disabling access for {neonAccount.get("fullName")} ({neonAccount.get("Email 1")})''')
+    logging.info("Disabling access for %s (%s)", neonAccount.get("fullName"), neonAccount.get("Email 1"))
     data = '''
     {
         "groupIds": []
     }'''
 
     url = O_baseURL + f'''/users/{neonAccount.get("OpenPathID")}/groupIds'''
-    logging.debug(f'''PUT to {url} {pformat(data)}''')
+    logging.debug("PUT to %s %s", url, Pretty(data))
     if not dryRun:
         response = requests.put(url, data=data, headers=getHeaders(O_APIkey, O_APIuser))
         if (response.status_code != 204):
@@ -235,24 +235,24 @@ def updateGroups(neonAccount, O_APIkey, O_APIuser, G_user, G_pass, openPathGroup
 
         #prevent specialty groups from being clobbered
         if not isManagedGroup(id):
-            logging.info(f'''{neonAccount.get("fullName")} ({neonAccount.get("Email 1")}) has unmanaged OpenPath Group ID {id}''')
+            logging.info("%s (%s) has unmanaged OpenPath Group ID %s", neonAccount.get("fullName"), neonAccount.get("Email 1"), id)
             neonOpGroups.append(id)
     
-    logging.debug(f'''Groups for {neonAccount.get("OpenPathID")}: Current {opGroupArray}; New: {neonOpGroups}''')
+    logging.debug("Groups for %s: Current %s; New: %s", neonAccount.get("OpenPathID"), opGroupArray, neonOpGroups)
 
     #If the OP groups for this Neon account changed, update OP
     if sorted(opGroupArray) != sorted(neonOpGroups):
         #this should be a pretty thorough check for sane argument
         assert(int(neonAccount.get("OpenPathID")) > 0)
 
-        logging.info(f'''Updating OpenPath groups for {neonAccount.get("fullName")} ({neonAccount.get("Email 1")}) {neonOpGroups}''')
+        logging.info("Updating OpenPath groups for %s (%s) %s", neonAccount.get("fullName"), neonAccount.get("Email 1"), neonOpGroups)
         data = f'''
         {{
             "groupIds": {neonOpGroups}
         }}'''
 
         url = O_baseURL + f'''/users/{neonAccount.get("OpenPathID")}/groupIds'''
-        logging.debug(f'''PUT to {url} {pformat(data)}''')
+        logging.debug("PUT to %s %s", url, Pretty(data))
         if not dryRun:
             response = requests.put(url, data=data, headers=getHeaders(O_APIkey, O_APIuser))
             if (response.status_code != 204):
@@ -275,7 +275,7 @@ def updateGroups(neonAccount, O_APIkey, O_APIuser, G_user, G_pass, openPathGroup
         if not neonUtil.accountHasFacilityAccess(neonAccount):
             ##these account types always have factility access even if their term expires.  Note the exception in the log.
             if neonUtil.accountIsType(neonAccount, neonUtil.LEADER_TYPE) or neonUtil.accountIsType(neonAccount, neonUtil.SUPER_TYPE):
-                logging.warning(f'''I'm not disabling {neonAccount.get("fullName")} ({neonAccount.get("Email 1")}) becuase they're special''')
+                logging.warning("I'm not disabling %s (%s) becuase they're special", neonAccount.get("fullName"), neonAccount.get("Email 1"))
                 #Send an email if we ever get the renewal-bounce problem figured out.
 
 
@@ -283,7 +283,7 @@ def updateGroups(neonAccount, O_APIkey, O_APIuser, G_user, G_pass, openPathGroup
 # Create OpenPath user for given Neon account if it doesn't exist
 #################################################################################
 def createUser(neonAccount, O_APIkey, O_APIuser, N_APIkey, N_APIuser):
-    logging.info(f'Adding OP account for {neonAccount.get("fullName")}')
+    logging.info("Adding OP account for %s", neonAccount.get("fullName"))
 
     data = f'''
     {{
@@ -296,11 +296,11 @@ def createUser(neonAccount, O_APIkey, O_APIuser, N_APIkey, N_APIuser):
         "hasRemoteUnlock": false
     }}'''
     url = O_baseURL + '/users'
-    logging.debug(f'''POST to {url} {pformat(data)}''')
+    logging.debug("POST to %s %s", url, Pretty(data))
     if not dryRun:
         response = requests.post(url, data=data, headers=getHeaders(O_APIkey, O_APIuser))
         if (response.status_code != 201):
-            logging.error(f'''Status {response.status_code} (expected 201) creating OpenPath User {pformat(data)} ''')
+            logging.error("Status %s (expected 201) creating OpenPath User %s ", response.status_code, Pretty(data))
             return neonAccount
 
         #openPath times are in UTC
@@ -308,7 +308,7 @@ def createUser(neonAccount, O_APIkey, O_APIuser, N_APIkey, N_APIuser):
         createdTime = datetime.datetime.strptime(opUser.get("createdAt"), "%Y-%m-%dT%H:%M:%S.000Z").replace(tzinfo=datetime.timezone.utc)
         userAge = datetime.datetime.now(pytz.timezone("America/Chicago")) - createdTime
         if userAge.seconds > 300:
-            logging.warning(f'''Found an existing OpenPath user created at {opUser.get("createdAt")} for {neonAccount.get("Email 1")} when updating Neon account {neonAccount.get("Account ID")}''')
+            logging.warning("Found an existing OpenPath user created at %s for %s when updating Neon account %s", opUser.get("createdAt"), neonAccount.get("Email 1"), neonAccount.get("Account ID"))
             #This user was created more than 5mins ago, but we didn't fail - that means an OP user with this email address was deleted in the past.
             #OP archives "deleted" users, and doesn't update their ID fields when re-creating them.  We'll have to do a patch.
             #TODO make sure no other Neon record has this OpenPathID associated
@@ -319,7 +319,7 @@ def createUser(neonAccount, O_APIkey, O_APIuser, N_APIkey, N_APIuser):
             #do a user patch to update the name and metadata
             #...confirmed that updating FirstName and LastName fixes initials and FullName too
             url = O_baseURL + f'''/users/{opUser.get("id")}'''
-            logging.debug(f'''PATCH to {url} {pformat(data)}''')
+            logging.debug("PATCH to %s %s", url, Pretty(data))
             response=requests.patch(url, data=data, headers=getHeaders(O_APIkey, O_APIuser))
             if (response.status_code != 200):
                 raise ValueError(f'Patch {url} returned status code {response.status_code}; expected 200')
@@ -345,7 +345,7 @@ def createMobileCredential(neonAccount, O_APIkey, O_APIuser):
     #this should be a pretty thorough check for sane argument
     assert(int(neonAccount.get("OpenPathID")) > 0)
 
-    logging.info(f'Creating OP Mobile Credential for {neonAccount.get("fullName")} (OP ID {neonAccount.get("OpenPathID")})')
+    logging.info("Creating OP Mobile Credential for %s (OP ID %s)", neonAccount.get("fullName"), neonAccount.get("OpenPathID"))
 
     data = '''
     {
@@ -354,17 +354,17 @@ def createMobileCredential(neonAccount, O_APIkey, O_APIuser):
     }
     '''
     url = O_baseURL + f'/users/{neonAccount.get("OpenPathID")}/credentials'
-    logging.debug(f'''POST to {url} {pformat(data)}''')
+    logging.debug("POST to %s %s", url, Pretty(data))
     if not dryRun:
         response = requests.post(url, data=data, headers=getHeaders(O_APIkey, O_APIuser))
         if (response.status_code != 201):
             raise ValueError(f'Post {url} returned status code {response.status_code}; expected 201')
 
         if response.json().get("data") and response.json().get("data").get("id"):
-            logging.info(f'Activating OP Mobile Credential for {neonAccount.get("fullName")} (OP ID {neonAccount.get("OpenPathID")})')
+            logging.info("Activating OP Mobile Credential for %s (OP ID %s)", neonAccount.get("fullName"), neonAccount.get("OpenPathID"))
             httpVerb = 'POST'
             url = O_baseURL + f'/users/{neonAccount.get("OpenPathID")}/credentials/{response.json().get("data").get("id")}/setupMobile'
-            logging.debug(f'''POST to {url}''')
+            logging.debug("POST to %s", url)
             response = requests.post(url, headers=getHeaders(O_APIkey, O_APIuser))
             if (response.status_code != 204):
                 raise ValueError(f'Post {url} returned status code {response.status_code}; expected 204')
@@ -377,7 +377,7 @@ def createMobileCredential(neonAccount, O_APIkey, O_APIuser):
 # Given a single Neon ID, perform necessary OpenPath updates
 #################################################################################
 def updateOpenPathByNeonId(neonId, O_APIkey, O_APIuser, N_APIkey, N_APIuser):
-    logging.info(f"Updating Neon ID {neonId}")
+    logging.info("Updating Neon ID %s", neonId)
     account = neonUtil.getMemberById(neonId, N_APIkey, N_APIuser)
     #logging.debug(account)
     if account.get("OpenPathID"):
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+from unittest.mock import patch, MagicMock
+from .. import asmblyWorkspaceIntegration as awi
+
+ACCOUNTS = {
+    "1": {"Account ID": "1", "First Name": "Ada", "Last Name": "Lovelace"},
+    "2": {"Account ID": "2", "First Name": "Alan", "Last Name": "Turing"},
+    "3": {"Account ID": "3", "First Name": "Grace", "Last Name": "Hopper"},
+}
+
+def searchEmail(email, N_APIkey, N_APIuser):
+    return {"grace@example.com": [ACCOUNTS["3"]],
+            "shared@example.com": [ACCOUNTS["1"], ACCOUNTS["2"]]}.get(email, [])
+
+def registrants(count):
+    attendee = {"registrationStatus": "SUCCEEDED"}
+    return {"eventRegistrations": [{"tickets": [{"attendees": [attendee]}]} for _ in range(count)]}
+
+def test_parse_attendees():
+    assert awi.parseAttendees("1, 2;grace@example.com\n\n 3 ") == ["1", "2", "grace@example.com", "3"]
+    assert awi.parseAttendees("") == []
+
+def test_resolve_attendees():
+    entries = ["1", "Grace@Example.com", "shared@example.com", "nobody@example.com", "9", "3", "bob"]
+    with patch.object(awi.neonUtil, "getAccountsByIds",
+                      side_effect=lambda ids, *args: {id: ACCOUNTS[id] for id in ids if id in ACCOUNTS}) as byIds, \
+         patch.object(awi, "getNeonAcctByEmail", side_effect=searchEmail):
+        attendees = awi.resolveAttendees(entries, "key")
+
+    assert byIds.call_count == 1
+    assert [(attendee["account"] or {}).get("Account ID") for attendee in attendees] == \
+        ["1", "3", None, None, None, None, None]
+    assert [attendee["result"] for attendee in attendees] == \
+        [None, None, "Multiple Neon accounts found", "No Neon account found", "No Neon account found", "Duplicate",
+         "Not an email or Neon ID"]
+
+def test_bulk_register_checks_capacity_once():
+    attendees = [{"entry": id, "account": ACCOUNTS[id], "result": None} for id in ["1", "2", "3"]]
+    attendees.append({"entry": "bob", "account": None, "result": "Not an email or Neon ID"})
+
+    responses = {"1": MagicMock(status_code=200), "2": MagicMock(status_code=400)}
+    with patch.object(awi.neon, "getEvent", return_value={"maximumAttendees": 5}) as getEvent, \
+         patch.object(awi.neon, "getEventRegistrants", return_value=registrants(3)), \
+         patch.object(awi.neon, "postEventRegistration",
+                      side_effect=lambda accountId, *args, **kwargs: responses[accountId]) as register:
+        awi.bulkRegister("10", attendees, "key")
+
+    assert getEvent.call_count == 1
+    assert register.call_count == 2
+    assert [attendee["result"] for attendee in attendees] == \
+        ["Registered", "Registration failed (400)", "Not registered, class is full", "Not an email or Neon ID"]
+
+@pytest.mark.parametrize("maximumAttendees", [None, 0])
+def test_bulk_register_without_capacity_limit(maximumAttendees):
+    attendees = [{"entry": id, "account": ACCOUNTS[id], "result": None} for id in ["1", "2", "3"]]
+
+    with patch.object(awi.neon, "getEvent", return_value={"maximumAttendees": maximumAttendees}), \
+         patch.object(awi.neon, "getEventRegistrants", return_value=registrants(3)), \
+         patch.object(awi.neon, "postEventRegistration", return_value=MagicMock(status_code=200)) as register:
+        awi.bulkRegister("10", attendees, "key")
+
+    assert register.call_count == 3
+    assert [attendee["result"] for attendee in attendees] == ["Registered"] * 3
+
+def test_email_search_payload_is_valid_json():
+    email = 'o"brien\\@example.com'
+    with patch.object(awi.neon, "postAccountSearch", return_value={"searchResults": []}) as postAccountSearch:
+        awi.getNeonAcctByEmail(email, N_APIkey="key", N_APIuser="user")
+
+    searchFields, outputFields = postAccountSearch.call_args.args[:2]
+    assert json.loads(searchFields)[0]["value"] == email
+    assert json.loads(outputFields)[-2:] == [182, 179]
@@ -1,5 +1,165 @@
+import copy
+import datetime
+import json
+from unittest.mock import patch, MagicMock
+
 import pytest
-from unittest.mock import patch
+from fastapi.testclient import TestClient
+
 from .. import asmblyWorkspaceIntegration as awi
+from .test_concurrency import GEVENT
+
+TODAY = datetime.date.today()
+
+def day(offset):
+    return (TODAY + datetime.timedelta(days=offset)).isoformat()
+
+EVENTS = {
+    "10": {"id": "10", "name": "Woodshop Safety", "eventDates": {"startDate": day(7), "endDate": day(7)}},
+    "11": {"id": "11", "name": "Laser Cutter Basics", "eventDates": {"startDate": day(2), "endDate": day(2)}},
+    "12": {"id": "12", "name": "Intro to Welding", "eventDates": {"startDate": day(-400), "endDate": day(-400)}},
+    "13": {"id": "13", "name": "CNC Router", "eventDates": {"startDate": day(3), "endDate": day(3)}},
+}
+
+def registration(regId, eventId, status="SUCCEEDED"):
+    return {"id": regId, "eventId": eventId, "tickets": [{"attendees": [{"registrationStatus": status}]}]}
+
+REGISTRATIONS = [
+    registration("1", "10"),
+    registration("2", "11"),
+    registration("3", "12"),
+    registration("4", "13", status="CANCELED"),
+]
+
+@pytest.fixture(autouse=True)
+def emptyEventCache():
+    awi.eventDetailCache.clear()
+    yield
+    awi.eventDetailCache.clear()
+
+def searchEvents(eventIds, *args):
+    return {eventId: EVENTS[eventId] for eventId in eventIds if eventId != "12"}
+
+def test_upcoming_classes_are_succeeded_future_registrations_by_date():
+    with patch.object(awi.neon, "getEventsByIds", side_effect=searchEvents) as getEventsByIds, \
+         patch.object(awi.neon, "getEvent", side_effect=lambda eventId, **kwargs: EVENTS[eventId]) as getEvent:
+        upcomingClasses = awi.getUpcomingClasses(REGISTRATIONS, "key")
+
+    assert [upcomingClass["regID"] for upcomingClass in upcomingClasses] == ["2", "1"]
+    assert upcomingClasses[0] == {"regID": "2", "eventID": "11", "eventName": "Laser Cutter Basics", "startDate": day(2)}
+    # Canceled registrations never need their event looked up
+    assert sorted(getEventsByIds.call_args.args[0]) == ["10", "11", "12"]
+    # Events the batch search misses are fetched individually
+    assert [call.args[0] for call in getEvent.call_args_list] == ["12"]
+
+def test_event_details_are_cached_between_lookups():
+    with patch.object(awi.neon, "getEventsByIds", side_effect=searchEvents) as getEventsByIds, \
+         patch.object(awi.neon, "getEvent", side_effect=lambda eventId, **kwargs: EVENTS[eventId]) as getEvent:
+        awi.getUpcomingClasses(REGISTRATIONS, "key")
+        awi.getUpcomingClasses(REGISTRATIONS, "key")
+
+    assert getEventsByIds.call_count == 1
+    assert getEvent.call_count == 1
+
+def test_past_events_are_cached_longer():
+    now = 1000.0
+    assert awi.eventDetailTtu("12", EVENTS["12"], now) == now + awi.EVENT_DETAIL_PAST_TTL
+    assert awi.eventDetailTtu("10", EVENTS["10"], now) == now + awi.EVENT_DETAIL_TTL
+
+PAID_REGISTRATION = {"id": "7", "eventId": "10", "payments": [{"id": "99"}],
+                     "tickets": [{"attendees": [{"attendeeId": "55", "registrationStatus": "SUCCEEDED"}]}]}
+
+@pytest.fixture
+def cachedRegistrations():
+    awi.registrationCache.clear()
+    with patch.object(awi.neon, "iterAccountEventRegistrations", return_value=iter([PAID_REGISTRATION])) as fetch:
+        assert awi.getRegistrations("123", "key") == [PAID_REGISTRATION]
+        assert awi.getRegistrations(123, "key") == [PAID_REGISTRATION]
+    assert fetch.call_count == 1
+    yield
+    awi.registrationCache.clear()
+
+def test_refund_uses_cached_payment_id(cachedRegistrations):
+    registration = awi.getCachedRegistration(123, "7")
+    assert registration == PAID_REGISTRATION
+    assert awi.getCachedRegistration(123, "8") is None
+
+    with patch.object(awi.neon, "getAccountSingleEventRegistration") as fetch, \
+         patch.object(awi.neon, "apiCall") as apiCall:
+        awi.neon.refundClass("10", "123", "key", "user", registration=registration)
+
+    fetch.assert_not_called()
+    assert apiCall.call_args.args[:2] == ("POST", awi.neon.N_baseURL + "/payments/99/refund")
+
+def test_refund_without_cached_registration_fetches_it():
+    with patch.object(awi.neon, "getAccountSingleEventRegistration",
+                      return_value={"eventRegistrations": [PAID_REGISTRATION]}) as fetch, \
+         patch.object(awi.neon, "apiCall") as apiCall:
+        awi.neon.refundClass("10", "123", "key", "user")
+
+    fetch.assert_called_once()
+    assert apiCall.call_args.args[1].endswith("/payments/99/refund")
+
+def test_cancel_uses_cached_attendee_and_invalidates(cachedRegistrations):
+    with patch.object(awi.neon, "getAccountSingleEventRegistration") as fetch, \
+         patch.object(awi.neon, "apiCall") as apiCall:
+        awi.neon.cancelClass("7", "10", "123", "key", "user", registration=awi.getCachedRegistration("123", "7"))
+
+    fetch.assert_not_called()
+    assert json.loads(apiCall.call_args.args[2])["tickets"][0]["attendees"][0]["attendeeId"] == "55"
+
+    awi.invalidateRegistrations(123)
+    assert awi.getCachedRegistration("123", "7") is None
+
+@pytest.mark.parametrize("cancelStatus, refundStatus, message", [
+    (200, 200, "Successfully cancelled and refunded"),
+    (200, 500, "refund failed with status code 500"),
+    (500, 200, "Cancellation failed with status code 500"),
+])
+def test_refund_confirm_keeps_seats_in_step_with_neon(monkeypatch, cancelStatus, refundStatus, message):
+    monkeypatch.setenv("static_keys", '{"N_APIuser": "test"}')
+    awi.loadStaticKeys()
+    monkeypatch.setattr(awi, "BASE_URL", "https://addon.example.com")
+    gevent = copy.deepcopy(GEVENT)
+    gevent["commonEventObject"]["parameters"] = {"regID": "1", "eventID": "10", "neonID": "1234"}
+
+    # Neon's side: three succeeded registrations for event 10
+    neonStatus = {"1": "SUCCEEDED", "2": "SUCCEEDED", "3": "SUCCEEDED"}
+
+    def cancelClass(regId, *args, **kwargs):
+        if cancelStatus == 200:
+            neonStatus[regId] = "CANCELED"
+        return MagicMock(status_code=cancelStatus)
+
+    catalog = awi.eventCatalog.EventCatalog()
+    catalog.availability = {"10": {"capacity": 6, "registered": 3, "updatedAt": 0}}
+    monkeypatch.setattr(awi.eventCatalog, "catalog", catalog)
+
+    with patch.object(awi, "verifyGoogleToken", return_value=True), \
+         patch.object(awi, "decodeUser", return_value="1"), \
+         patch.object(awi, "getUserKeys", return_value={"N_APIkey": "key"}), \
+         patch.object(awi.neon, "cancelClass", side_effect=cancelClass), \
+         patch.object(awi.neon, "refundClass", return_value=MagicMock(status_code=refundStatus)) as refund:
+        response = TestClient(awi.app).post("/classRefundConfirm", json=gevent)
+
+    assert response.status_code == 200
+    assert message in response.text
+    assert catalog.getAvailability("10")["registered"] == list(neonStatus.values()).count("SUCCEEDED")
+    # The payment is only refunded once the registration is canceled
+    assert refund.called == (cancelStatus == 200)
+
+@pytest.mark.parametrize("path", ["/getAcctRegClassCancel", "/getAcctRegClassRefund"])
+def test_event_lookup_failure_shows_an_error_card(monkeypatch, path):
+    monkeypatch.setenv("static_keys", '{"N_APIuser": "test"}')
+    awi.loadStaticKeys()
 
+    with patch.object(awi, "verifyGoogleToken", return_value=True), \
+         patch.object(awi, "decodeUser", return_value="1"), \
+         patch.object(awi, "getUserKeys", return_value={"N_APIkey": "key"}), \
+         patch.object(awi, "getMessageContext", return_value=("jane@example.com", [{"Account ID": "1234"}])), \
+         patch.object(awi, "getRegistrations", return_value=REGISTRATIONS), \
+         patch.object(awi.neon, "getEventsByIds", side_effect=TimeoutError("Neon timed out")):
+        response = TestClient(awi.app).post(path, json=GEVENT)
 
+    assert response.status_code == 200
+    assert "Unable to find classes" in response.text
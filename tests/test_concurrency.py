@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from unittest.mock import patch, MagicMock
+
+from .. import asmblyWorkspaceIntegration as awi
+
+DELAY = 0.2
+REQUESTS = 8
+
+GEVENT = {
+    "commonEventObject": {
+        "userLocale": "en",
+        "hostApp": "GMAIL",
+        "platform": "WEB",
+        "timeZone": {"id": "America/Chicago", "offset": -18000000},
+        "parameters": {"eventID": "1", "eventName": "Woodshop Safety"},
+    },
+    "authorizationEventObject": {
+        "userOAuthToken": "token",
+        "systemIdToken": "token",
+        "userIdToken": "token",
+    },
+    "gmail": {"messageId": "message"},
+}
+
+ACCOUNT = {"First Name": "Jane", "Last Name": "Doe", "Account ID": "1234"}
+
+
+@pytest.fixture(autouse=True)
+def blockingBackends(monkeypatch):
+    """Stand in for Google and Neon with calls that block the calling thread."""
+    monkeypatch.setenv("static_keys", '{"N_APIuser": "test"}')
+
+    def slowContext(*args, **kwargs):
+        time.sleep(DELAY)
+        return ("jane@example.com", [ACCOUNT])
+
+    def slowRegistration(*args, **kwargs):
+        time.sleep(DELAY)
+        return MagicMock(status_code=200)
+
+    with patch.object(awi, "verifyGoogleToken", return_value=True), \
+         patch.object(awi, "decodeUser", return_value="1"), \
+         patch.object(awi, "getUserKeys", return_value={"N_APIkey": "key"}), \
+         patch.object(awi, "getMessageContext", side_effect=slowContext), \
+         patch.object(awi.neon, "postEventRegistration", side_effect=slowRegistration):
+        yield
+
+
+async def timeConcurrentRequests(path):
+    async with httpx.AsyncClient(app=awi.app, base_url="http://test") as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[client.post(path, json=GEVENT) for _ in range(REQUESTS)])
+        elapsed = time.perf_counter() - start
+
+    assert all(response.status_code == 200 for response in responses)
+    return elapsed
+
+
+@pytest.mark.parametrize("path, callsPerRequest", [("/getNeonId", 1), ("/classReg", 2)])
+def test_blocking_endpoints_run_concurrently(path, callsPerRequest):
+    elapsed = asyncio.run(timeConcurrentRequests(path))
+
+    # Serialized on the event loop this would take REQUESTS * callsPerRequest * DELAY
+    assert elapsed < REQUESTS * callsPerRequest * DELAY / 2
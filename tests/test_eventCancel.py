@@ -0,0 +1,121 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from .. import asmblyWorkspaceIntegration as awi
+
+def registration(regId, status="SUCCEEDED", paid=True):
+    return {"id": regId, "registrantAccountId": f"acct{regId}", "payments": [{"id": f"pay{regId}"}] if paid else [],
+            "tickets": [{"attendees": [{"firstName": "Person", "lastName": regId, "registrationStatus": status}]}]}
+
+ROSTER = {"eventRegistrations": [registration("1"), registration("2"), registration("3", status="CANCELED"),
+                                 registration("4", paid=False)]}
+
+OK = MagicMock(status_code=200)
+
+def newJob(refund):
+    return {"eventId": "10", "items": {}, "status": "running", "refund": refund, "error": None}
+
+def test_cancel_and_refund_every_active_registration():
+    job = newJob(refund=True)
+    with patch.object(awi.neon, "getEventRegistrants", return_value=ROSTER) as getRoster, \
+         patch.object(awi.neon, "refundClass", return_value=OK) as refund, \
+         patch.object(awi.neon, "cancelClass", return_value=OK) as cancel:
+        awi.runEventJob(job, "key")
+
+    getRoster.assert_called_once()
+    assert sorted(call.kwargs["registration"]["id"] for call in refund.call_args_list) == ["1", "2"]
+    assert sorted(call.args[0] for call in cancel.call_args_list) == ["1", "2", "4"]
+    assert job["status"] == "done"
+    assert {regId: item["result"] for regId, item in job["items"].items()} == \
+        {"1": "Canceled and refunded", "2": "Canceled and refunded", "3": "Already canceled", "4": "Canceled"}
+
+def test_resume_only_retries_what_failed():
+    job = newJob(refund=True)
+    cancelResults = {"1": OK, "2": MagicMock(status_code=500), "4": OK}
+    with patch.object(awi.neon, "getEventRegistrants", return_value=ROSTER), \
+         patch.object(awi.neon, "refundClass", return_value=OK) as refund, \
+         patch.object(awi.neon, "cancelClass", side_effect=lambda regId, *args, **kwargs: cancelResults[regId]):
+        awi.runEventJob(job, "key")
+
+    # A registration that couldn't be canceled isn't refunded either
+    assert job["items"]["2"]["result"] == "Failed: cancel returned status code 500"
+    assert not job["items"]["2"]["refunded"]
+    assert sorted(call.kwargs["registration"]["id"] for call in refund.call_args_list) == ["1"]
+
+    # Neon now reports the canceled registrations as such; the job still knows what it did
+    resumedRoster = {"eventRegistrations": [registration("1", status="CANCELED"), registration("2"),
+                                            registration("3", status="CANCELED"),
+                                            registration("4", status="CANCELED", paid=False)]}
+    job["status"] = "running"
+    with patch.object(awi.neon, "getEventRegistrants", return_value=resumedRoster), \
+         patch.object(awi.neon, "refundClass", return_value=OK) as refund, \
+         patch.object(awi.neon, "cancelClass", return_value=OK) as cancel:
+        awi.runEventJob(job, "key")
+
+    assert [call.args[0] for call in cancel.call_args_list] == ["2"]
+    assert [call.kwargs["registration"]["id"] for call in refund.call_args_list] == ["2"]
+    assert job["items"]["2"]["result"] == "Canceled and refunded"
+
+def test_failed_refund_still_cancels_and_is_retried_alone():
+    job = newJob(refund=True)
+    refundResults = {"1": OK, "2": MagicMock(status_code=502)}
+    with patch.object(awi.neon, "getEventRegistrants", return_value=ROSTER), \
+         patch.object(awi.neon, "refundClass",
+                      side_effect=lambda *args, registration, **kwargs: refundResults[registration["id"]]), \
+         patch.object(awi.neon, "cancelClass", return_value=OK), \
+         patch.object(awi, "recordRegistrationChange") as recordRegistrationChange:
+        awi.runEventJob(job, "key")
+
+    assert job["items"]["2"]["canceled"]
+    assert job["items"]["2"]["result"] == "Canceled; refund failed: refund returned status code 502"
+    assert recordRegistrationChange.call_count == 3
+
+    job["status"] = "running"
+    with patch.object(awi.neon, "getEventRegistrants", return_value=ROSTER), \
+         patch.object(awi.neon, "refundClass", return_value=OK) as refund, \
+         patch.object(awi.neon, "cancelClass", return_value=OK) as cancel:
+        awi.runEventJob(job, "key")
+
+    cancel.assert_not_called()
+    assert [call.kwargs["registration"]["id"] for call in refund.call_args_list] == ["2"]
+    assert job["items"]["2"]["result"] == "Canceled and refunded"
+
+def test_running_job_is_not_started_twice():
+    awi.eventJobs.clear()
+    with patch.object(awi.threading, "Thread") as thread:
+        first = awi.startEventJob("10", False, "key")
+        second = awi.startEventJob("10", True, "key")
+
+    assert first is second
+    assert thread.call_count == 1
+    assert second["refund"] is False
+    awi.eventJobs.clear()
+
+def test_finished_jobs_expire(monkeypatch):
+    monkeypatch.setattr(awi, "EVENT_JOB_TTL", 60)
+    now = awi.time.monotonic()
+    awi.eventJobs.clear()
+    awi.eventJobs.update({"old": dict(newJob(False), status="done", finished=now - 120),
+                          "recent": dict(newJob(False), status="done", finished=now),
+                          "running": newJob(False)})
+
+    with awi.eventJobsLock:
+        awi.pruneEventJobs()
+
+    assert sorted(awi.eventJobs) == ["recent", "running"]
+    awi.eventJobs.clear()
+
+def test_status_card_is_built_from_a_snapshot(monkeypatch):
+    monkeypatch.setattr(awi, "BASE_URL", "https://addon.example.com")
+    job = newJob(refund=False)
+    job["items"] = {"1": {"name": "Person 1", "active": True, "failed": False, "result": "Pending"}}
+
+    def addItem(*args, **kwargs):
+        # A worker publishing items while the card is built must not affect it
+        job["items"]["2"] = {"name": "Person 2", "active": True, "failed": False, "result": "Pending"}
+        return realParagraph(*args, **kwargs)
+
+    realParagraph = awi.CardService.TextParagraph
+    with patch.object(awi.CardService, "TextParagraph", side_effect=addItem) as paragraph:
+        awi.createEventJobCard(job)
+
+    assert paragraph.call_args.kwargs["text"] == "In progress: 0 of 1 registrations processed."
@@ -0,0 +1,103 @@
+import datetime
+import pytest
+from unittest.mock import patch
+from ..helpers import eventCatalog
+
+TODAY = datetime.date.today()
+
+def day(offset):
+    return (TODAY + datetime.timedelta(days=offset)).isoformat()
+
+EVENTS = [
+    {"Event ID": "1", "Event Name": "Woodshop Safety", "Event Start Date": day(1), "Event End Date": day(1)},
+    {"Event ID": "2", "Event Name": "Intro to Woodturning", "Event Start Date": day(5), "Event End Date": day(5)},
+    {"Event ID": "3", "Event Name": "Laser Cutter Basics", "Event Start Date": day(10), "Event End Date": day(10)},
+    {"Event ID": "4", "Event Name": "Plywood Shop Night", "Event Start Date": day(20), "Event End Date": day(21)},
+]
+
+def searchPages(searchFields, outputFields, key, user, page=0):
+    return {"pagination": {"totalPages": 2}, "searchResults": EVENTS[page * 2:page * 2 + 2]}
+
+@pytest.fixture
+def catalog():
+    catalog = eventCatalog.EventCatalog(refreshInterval=300, maxAge=900)
+    with patch.object(eventCatalog.neon, "postEventSearch", side_effect=searchPages) as postEventSearch:
+        catalog.refresh("key", "user")
+    assert postEventSearch.call_count == 2
+    return catalog
+
+def ids(results):
+    return sorted(result["Event ID"] for result in results)
+
+def test_empty_catalog_cannot_answer():
+    catalog = eventCatalog.EventCatalog()
+    assert catalog.needsRefresh()
+    assert catalog.search("Woodshop", day(0)) is None
+
+def test_matches_neon_contain_semantics(catalog):
+    assert ids(catalog.search("wood", day(0))) == ["1", "2", "4"]
+    assert ids(catalog.search("Shop", day(0))) == ["1", "4"]
+    assert ids(catalog.search("wood shop", day(0))) == ["4"]
+    assert ids(catalog.search("woodshop night", day(0))) == []
+    assert ids(catalog.search("Woodshop Saf", day(0))) == ["1"]
+    assert ids(catalog.search("", day(0))) == ["1", "2", "3", "4"]
+
+def test_date_filters(catalog):
+    assert ids(catalog.search("wood", day(2))) == ["2", "4"]
+    assert ids(catalog.search("wood", day(0), day(20))) == ["1", "2"]
+
+def test_dates_before_catalog_go_to_neon(catalog):
+    assert catalog.search("wood", day(-1)) is None
+
+def test_stale_catalog_cannot_answer(catalog):
+    catalog.refreshedAt -= 1000
+    assert catalog.needsRefresh()
+    assert catalog.search("wood", day(0)) is None
+
+def test_suggests_names_by_word_prefix(catalog):
+    assert catalog.suggestNames("wood") == ["Woodshop Safety", "Intro to Woodturning"]
+    assert catalog.suggestNames("Sh") == ["Plywood Shop Night"]
+    assert catalog.suggestNames("turning") == []
+    assert catalog.suggestNames("  ") == []
+    assert catalog.suggestNames("wood", limit=1) == ["Woodshop Safety"]
+
+def test_availability_is_seeded_adjusted_and_reconciled():
+    rows = [dict(event, **{"Event Capacity": "6", "Registrants": "5"}) for event in EVENTS]
+    catalog = eventCatalog.EventCatalog()
+    neonSearch = lambda *args, page=0: {"pagination": {"totalPages": 1}, "searchResults": rows}
+    with patch.object(eventCatalog.neon, "postEventSearch", side_effect=neonSearch):
+        catalog.refresh("key", "user")
+
+        assert catalog.getAvailability("1")["registered"] == 5
+        catalog.adjustRegistered("1", 1)
+        catalog.adjustRegistered("2", -1)
+        catalog.adjustRegistered("unknown", 1)
+        assert catalog.getAvailability("unknown") is None
+
+        results = {result["Event ID"]: result for result in catalog.search("", day(0))}
+        assert results["1"]["Registrants"] == "6"
+        assert results["2"]["Registrants"] == "4"
+
+        # A later refresh takes Neon's counts again
+        for availability in catalog.availability.values():
+            availability["updatedAt"] -= 60
+        catalog.refresh("key", "user")
+
+    assert catalog.getAvailability("1") == {"capacity": 6, "registered": 5,
+                                            "updatedAt": catalog.getAvailability("1")["updatedAt"]}
+
+def test_reconcile_refreshes_with_the_given_key_when_due(catalog):
+    with patch.object(catalog, "refreshInBackground") as refreshInBackground:
+        catalog.reconcile("serviceKey", "user")
+        refreshInBackground.assert_not_called()
+
+        catalog.refreshedAt -= 600
+        catalog.reconcile("serviceKey", "user")
+    refreshInBackground.assert_called_once_with("serviceKey", "user")
+
+def test_refresh_does_not_keep_the_callers_key():
+    catalog = eventCatalog.EventCatalog()
+    with patch.object(eventCatalog.threading, "Thread"):
+        catalog.refreshInBackground("staffKey", "user")
+
+    assert "staffKey" not in vars(catalog).values()
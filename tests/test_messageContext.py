@@ -0,0 +1,33 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from .. import asmblyWorkspaceIntegration as awi
+
+GEVENT = SimpleNamespace(gmail=SimpleNamespace(messageId="message"))
+
+@pytest.fixture(autouse=True)
+def emptyCache():
+    awi.messageContextCache.clear()
+    yield
+    awi.messageContextCache.clear()
+
+def test_context_is_cached_per_message():
+    with patch.object(awi, "getFromGmailEmail", return_value="jane@example.com") as getFromGmailEmail, \
+         patch.object(awi, "getNeonAcctByEmail", return_value=[{"Account ID": "1"}]) as getNeonAcctByEmail:
+        first = awi.getMessageContext(GEVENT, None, "user", "key")
+        second = awi.getMessageContext(GEVENT, None, "user", "key")
+
+    assert first == second == ("jane@example.com", [{"Account ID": "1"}])
+    getFromGmailEmail.assert_called_once()
+    getNeonAcctByEmail.assert_called_once()
+
+def test_fresh_context_searches_neon_again():
+    accounts = [[{"Account ID": "1", "WaiverDate": None}], [{"Account ID": "1", "WaiverDate": "2030-01-01"}]]
+    with patch.object(awi, "getFromGmailEmail", return_value="jane@example.com") as getFromGmailEmail, \
+         patch.object(awi, "getNeonAcctByEmail", side_effect=accounts):
+        awi.getMessageContext(GEVENT, None, "user", "key")
+        _, searchResult = awi.getMessageContext(GEVENT, None, "user", "key", fresh=True)
+
+    assert searchResult[0]["WaiverDate"] == "2030-01-01"
+    getFromGmailEmail.assert_called_once()
+    assert awi.messageContextCache[("user", "message")][1] is searchResult
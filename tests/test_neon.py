@@ -0,0 +1,50 @@
+import datetime
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from ..helpers import neon
+
+def page(registeredDays, currentPage, totalPages):
+    today = datetime.date.today()
+    registrations = [{"id": str(days), "registrationDateTime": f"{today - datetime.timedelta(days=days)}T12:00:00Z"}
+                     for days in registeredDays]
+    response = MagicMock()
+    response.json.return_value = {"eventRegistrations": registrations,
+                                  "pagination": {"currentPage": currentPage, "totalPages": totalPages}}
+    return response
+
+PAGES = [page([1, 5], 0, 3), page([30, 400], 1, 3), page([800, 900], 2, 3)]
+
+def test_iterates_every_page_without_cutoff():
+    with patch.object(neon, "apiCall", side_effect=PAGES) as apiCall:
+        registrations = list(neon.iterAccountEventRegistrations("1", "key", "user", pageSize=2))
+
+    assert [registration["id"] for registration in registrations] == ["1", "5", "30", "400", "800", "900"]
+    assert apiCall.call_count == 3
+    assert "currentPage=2&pageSize=2" in apiCall.call_args.args[1]
+
+def test_stops_paging_at_lookback():
+    since = datetime.date.today() - datetime.timedelta(days=365)
+    with patch.object(neon, "apiCall", side_effect=PAGES) as apiCall:
+        registrations = list(neon.iterAccountEventRegistrations("1", "key", "user", since=since, pageSize=2))
+
+    assert [registration["id"] for registration in registrations] == ["1", "5", "30"]
+    assert apiCall.call_count == 2
+
+def searchRows(searchFields, outputFields, key, user, page=0):
+    low, high = (int(field["value"]) for field in json.loads(searchFields))
+    rows = [{"Event ID": str(eventId), "Event Name": f"Event {eventId}", "Event Start Date": "2030-01-01",
+             "Event End Date": "2030-01-01"} for eventId in range(low, high + 1)]
+    return {"searchResults": rows[page * 200:(page + 1) * 200], "pagination": {"totalPages": (len(rows) + 199) // 200}}
+
+def test_events_by_ids_searches_id_ranges():
+    with patch.object(neon, "postEventSearch", side_effect=searchRows) as postEventSearch:
+        events = neon.getEventsByIds([5, "7", 150, 1000], "key", "user")
+
+    assert sorted(events, key=int) == ["5", "7", "150", "1000"]
+    assert events["7"] == {"id": "7", "name": "Event 7",
+                           "eventDates": {"startDate": "2030-01-01", "endDate": "2030-01-01",
+                                          "startTime": None, "endTime": None}}
+    # 5-150 fit in one range, 1000 needs its own
+    assert postEventSearch.call_count == 2
+    assert neon.getEventsByIds([], "key", "user") == {}
@@ -0,0 +1,88 @@
+import json
+import threading
+import pytest
+from unittest.mock import patch, MagicMock
+from .. import neonUtil
+
+def response(body):
+    response = MagicMock(status_code=200)
+    response.json.return_value = body
+    return response
+
+def accountSearch(url, data, headers):
+    searchFields = json.loads(data)["searchFields"]
+    low, high = (int(field["value"]) for field in searchFields)
+    rows = [{"Account ID": str(id), "First Name": "First", "Last Name": f"Last{id}", "Individual Type": "Instructor"}
+            for id in range(low, high + 1) if id % 2]
+    return response({"searchResults": rows, "pagination": {"totalPages": 1}})
+
+MEMBERSHIP = {"termStartDate": "2020-01-01", "termEndDate": "2099-01-01", "status": "SUCCEEDED",
+              "autoRenewal": True, "fee": 50}
+
+def memberships(url, headers):
+    return response({"memberships": [MEMBERSHIP] if "/accounts/1/" in url else []})
+
+def test_members_by_ids():
+    with patch.object(neonUtil.requests, "post", side_effect=accountSearch) as post, \
+         patch.object(neonUtil.requests, "get", side_effect=memberships) as get:
+        accounts = neonUtil.getMembersByIds([1, "3", 4, 2001], "key", "user")
+
+    # 1-4 are one search, 2001 another; even IDs don't exist
+    assert post.call_count == 2
+    assert sorted(accounts) == ["1", "2001", "3"]
+    assert get.call_count == 3
+
+    assert accounts["1"]["fullName"] == "First Last1"
+    assert accounts["1"]["individualTypes"] == [{"name": "Instructor"}]
+    assert accounts["1"]["validMembership"] is True
+    assert accounts["1"]["Membership Expiration Date"] == "2099-01-01"
+    assert accounts["3"]["validMembership"] is False
+
+def test_member_by_id_fetches_account_and_memberships_concurrently():
+    bothRequested = threading.Barrier(2, timeout=5)
+    account = {"individualAccount": {"accountId": "1", "primaryContact": {"firstName": "Jane", "lastName": "Doe",
+                                                                          "email1": "jane@example.com"},
+                                     "accountCustomFields": [{"name": "OpenPathID", "value": "42"}]}}
+
+    def get(url, headers):
+        # Each request waits until the other one has been sent
+        bothRequested.wait()
+        return memberships(url, headers) if url.endswith("/memberships") else response(account)
+
+    with patch.object(neonUtil.requests, "get", side_effect=get):
+        member = neonUtil.getMemberById(1, "key", "user")
+
+    assert member["fullName"] == "Jane Doe"
+    assert member["OpenPathID"] == "42"
+    assert member["validMembership"] is True
+
+def test_sparse_ids_are_searched_in_small_ranges_concurrently():
+    # Each range's search waits until all three have been sent
+    allSearched = threading.Barrier(3, timeout=5)
+    searched = []
+
+    def post(url, data, headers):
+        allSearched.wait()
+        searched.append(tuple(int(field["value"]) for field in json.loads(data)["searchFields"]))
+        return accountSearch(url, data, headers)
+
+    with patch.object(neonUtil.requests, "post", side_effect=post):
+        accounts = neonUtil.getAccountsByIds([1, 21, 45, 301, 3001], "key", "user")
+
+    assert sorted(searched) == [(1, 45), (301, 301), (3001, 3001)]
+    assert sorted(accounts) == ["1", "21", "3001", "301", "45"]
+
+def test_members_by_ids_fetch_memberships_concurrently():
+    # Each membership request waits until all three have been sent
+    allRequested = threading.Barrier(3, timeout=5)
+
+    def get(url, headers):
+        allRequested.wait()
+        return memberships(url, headers)
+
+    with patch.object(neonUtil.requests, "post", side_effect=accountSearch), \
+         patch.object(neonUtil.requests, "get", side_effect=get):
+        accounts = neonUtil.getMembersByIds([1, 3, 5], "key", "user")
+
+    assert sorted(accounts) == ["1", "3", "5"]
+    assert accounts["1"]["validMembership"] is True
@@ -0,0 +1,56 @@
+import datetime
+import json
+import pytest
+from unittest.mock import patch
+from ..helpers import orderIndex
+
+def order(cartId, orderDate):
+    return {"Shopping Cart ID": cartId, "Order Date": orderDate, "Account ID": f"acct{cartId}",
+            "First Name": "First", "Last Name": f"Last{cartId}", "Email 1": f"{cartId}@example.com"}
+
+def test_incremental_sync():
+    firstSync = [[order("100", "2030-01-01"), order("101", "2030-01-02")], [order("102", "2030-01-03")]]
+    searches = []
+
+    def search(searchFields, outputFields, key, user, page=0):
+        searches.append(json.loads(searchFields)[0]["value"])
+        return {"searchResults": firstSync[page], "pagination": {"totalPages": len(firstSync)}}
+
+    index = orderIndex.OrderIndex(syncInterval=600, historyDays=30)
+    assert index.needsSync()
+    assert index.lookup("100") is None
+
+    with patch.object(orderIndex.neon, "postOrderSearch", side_effect=search):
+        index.sync("key", "user")
+
+    assert searches == [(datetime.date.today() - datetime.timedelta(days=30)).isoformat()] * 2
+    assert not index.needsSync()
+    assert index.lookup(101) == {"Account ID": "acct101", "First Name": "First", "Last Name": "Last101",
+                                 "Email 1": "101@example.com"}
+
+    # The next sync only asks for orders from the last order date on
+    firstSync = [[order("102", "2030-01-03"), order("103", "2030-01-03T10:00:00")]]
+    searches.clear()
+    with patch.object(orderIndex.neon, "postOrderSearch", side_effect=search):
+        index.sync("key", "user")
+
+    assert searches == ["2030-01-03"]
+    assert index.lookup("100") is not None
+    assert index.lookup("103")["Account ID"] == "acct103"
+
+def test_add_orders_found_in_neon():
+    index = orderIndex.OrderIndex()
+    index.add("200", order("200", "2030-01-01"))
+    assert index.lookup("200")["Email 1"] == "200@example.com"
+
+def test_sync_only_reads_successful_orders():
+    searches = []
+
+    def search(searchFields, outputFields, key, user, page=0):
+        searches.append(json.loads(searchFields))
+        return {"searchResults": [], "pagination": {"totalPages": 1}}
+
+    with patch.object(orderIndex.neon, "postOrderSearch", side_effect=search):
+        orderIndex.OrderIndex(historyDays=30).sync("key", "user")
+
+    assert searches[0][1] == {"field": "Order Status", "operator": "EQUAL", "value": "SUCCEEDED"}
@@ -0,0 +1,127 @@
+import copy
+import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from .. import asmblyWorkspaceIntegration as awi
+from .test_concurrency import GEVENT
+
+@pytest.fixture(autouse=True)
+def emptyCache():
+    awi.registrantCountCache.clear()
+    yield
+    awi.registrantCountCache.clear()
+
+def registrations(count):
+    attendee = {"registrationStatus": "SUCCEEDED"}
+    return {"eventRegistrations": [{"tickets": [{"attendees": [attendee]}]} for _ in range(count)]}
+
+def test_counts_come_from_search_results():
+    classes = [{"Event ID": "1", "Registrants": "4"}, {"Event ID": "2", "Registrants": "0"}]
+
+    with patch.object(awi.neon, "getEventRegistrants") as getEventRegistrants:
+        counts = awi.getRegistrantCounts(classes, "key")
+
+    assert counts == {"1": 4, "2": 0}
+    getEventRegistrants.assert_not_called()
+
+def test_missing_counts_are_fetched_once_and_cached():
+    classes = [{"Event ID": "1", "Registrants": "4"}, {"Event ID": "2"}, {"Event ID": "3", "Registrants": ""}]
+
+    with patch.object(awi.neon, "getEventRegistrants", side_effect=lambda eventId, *args: registrations(int(eventId))) \
+            as getEventRegistrants:
+        assert awi.getRegistrantCounts(classes, "key") == {"1": 4, "2": 2, "3": 3}
+        assert awi.getRegistrantCounts(classes, "key") == {"1": 4, "2": 2, "3": 3}
+
+    assert sorted(call.args[0] for call in getEventRegistrants.call_args_list) == ["2", "3"]
+
+def searchEvent(**parameters):
+    gevent = copy.deepcopy(GEVENT)
+    gevent["commonEventObject"]["parameters"] = parameters
+    gevent["commonEventObject"]["formInputs"] = {
+        "className": {"stringInputs": {"value": ["Woodturning"]}},
+        "startDate": {"dateInput": {"msSinceEpoch": None}},
+        "endDate": {"dateInput": {"msSinceEpoch": None}},
+    }
+    return gevent
+
+def catalogClasses(count):
+    return [{"Event ID": str(i), "Event Name": f"Woodturning {i}", "Event Start Date": f"2030-01-{i + 1:02d}",
+             "Event Capacity": "8"} for i in range(count)]
+
+@pytest.fixture
+def searchBackends(monkeypatch):
+    monkeypatch.setattr(awi, "BASE_URL", "https://addon.example.com")
+    monkeypatch.setattr(awi, "CLASS_PAGE_SIZE", 10)
+    counted = []
+
+    def getRegistrantCounts(classes, key):
+        counted.append([result["Event ID"] for result in classes])
+        return {result["Event ID"]: 1 for result in classes}
+
+    with patch.object(awi, "verifyGoogleToken", return_value=True), \
+         patch.object(awi, "decodeUser", return_value="1"), \
+         patch.object(awi, "getUserKeys", return_value={"N_APIkey": "key"}), \
+         patch.object(awi.eventCatalog.catalog, "search", side_effect=lambda *args: catalogClasses(25)), \
+         patch.object(awi.eventCatalog.catalog, "needsRefresh", return_value=False), \
+         patch.object(awi, "getRegistrantCounts", side_effect=getRegistrantCounts):
+        yield counted
+
+def searchPage(gevent, navigation="pushCard"):
+    response = TestClient(awi.app).post("/searchClasses", json=gevent)
+    assert response.status_code == 200
+    return response.json()["renderActions"]["action"]["navigations"][0][navigation]["sections"][0]["widgets"]
+
+def moreToken(widgets):
+    action = widgets[-1]["decorated_text"]["button"]["on_click"]["action"]
+    assert action["function"] == "https://addon.example.com/searchClasses"
+    return {parameter["key"]: parameter["value"] for parameter in action["parameters"]}["continuationToken"]
+
+def test_counts_are_only_fetched_for_the_visible_page(searchBackends):
+    widgets = searchPage(searchEvent())
+
+    assert [widget["decorated_text"].get("top_label") for widget in widgets[:-1]] == [str(i) for i in range(10)]
+    assert widgets[-1]["decorated_text"]["text"] == "Showing 1-10 of 25 classes"
+    assert searchBackends == [[str(i) for i in range(10)]]
+
+def test_more_continues_the_search(searchBackends):
+    widgets = searchPage(searchEvent())
+    widgets = searchPage(searchEvent(continuationToken=moreToken(widgets)), "updateCard")
+    assert [widget["decorated_text"].get("top_label") for widget in widgets[:-1]] == [str(i) for i in range(10, 20)]
+
+    widgets = searchPage(searchEvent(continuationToken=moreToken(widgets)), "updateCard")
+    assert [widget["decorated_text"]["top_label"] for widget in widgets] == [str(i) for i in range(20, 25)]
+    assert searchBackends[-1] == [str(i) for i in range(20, 25)]
+
+    search = awi.eventCatalog.catalog.search
+    assert search.call_args_list[-1].args == ("Woodturning", datetime.date.today().isoformat(), None)
+
+@pytest.mark.parametrize("token", [
+    "not a token",
+    awi.encodeContinuationToken("Woodturning", "2030-01-01", None, 10)[:-4],
+    awi.base64.urlsafe_b64encode(awi.orjson.dumps(["Woodturning", "2030-01-01", 7, 10])).decode(),
+    awi.base64.urlsafe_b64encode(awi.orjson.dumps(["Woodturning", None, None, 10])).decode(),
+])
+def test_bad_continuation_token(searchBackends, token):
+    gevent = searchEvent(continuationToken=token)
+    response = TestClient(awi.app).post("/searchClasses", json=gevent)
+
+    assert response.status_code == 200
+    assert "Please search again" in response.text
+    assert searchBackends == []
+
+def test_uncapped_events_are_never_full(searchBackends):
+    classes = catalogClasses(3)
+    classes[0]["Event Capacity"] = ""
+    classes[1]["Event Capacity"] = "0"
+    classes[2]["Event Capacity"] = "1"
+
+    with patch.object(awi.eventCatalog.catalog, "search", side_effect=lambda *args: classes):
+        widgets = searchPage(searchEvent())
+
+    texts = [widget["decorated_text"]["text"] for widget in widgets]
+    buttons = [widget["decorated_text"]["button"] for widget in widgets]
+    assert texts == ["Woodturning 0 (1 registered)", "Woodturning 1 (1 registered)", "Woodturning 2 (1/1)"]
+    assert [(button["text"], button["disabled"]) for button in buttons] == \
+        [("Register", False), ("Register", False), ("Full", True)]
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from .. import asmblyWorkspaceIntegration as awi
+from .test_concurrency import GEVENT
+
+BASE_URL = "https://addon.example.com"
+
+@pytest.fixture(autouse=True)
+def staticKeys(monkeypatch):
+    monkeypatch.setenv("static_keys", '{"N_APIuser": "test"}')
+    awi.loadStaticKeys()
+    monkeypatch.setattr(awi, "BASE_URL", BASE_URL)
+    monkeypatch.setattr(awi, "staticCards", {})
+
+    with patch.object(awi, "verifyGoogleToken", return_value=True), \
+         patch.object(awi, "decodeUser", return_value="1"):
+        yield
+
+def post(path):
+    return TestClient(awi.app).post(path, json=GEVENT)
+
+@pytest.mark.parametrize("path,buildCard", [
+    ("/home", awi.homeCard),
+    ("/contextualHome", awi.contextualHomeCard),
+    ("/composeTrigger", awi.composeTriggerResponse),
+    ("/popCard", awi.popCardResponse),
+    ("/popToClassPage", awi.popToClassPageResponse),
+    ("/popToHome", awi.popToHomeResponse),
+])
+def test_static_card_matches_builder(path, buildCard):
+    response = post(path)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == buildCard(BASE_URL)
+
+def test_class_home_page_gets_current_time():
+    before = int(time.time() * 1000)
+    response = post("/classHomePage")
+    after = int(time.time() * 1000)
+
+    card = response.json()["renderActions"]["action"]["navigations"][0]["pushCard"]
+    pickers = [widget["dateTimePicker"] for widget in card["sections"][0]["widgets"] if "dateTimePicker" in widget]
+    assert len(pickers) == 2
+    assert all(before <= picker["valueMsEpoch"] <= after for picker in pickers)
+
+    search = card["sections"][0]["widgets"][-1]["buttonList"]["buttons"][0]
+    assert search["onClick"]["action"]["function"] == BASE_URL + "/searchClasses"
+    assert awi.STATIC_BASE_URL.encode() not in response.content
+
+def test_static_cards_are_built_once():
+    with patch.object(awi, "homeCard", wraps=awi.homeCard) as homeCard:
+        body = awi.renderStaticCard(homeCard)
+        assert awi.renderStaticCard(homeCard) is body
+
+    homeCard.assert_called_once_with(awi.STATIC_BASE_URL)
+
+def test_static_cards_follow_base_url(monkeypatch):
+    awi.renderStaticCard(awi.homeCard)
+    monkeypatch.setattr(awi, "BASE_URL", "https://other.example.com")
+
+    assert b"https://other.example.com/checkAccess" in awi.renderStaticCard(awi.homeCard)
+
+def test_cards_skip_jsonable_encoder():
+    with patch("fastapi.routing.jsonable_encoder") as jsonableEncoder, \
+         patch.object(awi.eventCatalog.catalog, "needsRefresh", return_value=False), \
+         patch.object(awi.eventCatalog.catalog, "suggestNames", return_value=["Woodshop Safety"]):
+        suggestions = post("/classNameSuggestions")
+        home = post("/home")
+
+    jsonableEncoder.assert_not_called()
+    assert suggestions.headers["content-type"] == "application/json"
+    assert suggestions.json()["renderActions"]["action"]["suggestions"]["items"] == [{"text": "Woodshop Safety"}]
+    assert home.json() == awi.homeCard(BASE_URL)
+
+def test_suggestions_never_refresh_the_catalog():
+    with patch.object(awi.eventCatalog.catalog, "needsRefresh", return_value=True), \
+         patch.object(awi.eventCatalog.catalog, "refreshInBackground") as refreshInBackground, \
+         patch.object(awi, "getUserKeys") as getUserKeys, \
+         patch.object(awi.eventCatalog.catalog, "suggestNames", return_value=[]):
+        response = post("/classNameSuggestions")
+
+    assert response.status_code == 200
+    getUserKeys.assert_not_called()
+    refreshInBackground.assert_not_called()
+
+def test_card_route_supports_async_and_sync_endpoints():
+    cardApp = FastAPI()
+    cardApp.router.route_class = awi.CardRoute
+    threads = {}
+
+    @cardApp.post("/asyncCard")
+    async def asyncCard():
+        threads["async"] = threading.current_thread()
+        return {"card": "async"}
+
+    @cardApp.post("/syncCard")
+    def syncCard():
+        threads["sync"] = threading.current_thread()
+        return {"card": "sync"}
+
+    client = TestClient(cardApp)
+    assert client.post("/asyncCard").json() == {"card": "async"}
+    assert client.post("/syncCard").json() == {"card": "sync"}
+    # Plain endpoints still run on the threadpool rather than the event loop
+    assert threads["sync"] is not threads["async"]
@@ -0,0 +1,44 @@
+import json
+import logging
+import sys
+from unittest.mock import patch
+
+from ..helpers import structuredLog
+
+def formatRecord(level, msg, *args, exc_info=None, **extra):
+    record = logging.getLogger("test").makeRecord("test", level, __file__, 10, msg, args, exc_info, "sync", extra)
+    return json.loads(structuredLog.JsonFormatter().format(record))
+
+def test_json_entry_for_cloud_logging():
+    entry = formatRecord(logging.WARNING, "Updating %s of %d", "groups", 3, neonId="1234")
+
+    assert entry["severity"] == "WARNING"
+    assert entry["message"] == "Updating groups of 3"
+    assert entry["logger"] == "test"
+    assert entry["neonId"] == "1234"
+    assert entry["logging.googleapis.com/sourceLocation"] == {"file": __file__, "line": 10, "function": "sync"}
+    assert "T" in entry["time"]
+
+def test_exception_is_in_message():
+    try:
+        raise ValueError("Neon is down")
+    except ValueError:
+        entry = formatRecord(logging.ERROR, "Sync failed", exc_info=sys.exc_info())
+
+    assert entry["severity"] == "ERROR"
+    assert entry["message"].startswith("Sync failed\nTraceback")
+    assert "ValueError: Neon is down" in entry["message"]
+
+def test_pretty_is_only_formatted_when_logged(caplog):
+    account = {"Account ID": "1234", "memberships": list(range(50))}
+
+    with patch.object(structuredLog, "pformat", wraps=structuredLog.pformat) as pformat:
+        with caplog.at_level(logging.INFO):
+            logging.debug("%s", structuredLog.Pretty(account))
+        pformat.assert_not_called()
+
+        with caplog.at_level(logging.DEBUG):
+            logging.debug("%s", structuredLog.Pretty(account))
+        pformat.assert_called_with(account)
+
+    assert caplog.records[-1].getMessage() == structuredLog.pformat(account)